@@ -1,220 +1,194 @@
 import streamlit as st
-import sqlite3
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-import base64
-from streamlit_calendar import calendar
-import os
+import time
 import calendar as cal_mod  # Modul calendar Python
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
+
+import attachments
+import db
+import jobs
+import metrics
+
+# Awal rerun; total waktu halaman dicatat ke metrics di akhir skrip
+_mulai_rerun = time.perf_counter()
+
+# plotly dan streamlit_calendar diimpor di dalam halaman yang memakainya, sehingga
+# start dingin dan rerun halaman lain tidak ikut membayar biaya impornya.
+
+LOGO_URL = "https://cesgs.unair.ac.id/wp-content/uploads/2024/02/Logo-CESGS-UNAIR-400x121.png"
 
 # Konfigurasi halaman Streamlit
 st.set_page_config(page_title="Dashboard Absensi", layout="wide")
 col1, col2 = st.columns([1, 4])
 with col1:
-    st.image("https://cesgs.unair.ac.id/wp-content/uploads/2024/02/Logo-CESGS-UNAIR-400x121.png", use_column_width=True)
+    st.image(LOGO_URL, use_container_width=True)
 with col2:
     st.markdown('<h1 style="text-align:right; color: black;">Dashboard Absensi Karyawan</h1>', unsafe_allow_html=True)
 
-# --- Fungsi Utilitas ---
-
-def cek_ketepatan_waktu(waktu_masuk):
-    try:
-        waktu_batas = datetime.strptime("09:17", "%H:%M").time()
-        if isinstance(waktu_masuk, str):
-            waktu_masuk_obj = datetime.strptime(waktu_masuk.strip(), "%H:%M").time()
-        elif isinstance(waktu_masuk, (datetime, pd.Timestamp)):
-            waktu_masuk_obj = waktu_masuk.time()
-        else:
-            return "Invalid Time"
-        return "Telat" if waktu_masuk_obj > waktu_batas else "Tepat Waktu"
-    except Exception as e:
-        return "Invalid Time"
-
-def get_karyawan_mapping():
-    conn = sqlite3.connect("absensi.db")
-    try:
-        df_karyawan = pd.read_sql_query("SELECT ID, Divisi FROM karyawan", conn)
-    except Exception as e:
-        st.error("Error membaca data karyawan dari database.")
-        df_karyawan = pd.DataFrame(columns=["ID", "Divisi"])
-    conn.close()
-    mapping = df_karyawan.set_index("ID")["Divisi"].to_dict()
-    return mapping
-
-def format_presensi_data(df):
-    # Pastikan kolom wajib ada
-    required_cols = ['ID', 'Nama', 'Jenis']
-    for col in required_cols:
-        if col not in df.columns:
-            st.error(f"Kolom '{col}' tidak ditemukan dalam data!")
-            return pd.DataFrame()
-    
-    df["Jenis"] = df["Jenis"].str.lower()
-    # Identifikasi kolom tanggal (diasumsikan nama kolom berupa digit: "1", "2", ..., "31")
-    day_cols = [col for col in df.columns if str(col).isdigit()]
-    if not day_cols:
-        st.error("Tidak ditemukan kolom tanggal (1-31) dalam data!")
-        return pd.DataFrame()
-    
-    # Ubah data dari format wide ke long
-    df_long = df.melt(
-        id_vars=['ID', 'Nama', 'Jenis'],
-        value_vars=day_cols,
-        var_name='tanggal',
-        value_name='waktu'
-    )
-    df_long = df_long.dropna(subset=['waktu'])
-    
-    # Pivot data sehingga nilai pada kolom 'Jenis' menjadi kolom tersendiri
-    df_pivot = df_long.pivot_table(
-        index=['ID', 'Nama', 'tanggal'],
-        columns='Jenis',
-        values='waktu',
-        aggfunc='first'
-    ).reset_index()
-    
-    if 'datang' not in df_pivot.columns:
-        df_pivot['datang'] = ""
-    if 'pulang' not in df_pivot.columns:
-        df_pivot['pulang'] = ""
-    
-    # Hitung status kehadiran berdasarkan waktu "datang"
-    df_pivot['status'] = df_pivot['datang'].apply(lambda x: cek_ketepatan_waktu(x) if x != "" else "No Data")
-    
-    df_final = df_pivot[['ID', 'Nama', 'tanggal', 'status', 'datang', 'pulang']].copy()
-    df_final.rename(columns={'ID': 'id'}, inplace=True)
-    mapping = get_karyawan_mapping()
-    df_final['divisi'] = df_final['id'].apply(lambda x: mapping.get(x, "No Data"))
-    df_final = df_final[['id', 'Nama', 'divisi', 'tanggal', 'status', 'datang', 'pulang']]
-    return df_final
-
 # --- Login dan Role Management ---
 # Role-based access (Admin vs Karyawan)
 role = st.sidebar.radio("Pilih Role", ["Admin", "Karyawan"])
 
 if role == "Admin":
-    menu = st.sidebar.selectbox("Pilih Menu", ["Dashboard", "Data Pengajuan Izin", "Data Absensi", "Kalender Absensi"])
+    menu = st.sidebar.selectbox("Pilih Menu", ["Dashboard", "Data Pengajuan Izin", "Data Absensi", "Kalender Absensi", "Kinerja"])
 elif role == "Karyawan":
     menu = st.sidebar.selectbox("Pilih Menu", ["Pengajuan Izin Kerja"])
 
-# --- Inisialisasi Database ---
-def init_db():
-    conn = sqlite3.connect("absensi.db")
-    c = conn.cursor()
-    
-    # Tabel izin dengan kolom status (default: 'Pending')
-    c.execute('''CREATE TABLE IF NOT EXISTS izin (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nama TEXT,
-                    divisi TEXT,
-                    jenis_pengajuan TEXT,
-                    tanggal_pengajuan TEXT,
-                    tanggal_izin TEXT,
-                    jumlah_hari INTEGER,
-                    file_pengajuan BLOB,
-                    file_persetujuan BLOB,
-                    status TEXT DEFAULT 'Pending'
-                )''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS absensi (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nama TEXT,
-                    divisi TEXT,
-                    tanggal TEXT,
-                    jam_masuk TEXT,
-                    jam_keluar TEXT,
-                    status TEXT
-                )''')
-    
-    # Tabel karyawan: data minimal (ID, Nama, Divisi)
-    c.execute('''CREATE TABLE IF NOT EXISTS karyawan (
-                    ID INTEGER PRIMARY KEY,
-                    Nama TEXT,
-                    Divisi TEXT
-                )''')
-    
-    conn.commit()
-    conn.close()
+# --- Inisialisasi Database dan runner pekerjaan latar (sekali per proses) ---
+db.ensure_db()
+jobs.start()
 
-init_db()
+# Lama menunggu pekerjaan kecil (mis. menerima beberapa izin) di rerun yang sama
+# sebelum pekerjaan itu dilepas ke latar belakang dan dipantau
+TUNGGU_PEKERJAAN_DETIK = 2
 
-# --- Fungsi Penyimpanan dan Pengambilan Data ---
+# --- Fungsi Tampilan ---
 
-def save_absensi_to_db(df):
-    conn = sqlite3.connect("absensi.db")
-    for idx, row in df.iterrows():
-        conn.execute(
-            "INSERT INTO absensi (nama, divisi, tanggal, jam_masuk, jam_keluar, status) VALUES (?, ?, ?, ?, ?, ?)",
-            (row['nama'], row['divisi'], row['tanggal'], row['jam_masuk'], row['jam_keluar'], row['status'])
-        )
-    conn.commit()
-    conn.close()
+@st.cache_resource(max_entries=16)
+def grafik_jenis_pengajuan(jenis, jumlah):
+    """
+    Figure plotly jumlah pengajuan per jenis. Disimpan per proses menurut isinya,
+    karena membangun layout plotly memakan puluhan ms di setiap rerun.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=jenis,
+        y=jumlah,
+        name="Jumlah Pengajuan",
+        marker=dict(color=[warna_biru if x != "WFH" else warna_kuning for x in jenis]),
+        text=jumlah,
+        textposition='outside',
+    ))
+    fig.update_layout(
+        title="Jumlah Pengajuan Izin per Jenis",
+        title_font_size=18,
+        xaxis_title="Jenis Pengajuan",
+        yaxis_title="Jumlah Pengajuan",
+        plot_bgcolor='rgba(0,0,0,0)',
+        template="plotly_dark",
+        xaxis_tickangle=-45,
+        hovermode="closest"
+    )
+    return fig
 
-def save_izin(nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin, jumlah_hari, file_pengajuan_bytes, file_persetujuan_bytes):
-    conn = sqlite3.connect("absensi.db")
-    c = conn.cursor()
+def buka_lampiran(ref, prefix):
+    """Tandai lampiran untuk ditampilkan; byte baru dibaca oleh tampilkan_lampiran()."""
+    st.session_state.lampiran = (ref, prefix)
 
-    # Pastikan file dalam bentuk bytes (BLOB)
-    file_pengajuan_blob = file_pengajuan_bytes if file_pengajuan_bytes else None
-    file_persetujuan_blob = file_persetujuan_bytes if file_persetujuan_bytes else None
+def tampilkan_lampiran():
+    if not st.session_state.get("lampiran"):
+        return
+    ref, prefix = st.session_state.lampiran
+    data, mime = attachments.get(ref)
+    if data is None:
+        st.warning("File tidak ditemukan.")
+        return
+    st.markdown(f"#### {prefix}")
+    if mime.startswith("image/"):
+        st.image(data, width=480)
+    col_unduh, col_tutup = st.columns([1, 5])
+    col_unduh.download_button("Unduh", data, file_name=attachments.filename(prefix, mime), mime=mime, key="unduh_lampiran")
+    if col_tutup.button("Tutup", key="tutup_lampiran"):
+        st.session_state.lampiran = None
+        st.rerun()
+
+def tampilan_absensi(df):
+    """Absensi bertipe untuk ditampilkan: tanggal tanpa jam, jam dalam "HH:MM"."""
+    return df.assign(tanggal=df["tanggal"].dt.date,
+                     jam_masuk=db.jam_teks(df["jam_masuk"]), jam_keluar=db.jam_teks(df["jam_keluar"]))
+
+# Warna label status di tabel absensi; Telat memakai merah muda seperti sorotan baris sebelumnya
+WARNA_STATUS = {status: "#ffcccc" if status == "Telat" else "#e8e8e8" for status in db.STATUS_ABSENSI}
+
+def label_status(status):
+    """Status (category) sebagai list satu label per baris untuk MultiselectColumn; diambil per kategori."""
+    kategori = status.cat.categories
+    label = np.empty(len(kategori) + 1, dtype=object)
+    for i, nilai in enumerate(kategori):
+        label[i] = [nilai]
+    label[-1] = []  # kode -1 = status kosong
+    return pd.Series(label[status.cat.codes.to_numpy()], index=status.index)
+
+def kirim_pekerjaan(judul, jenis, params=None, berkas=None, kunci=None):
+    """Kirim pekerjaan ke antrian latar dan pantau progresnya di sesi ini."""
+    job_id = jobs.submit(jenis, params, berkas, kunci)
+    st.session_state.pekerjaan[job_id] = judul
+    return job_id
+
+def upload_absensi(tahun, bulan, label):
+    """
+    File uploader absensi bulanan. Import dikerjakan runner latar per chunk dan
+    baru mengubah absensi setelah seluruh file valid; halaman hanya memantau progresnya.
+    """
+    uploaded_file = st.file_uploader(label, type=["xlsx"], key=f"upload_absensi_{tahun}_{bulan}")
+    if uploaded_file is not None and st.session_state.get("upload_terkirim") != uploaded_file.file_id:
+        st.session_state.upload_terkirim = uploaded_file.file_id
+        data = uploaded_file.getvalue()
+        kirim_pekerjaan(
+            f"Upload absensi {bulan_indonesia[bulan]} {tahun}", "ingest_excel",
+            {"tahun": int(tahun), "bulan": int(bulan)}, berkas=data,
+            kunci=f"ingest_excel:{tahun}-{bulan:02d}:{attachments.content_hash(data)}",
+        )
+        st.rerun()
+
+def pesan_pekerjaan(job, judul):
+    """Teks hasil pekerjaan yang sudah selesai atau gagal."""
+    if job["status"] == jobs.STATUS_GAGAL:
+        return f"{judul} gagal: {job['pesan']}"
+    hasil = job["hasil"] or {}
+    if job["jenis"] == "ingest_excel":
+        if sum(hasil.values()) == 0:
+            return "Data dalam file tidak valid atau kosong."
+        return (f"Data absensi berhasil disimpan! {hasil['inserted']} baru, "
+                f"{hasil['updated']} diperbarui, {hasil['unchanged']} tidak berubah.")
+    if job["jenis"] == "proses_izin":
+        return f"{judul}: {len(hasil['diproses'])} pengajuan, ID {', '.join(map(str, hasil['diproses']))}."
+    if job["jenis"] == "rebuild_rekap":
+        return f"Rekap dibangun ulang: {hasil['rekap_harian']} baris harian, {hasil['rekap_bulanan']} baris bulanan."
+    return f"{judul} selesai."
+
+@st.fragment(run_every=1)
+def pantau_pekerjaan():
+    """Progress pekerjaan latar milik sesi ini; seluruh halaman dimuat ulang saat ada yang selesai."""
+    ada_selesai = False
+    for job_id, judul in list(st.session_state.pekerjaan.items()):
+        job = jobs.get(job_id)
+        if job is None or job["status"] in jobs.STATUS_AKHIR:
+            del st.session_state.pekerjaan[job_id]
+            if job is not None:
+                st.session_state.hasil_pekerjaan.append((job["status"], pesan_pekerjaan(job, judul)))
+            ada_selesai = True
+        else:
+            st.progress(job["progress"] or 0.0, text=f"{judul}: {job['pesan'] or 'menunggu giliran'}")
+    if ada_selesai:
+        st.rerun(scope="app")
 
-    c.execute('''INSERT INTO izin (nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin, jumlah_hari, file_pengajuan, file_persetujuan, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
-              (nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin, jumlah_hari, file_pengajuan_blob, file_persetujuan_blob, "Pending"))
-    
-    conn.commit()
-    conn.close()
-
-def load_izin():
-    conn = sqlite3.connect("absensi.db")
-    df = pd.read_sql_query("SELECT * FROM izin", conn)
-    conn.close()
-    return df
-
-def load_absensi():
-    conn = sqlite3.connect("absensi.db")
-    df = pd.read_sql_query("SELECT * FROM absensi", conn)
-    conn.close()
-    return df
-
-def get_download_link(file_bytes, filename):
-    if file_bytes is None:
-        return ""
-    b64 = base64.b64encode(file_bytes).decode()
-    href = f'<a href="data:image/jpeg;base64,{b64}" download="{filename}" target="_blank">Lihat File</a>'
-    return href
-
-def update_izin_status(izin_id, new_status):
-    conn = sqlite3.connect("absensi.db")
-    c = conn.cursor()
-    c.execute("UPDATE izin SET status = ? WHERE id = ?", (new_status, izin_id))
-    conn.commit()
-    conn.close()
-
-def add_absensi_from_izin(izin_record):
+def proses_izin_terpilih(ids, new_status, skip_weekend=False):
     """
-    Fungsi ini akan memasukkan data absensi (ketidakhadiran) ke tabel absensi 
-    untuk setiap hari sesuai dengan tanggal_izin dan jumlah_hari pada data izin.
+    Terima/tolak beberapa izin pending lewat antrian pekerjaan. Izin yang sudah
+    diproses admin lain dilewati. Pilihan kecil biasanya selesai dalam
+    TUNGGU_PEKERJAAN_DETIK dan dikembalikan sebagai job; bila belum, pekerjaan
+    dipantau oleh pantau_pekerjaan() dan None dikembalikan.
     """
-    nama = izin_record['nama']
-    divisi = izin_record['divisi']
-    try:
-        start_date = datetime.strptime(izin_record['tanggal_izin'], "%Y-%m-%d").date()
-    except Exception as e:
-        st.error("Format tanggal izin tidak valid.")
-        return
-    jumlah_hari = int(izin_record['jumlah_hari'])
-    conn = sqlite3.connect("absensi.db")
-    c = conn.cursor()
-    for i in range(jumlah_hari):
-        current_date = start_date + timedelta(days=i)
-        c.execute("INSERT INTO absensi (nama, divisi, tanggal, jam_masuk, jam_keluar, status) VALUES (?, ?, ?, ?, ?, ?)",
-                  (nama, divisi, current_date.strftime("%Y-%m-%d"), "", "", "Izin"))
-    conn.commit()
-    conn.close()
+    judul = "Izin diterima" if new_status == db.STATUS_DITERIMA else "Izin ditolak"
+    job_id = jobs.submit("proses_izin", {"ids": [int(i) for i in ids], "status": new_status,
+                                         "skip_weekend": bool(skip_weekend)})
+    job = jobs.tunggu(job_id, TUNGGU_PEKERJAAN_DETIK)
+    if job["status"] not in jobs.STATUS_AKHIR:
+        st.session_state.pekerjaan[job_id] = judul
+        return None
+    return job
+
+def halaman_pending(arah):
+    """Callback navigasi keyset: simpan tumpukan id terakhir tiap halaman."""
+    kursor = st.session_state.pending_kursor
+    if arah > 0:
+        kursor.append(st.session_state.pending_id_terakhir)
+    elif len(kursor) > 1:
+        kursor.pop()
 
 # --- Tampilan UI Streamlit ---
 
@@ -222,10 +196,22 @@ def add_absensi_from_izin(izin_record):
 if "detail_type" not in st.session_state:
     st.session_state.detail_type = None
 
+# Pekerjaan latar yang dikirim sesi ini (id -> judul) dan pesan hasil yang belum ditampilkan
+if "pekerjaan" not in st.session_state:
+    st.session_state.pekerjaan = {}
+    st.session_state.hasil_pekerjaan = []
+for status_pekerjaan, teks in st.session_state.hasil_pekerjaan:
+    (st.error if status_pekerjaan == jobs.STATUS_GAGAL else st.success)(teks)
+st.session_state.hasil_pekerjaan = []
+if st.session_state.pekerjaan:
+    pantau_pekerjaan()
+
 # Warna yang disesuaikan dengan logo CESGS UNAIR
 warna_biru = "#003C8D"  # Biru tua
 warna_kuning = "#FFD700"  # Kuning emas
 
+bulan_indonesia = ["", "Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli", "Agustus", "September", "Oktober", "November", "Desember"]
+
 # 1. Menu untuk Karyawan: Pengajuan Izin Kerja
 if menu == "Pengajuan Izin Kerja" and role == "Karyawan":
     st.subheader("Form Pengajuan Izin Tidak Masuk")
@@ -241,7 +227,7 @@ if menu == "Pengajuan Izin Kerja" and role == "Karyawan":
     if st.button("Ajukan Izin"):
         file_pengajuan_bytes = file_pengajuan.getvalue() if file_pengajuan is not None else None
         file_persetujuan_bytes = file_persetujuan.getvalue() if file_persetujuan is not None else None
-        save_izin(nama, divisi, jenis_pengajuan, str(tanggal_pengajuan), str(tanggal_izin), jumlah_hari,
+        db.save_izin(nama, divisi, jenis_pengajuan, str(tanggal_pengajuan), str(tanggal_izin), jumlah_hari,
                   file_pengajuan_bytes, file_persetujuan_bytes)
         st.success("Pengajuan izin berhasil disimpan!")
         
@@ -250,87 +236,108 @@ elif menu == "Dashboard" and role == "Admin":
     st.subheader("Dashboard Pengajuan Izin")
     
     # Grafik: Pengajuan Izin per Jenis
-    df_izin_all = load_izin()
-    if not df_izin_all.empty:
-        jenis_pengajuan_count = df_izin_all.groupby("jenis_pengajuan").size().reset_index(name='Jumlah')
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=jenis_pengajuan_count['jenis_pengajuan'],
-            y=jenis_pengajuan_count['Jumlah'],
-            name="Jumlah Pengajuan",
-            marker=dict(color=[warna_biru if x != "WFH" else warna_kuning for x in jenis_pengajuan_count['jenis_pengajuan']]),
-            text=jenis_pengajuan_count['Jumlah'],
-            textposition='outside',
-        ))
-        fig.update_layout(
-            title="Jumlah Pengajuan Izin per Jenis",
-            title_font_size=18,
-            xaxis_title="Jenis Pengajuan",
-            yaxis_title="Jumlah Pengajuan",
-            plot_bgcolor='rgba(0,0,0,0)',
-            template="plotly_dark",
-            xaxis_tickangle=-45,
-            hovermode="closest"
-        )
+    jenis_pengajuan_count = db.count_izin_by("jenis_pengajuan")
+    if not jenis_pengajuan_count.empty:
+        fig = grafik_jenis_pengajuan(tuple(jenis_pengajuan_count['jenis_pengajuan']), tuple(jenis_pengajuan_count['Jumlah']))
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("Belum ada data pengajuan izin.")
     
     st.write("### Tabel Pengajuan Izin (Pending)")
-    conn = sqlite3.connect("absensi.db")
-    df_pending = pd.read_sql_query("SELECT * FROM izin WHERE status = 'Pending'", conn)
-    conn.close()
+    if "pending_kursor" not in st.session_state:
+        st.session_state.pending_kursor = [0]
+    pesan = st.session_state.pop("pending_pesan", None)
+    if pesan:
+        st.success(pesan)
+
+    total_pending = db.count_izin_pending()
+    # Ambil satu baris lebih untuk mengetahui apakah masih ada halaman berikutnya
+    df_pending = db.load_izin_pending(st.session_state.pending_kursor[-1], db.PENDING_PAGE_SIZE + 1)
+    ada_berikutnya = len(df_pending) > db.PENDING_PAGE_SIZE
+    df_pending = df_pending.head(db.PENDING_PAGE_SIZE)
+
+    if df_pending.empty and len(st.session_state.pending_kursor) > 1:
+        # Semua baris di halaman ini sudah diproses; mundur satu halaman
+        st.session_state.pending_kursor.pop()
+        st.rerun()
 
     if df_pending.empty:
         st.info("Tidak ada pengajuan izin yang pending.")
     else:
-        # Header tabel
-        headers = ["ID", "Nama", "Divisi", "Jenis Pengajuan", "Tanggal Pengajuan", "Tanggal Izin", "Jumlah Hari", "File Pengajuan", "File Persetujuan", "Status", "Persetujuan"]
-        header_cols = st.columns(len(headers))
-        for idx, header in enumerate(headers):
-            header_cols[idx].write(f"**{header}**")
-        
-        # Tampilkan setiap baris data
-        for index, row in df_pending.iterrows():
-            row_cols = st.columns(len(headers))
-            row_cols[0].write(row["id"])
-            row_cols[1].write(row["nama"])
-            row_cols[2].write(row["divisi"])
-            row_cols[3].write(row["jenis_pengajuan"])
-            row_cols[4].write(row["tanggal_pengajuan"])
-            row_cols[5].write(row["tanggal_izin"])
-            row_cols[6].write(row["jumlah_hari"])
-
-            # Tambahkan link file pengajuan (jika ada)
-            if row["file_pengajuan"]:
-                file_pengajuan_link = get_download_link(row["file_pengajuan"], "file_pengajuan.jpg")
+        st.session_state.pending_id_terakhir = int(df_pending["id"].iloc[-1])
+        halaman = len(st.session_state.pending_kursor)
+        st.caption(f"Halaman {halaman} dari {-(-total_pending // db.PENDING_PAGE_SIZE)} ({total_pending} pengajuan pending)")
+
+        # Daftar hanya mengirim thumbnail; gambar penuh dibaca lewat tombol lampiran
+        thumb = attachments.thumbnails(pd.concat([df_pending["file_pengajuan_ref"], df_pending["file_persetujuan_ref"]]))
+        tabel = pd.DataFrame({
+            "Pilih": False,
+            "ID": df_pending["id"],
+            "Nama": df_pending["nama"],
+            "Divisi": df_pending["divisi"],
+            "Jenis Pengajuan": df_pending["jenis_pengajuan"],
+            "Tanggal Pengajuan": df_pending["tanggal_pengajuan"].dt.date,
+            "Tanggal Izin": df_pending["tanggal_izin"].dt.date,
+            "Jumlah Hari": df_pending["jumlah_hari"],
+            "File Pengajuan": df_pending["file_pengajuan_ref"].notna().map({True: "Ada", False: "Tidak Ada File"}),
+            "File Persetujuan": df_pending["file_persetujuan_ref"].notna().map({True: "Ada", False: "Belum Disetujui"}),
+            "Pratinjau Pengajuan": df_pending["file_pengajuan_ref"].map(thumb),
+            "Pratinjau Persetujuan": df_pending["file_persetujuan_ref"].map(thumb),
+            "Status": df_pending["status"],
+        })
+
+        # Form: centang baris tidak memicu rerun, hanya tombol Terima/Tolak
+        with st.form(f"form_pending_{st.session_state.pending_kursor[-1]}"):
+            hasil_edit = st.data_editor(
+                tabel,
+                hide_index=True,
+                use_container_width=True,
+                disabled=[c for c in tabel.columns if c != "Pilih"],
+                column_config={
+                    "Pilih": st.column_config.CheckboxColumn("Pilih", default=False),
+                    "Pratinjau Pengajuan": st.column_config.ImageColumn(),
+                    "Pratinjau Persetujuan": st.column_config.ImageColumn(),
+                },
+            )
+            col_terima, col_tolak, col_weekend = st.columns([1, 1, 6])
+            terima = col_terima.form_submit_button("Accept")
+            tolak = col_tolak.form_submit_button("Reject")
+            lewati_weekend = col_weekend.checkbox("Jangan catat Sabtu/Minggu sebagai hari izin")
+
+        if terima or tolak:
+            terpilih = df_pending.loc[hasil_edit["Pilih"].to_numpy(dtype=bool), "id"].tolist()
+            if not terpilih:
+                st.warning("Pilih minimal satu pengajuan terlebih dahulu.")
             else:
-                file_pengajuan_link = "Tidak Ada File"
-            row_cols[7].markdown(file_pengajuan_link, unsafe_allow_html=True)
-
-            # Tambahkan link file persetujuan (jika ada)
-            if row["file_persetujuan"]:
-                file_persetujuan_link = get_download_link(row["file_persetujuan"], "file_persetujuan.jpg")
-            else:
-                file_persetujuan_link = "Belum Disetujui"
-            row_cols[8].markdown(file_persetujuan_link, unsafe_allow_html=True)
-
-            row_cols[9].write(row["status"])
-
-            # Tambahkan tombol Accept dan Reject
-            accept_clicked = row_cols[10].button("Accept", key=f"accept_{row['id']}")
-            reject_clicked = row_cols[10].button("Reject", key=f"reject_{row['id']}")
-
-            if accept_clicked:
-                update_izin_status(row["id"], "Pengajuan izin telah diterima")
-                add_absensi_from_izin(row)
-                st.success(f"Pengajuan ID {row['id']} telah diterima.")
-                st.session_state["last_action"] = "accept"
-
-            if reject_clicked:
-                update_izin_status(row["id"], "Pengajuan izin ditolak")
-                st.warning(f"Pengajuan ID {row['id']} telah ditolak.")
-                st.session_state["last_action"] = "reject"
+                status_baru = db.STATUS_DITERIMA if terima else db.STATUS_DITOLAK
+                job = proses_izin_terpilih(terpilih, status_baru, lewati_weekend)
+                aksi = "diterima" if terima else "ditolak"
+                if job is None:
+                    st.session_state.pending_pesan = f"{len(terpilih)} pengajuan sedang {aksi} di latar belakang."
+                elif job["status"] == jobs.STATUS_GAGAL:
+                    st.session_state.hasil_pekerjaan.append((job["status"], pesan_pekerjaan(job, f"Pengajuan {aksi}")))
+                else:
+                    changed = job["hasil"]["diproses"]
+                    st.session_state.pending_pesan = f"{len(changed)} pengajuan {aksi}: ID {', '.join(map(str, changed))}."
+                st.session_state["last_action"] = "accept" if terima else "reject"
+                st.rerun()
+
+        col_prev, col_next, _ = st.columns([1, 1, 6])
+        col_prev.button("Sebelumnya", disabled=halaman == 1, on_click=halaman_pending, args=(-1,))
+        col_next.button("Berikutnya", disabled=not ada_berikutnya, on_click=halaman_pending, args=(1,))
+
+        # Lampiran hanya dibaca saat admin membukanya
+        dengan_file = df_pending[df_pending["file_pengajuan_ref"].notna() | df_pending["file_persetujuan_ref"].notna()]
+        if not dengan_file.empty:
+            col_id, col_fp, col_fs = st.columns([2, 1, 1])
+            pilih_id = col_id.selectbox("Lihat lampiran untuk ID", dengan_file["id"].tolist(), key="pending_lampiran_id")
+            row = dengan_file[dengan_file["id"] == pilih_id].iloc[0]
+            col_fp.button("Lihat File Pengajuan", key="lihat_pengajuan", disabled=not row["file_pengajuan_ref"],
+                          on_click=buka_lampiran, args=(row["file_pengajuan_ref"], f"file_pengajuan_{pilih_id}"))
+            col_fs.button("Lihat File Persetujuan", key="lihat_persetujuan", disabled=not row["file_persetujuan_ref"],
+                          on_click=buka_lampiran, args=(row["file_persetujuan_ref"], f"file_persetujuan_{pilih_id}"))
+
+        tampilkan_lampiran()
 
 # 3. Menu untuk Admin: Data Pengajuan Izin (hanya yang telah diterima)
 elif menu == "Data Pengajuan Izin" and role == "Admin":
@@ -339,32 +346,57 @@ elif menu == "Data Pengajuan Izin" and role == "Admin":
     # Pilihan untuk memilih jenis pengajuan yang ingin ditampilkan
     jenis_filter = st.selectbox("Pilih Jenis Pengajuan", ["Semua", "Cuti", "Izin", "Sakit", "WFH"])
 
-    # Ambil data pengajuan izin yang sudah diterima
-    conn = sqlite3.connect("absensi.db")
-    
-    # Query untuk mengambil data pengajuan izin berdasarkan status dan jenis pengajuan yang dipilih
-    if jenis_filter == "Semua":
-        query = "SELECT * FROM izin WHERE status = 'Pengajuan izin telah diterima'"
-    else:
-        query = "SELECT * FROM izin WHERE status = 'Pengajuan izin telah diterima' AND jenis_pengajuan = ?"
-    
-    df_izin = pd.read_sql_query(query, conn, params=(jenis_filter,) if jenis_filter != "Semua" else ())
-    conn.close()
+    col_mulai, col_akhir, col_urut, col_arah = st.columns([1, 1, 1, 1])
+    rentang_mulai = col_mulai.date_input("Tanggal Izin Dari", value=None)
+    rentang_akhir = col_akhir.date_input("Tanggal Izin Sampai", value=None)
+    urut = col_urut.selectbox("Urutkan Berdasarkan", db.IZIN_SORT)
+    terbaru = col_arah.radio("Urutan", ["Menurun", "Menaik"], horizontal=True) == "Menurun"
+
+    # Filter, urutan dan paging dikerjakan di SQL; hanya satu halaman yang dibaca
+    filter_key = (jenis_filter, rentang_mulai, rentang_akhir, urut, terbaru)
+    if st.session_state.get("laporan_izin_filter") != filter_key:
+        st.session_state.laporan_izin_filter = filter_key
+        st.session_state.laporan_izin_halaman = 1
+    halaman = st.session_state.get("laporan_izin_halaman", 1)
+
+    df_izin, total = db.query_izin(
+        status=db.STATUS_DITERIMA,
+        jenis=None if jenis_filter == "Semua" else jenis_filter,
+        start=rentang_mulai, end=rentang_akhir,
+        order_by=urut, descending=terbaru,
+        limit=db.REPORT_PAGE_SIZE, offset=(halaman - 1) * db.REPORT_PAGE_SIZE,
+    )
 
-    if df_izin.empty:
+    if total == 0:
         st.info(f"Tidak ada pengajuan izin yang diterima untuk jenis '{jenis_filter}'.")
     else:
-        # Mengubah kolom "file_pengajuan" menjadi link unduhan dengan nama file yang sesuai
-        df_izin['file_pengajuan'] = df_izin['file_pengajuan'].apply(lambda x: f'<a href="data:image/jpeg;base64,{base64.b64encode(x).decode()}" download="file_pengajuan_{x[:10]}.jpg" target="_blank">Lihat Form Pengajuan</a>' if x else "")
-        
-        # Mengubah kolom "file_persetujuan" menjadi link unduhan dengan nama file yang sesuai
-        df_izin['file_persetujuan'] = df_izin['file_persetujuan'].apply(lambda x: f'<a href="data:image/jpeg;base64,{base64.b64encode(x).decode()}" download="file_persetujuan_{x[:10]}.jpg" target="_blank">Lihat File Persetujuan</a>' if x else "")
-        
-        # Hapus kolom "file_persetujuan" yang tidak perlu jika Anda tidak ingin menampilkannya
-        df_izin = df_izin.drop(columns=["file_persetujuan"])
-
-        # Tampilkan data pengajuan izin dalam format tabel
-        st.markdown(df_izin.to_html(escape=False), unsafe_allow_html=True)
+        jumlah_halaman = -(-total // db.REPORT_PAGE_SIZE)
+        halaman = st.number_input(f"Halaman (dari {jumlah_halaman}, total {total} pengajuan)",
+                                  min_value=1, max_value=jumlah_halaman, step=1, key="laporan_izin_halaman")
+
+        # Tabel hanya memuat thumbnail; file penuh dibuka lewat tombol di bawah tabel
+        thumb = attachments.thumbnails(pd.concat([df_izin["file_pengajuan_ref"], df_izin["file_persetujuan_ref"]]))
+        tabel = df_izin[db.IZIN_COLUMNS].assign(
+            **{col: df_izin[col].dt.date for col in ("tanggal_pengajuan", "tanggal_izin", "tanggal_selesai")},
+            file_pengajuan=df_izin["file_pengajuan_ref"].map(thumb),
+            file_persetujuan=df_izin["file_persetujuan_ref"].map(thumb),
+        )
+        st.dataframe(tabel, use_container_width=True, hide_index=True, column_config={
+            "file_pengajuan": st.column_config.ImageColumn(),
+            "file_persetujuan": st.column_config.ImageColumn(),
+        })
+
+        # Lampiran dibaca dari tabel lampiran hanya saat dipilih dan dibuka
+        df_berkas = df_izin[df_izin["file_pengajuan_ref"].notna() | df_izin["file_persetujuan_ref"].notna()]
+        if not df_berkas.empty:
+            col_pilih, col_fp, col_fs = st.columns([2, 1, 1])
+            pilih_id = col_pilih.selectbox("Lihat lampiran untuk ID", df_berkas["id"].tolist())
+            row = df_berkas[df_berkas["id"] == pilih_id].iloc[0]
+            col_fp.button("Lihat Form Pengajuan", disabled=not row["file_pengajuan_ref"],
+                          on_click=buka_lampiran, args=(row["file_pengajuan_ref"], f"file_pengajuan_{pilih_id}"))
+            col_fs.button("Lihat File Persetujuan", disabled=not row["file_persetujuan_ref"],
+                          on_click=buka_lampiran, args=(row["file_persetujuan_ref"], f"file_persetujuan_{pilih_id}"))
+            tampilkan_lampiran()
 
 # 4. Menu untuk Admin: Data Absensi
 elif menu == "Data Absensi" and role == "Admin":
@@ -372,7 +404,6 @@ elif menu == "Data Absensi" and role == "Admin":
     
     # --- Langkah 1: Pilih Tahun, Bulan, dan Tanggal ---
     day_map = {0:"Senin", 1:"Selasa", 2:"Rabu", 3:"Kamis", 4:"Jumat", 5:"Sabtu", 6:"Minggu"}
-    bulan_indonesia = ["", "Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli", "Agustus", "September", "Oktober", "November", "Desember"]
     
     selected_year = st.number_input("Pilih Tahun", min_value=2000, max_value=2100, value=2024, step=1)
     selected_month = st.selectbox("Pilih Bulan", list(range(1,13)), format_func=lambda x: bulan_indonesia[x])
@@ -382,185 +413,116 @@ elif menu == "Data Absensi" and role == "Admin":
     formatted_dates = [f"{day_map[d.weekday()]}, {d.day} {bulan_indonesia[d.month]} {d.year}" for d in dates_in_month]
     
     # --- Langkah 2: Pilih Rentang Tanggal ---
-    start_date, end_date = st.date_input(
+    rentang = st.date_input(
         "Pilih Rentang Tanggal",
         value=(datetime(selected_year, selected_month, 1), datetime(selected_year, selected_month, num_days)),
         min_value=datetime(selected_year, selected_month, 1),
         max_value=datetime(selected_year, selected_month, num_days),
         help="Pilih rentang tanggal untuk melihat data presensi."
     )
-    
-    # --- Langkah 3: Cek data absensi di database untuk bulan yang dipilih ---
-    # --- Langkah 3: Cek data absensi di database untuk bulan yang dipilih ---
-    month_str = f"{selected_year}-{selected_month:02d}"
-    conn = sqlite3.connect("absensi.db")
-    df_absensi_db = pd.read_sql_query("SELECT * FROM absensi WHERE tanggal LIKE ?", conn, params=(month_str+"-%",))
-    conn.close()
+    # Selama tanggal akhir belum dipilih, date_input hanya mengembalikan tanggal awal
+    start_date, end_date = (rentang[0], rentang[-1]) if rentang else (dates_in_month[0], dates_in_month[-1])
 
-    # **Filter Data: Hanya Data Kehadiran (Tanpa Izin, Cuti, Sakit, WFH)**
-    df_hadir = df_absensi_db[
-        ~df_absensi_db["status"].isin(["Izin", "Cuti", "Sakit", "WFH"])
-    ]
-
-    if df_hadir.empty:
+    # --- Langkah 3: Cek data absensi di database untuk bulan yang dipilih ---
+    # Hanya data kehadiran (tanpa Izin, Cuti, Sakit, WFH); filter status, rentang
+    # tanggal dan paging dikerjakan di SQL pada indeks (tanggal, status)
+    if db.count_absensi(*db.month_range(selected_year, selected_month)) == 0:
         st.info(f"Data absensi untuk bulan {selected_year}-{selected_month:02d} belum ada. Silakan upload data absensi.")
 
         # **Tampilkan File Uploader**
-        uploaded_file = st.file_uploader("Upload Data Absensi Bulanan", type=["xlsx"])
-        
-        if uploaded_file is not None:
-            try:
-                # **Baca File Excel**
-                df_input = pd.read_excel(uploaded_file)
-                df_processed = format_presensi_data(df_input)
-                
-                if df_processed.empty:
-                    st.error("Data dalam file tidak valid atau kosong.")
-                else:
-                    # **Ubah kolom 'tanggal' menjadi format YYYY-MM-DD**
-                    df_processed['tanggal'] = df_processed['tanggal'].apply(lambda d: f"{selected_year}-{selected_month:02d}-{int(d):02d}")
-                    
-                    # **Ubah nama kolom agar cocok dengan database**
-                    df_processed.rename(columns={"Nama": "nama", "datang": "jam_masuk", "pulang": "jam_keluar"}, inplace=True)
-                    
-                    # **Simpan Data ke Database**
-                    save_absensi_to_db(df_processed)
-                    st.success("Data absensi berhasil disimpan!")
-
-            except Exception as e:
-                st.error(f"Terjadi kesalahan saat membaca file: {e}")
+        upload_absensi(selected_year, selected_month, "Upload Data Absensi Bulanan")
 
     else:
         # **Tampilkan Data Absensi yang Sudah Ada**
-        date_range_filter = (df_hadir['tanggal'] >= start_date.strftime('%Y-%m-%d')) & (df_hadir['tanggal'] <= end_date.strftime('%Y-%m-%d'))
-        filtered_df = df_hadir[date_range_filter]
+        # Rentang tanggal inklusif -> [awal, hari setelah tanggal akhir)
+        filter_key = (start_date, end_date)
+        if st.session_state.get("absensi_filter") != filter_key:
+            st.session_state.absensi_filter = filter_key
+            st.session_state.absensi_halaman = 1
+        halaman = st.session_state.get("absensi_halaman", 1)
+        df_halaman, total = db.query_absensi(
+            start_date.strftime("%Y-%m-%d"), (end_date + timedelta(days=1)).strftime("%Y-%m-%d"),
+            limit=db.ABSENSI_PAGE_SIZE, offset=(halaman - 1) * db.ABSENSI_PAGE_SIZE,
+        )
 
-        if filtered_df.empty:
+        if total == 0:
             st.info(f"Tidak ada data absensi untuk rentang tanggal {start_date.strftime('%d %B %Y')} hingga {end_date.strftime('%d %B %Y')}.")
         else:
             # **Tampilkan Data Absensi dalam Tabel**
-            def highlight_telat(row):
-                return ['background-color: #ffcccc' if row['status'].lower() == 'telat' else '' for _ in row]
-
-            styled_df = filtered_df.style.apply(highlight_telat, axis=1)
             st.write(f"**Data Presensi untuk {start_date.strftime('%d %B %Y')} hingga {end_date.strftime('%d %B %Y')}:**")
-            st.dataframe(styled_df, use_container_width=True)
+            jumlah_halaman = -(-total // db.ABSENSI_PAGE_SIZE)
+            if jumlah_halaman > 1:
+                st.number_input(f"Halaman (dari {jumlah_halaman}, total {total} baris)",
+                                min_value=1, max_value=jumlah_halaman, step=1, key="absensi_halaman")
+            # Telat ditandai lewat warna label status (column_config), bukan Styler per baris
+            st.dataframe(
+                tampilan_absensi(df_halaman).assign(status=label_status(df_halaman["status"])),
+                use_container_width=True,
+                hide_index=True,
+                column_config={"status": st.column_config.MultiselectColumn(
+                    "status", options=list(WARNA_STATUS), color=list(WARNA_STATUS.values()))},
+            )
+
+        # Rekap dibaca dari tabel rekap (dijaga oleh upload dan persetujuan izin)
+        with st.expander(f"Rekap {bulan_indonesia[selected_month]} {selected_year}"):
+            st.write("**Per divisi**")
+            st.dataframe(db.load_rekap_divisi(*db.month_range(selected_year, selected_month)),
+                         use_container_width=True, hide_index=True)
+            st.write("**Per karyawan**")
+            st.dataframe(db.load_rekap_bulanan(selected_year, selected_month),
+                         use_container_width=True, hide_index=True)
+            if st.button("Bangun ulang rekap", help="Hitung ulang seluruh tabel rekap di latar belakang."):
+                kirim_pekerjaan("Bangun ulang rekap", "rebuild_rekap", kunci="rebuild_rekap")
+                st.rerun()
+
+        # Upload ulang memperbarui baris yang sudah ada (upsert), mis. untuk file yang diperbaiki
+        with st.expander(f"Upload ulang data absensi {bulan_indonesia[selected_month]} {selected_year}"):
+            upload_absensi(selected_year, selected_month, "Upload file pengganti")
 
 
 
 # 5. Menu untuk Admin: Kalender Absensi
 elif menu == "Kalender Absensi" and role == "Admin":
+    from streamlit_calendar import calendar
+
     st.subheader("Kalender Absensi Karyawan")
     
     # --- Bagian 1: Tampilan Kalender Ringkasan per Tanggal ---
     with st.container():
         st.markdown("#### Tampilan Kalender Absensi")
-        df_absensi_all = load_absensi()
-        if not df_absensi_all.empty:
-            df_absensi_all['tanggal_dt'] = pd.to_datetime(df_absensi_all['tanggal']).dt.date
-            grouped_absensi = df_absensi_all.groupby('tanggal_dt').apply(
-                lambda g: pd.Series({
-                    "hadir": len(g),
-                    "telat": (g['status'].str.lower() == "telat").sum()
-                })
-            ).reset_index()
-        else:
-            grouped_absensi = pd.DataFrame(columns=['tanggal_dt', 'hadir', 'telat'])
-        
-        df_izin_all = load_izin()
-        tidak_hadir_dict = {}
-        for idx, row in df_izin_all.iterrows():
-            try:
-                if pd.isnull(row['tanggal_izin']) or pd.isnull(row['jumlah_hari']):
-                    continue
-                start_date = datetime.strptime(row['tanggal_izin'], "%Y-%m-%d").date()
-                days = int(row['jumlah_hari'])
-                for d in range(days):
-                    curr_date = start_date + timedelta(days=d)
-                    tidak_hadir_dict[curr_date] = tidak_hadir_dict.get(curr_date, 0) + 1
-            except Exception as e:
-                continue
-        
-        all_dates = set(grouped_absensi['tanggal_dt'].tolist()) | set(tidak_hadir_dict.keys())
-        events = []
-        for d in sorted(all_dates):
-            if d in grouped_absensi['tanggal_dt'].values:
-                row = grouped_absensi[grouped_absensi['tanggal_dt'] == d]
-                hadir = int(row['hadir'].iloc[0])
-                telat = int(row['telat'].iloc[0])
-            else:
-                hadir = 0
-                telat = 0
-            tidak_hadir = tidak_hadir_dict.get(d, 0)
-            
-            # Remove the "12a" part and only show the relevant info
-            title = f"H:{hadir} T:{telat} TH:{tidak_hadir}"
-            
-            events.append({
-    "title": f"H:{hadir} T:{telat} TH:{tidak_hadir}",
-    "start": d.strftime("%Y-%m-%d"),  # Format hanya tanggal, tanpa waktu
-    "color": "transparent",  # Warna latar belakang transparan
-    "textColor": "black"  # Warna teks tetap hitam
-})
+        col_tahun, col_bulan = st.columns(2)
+        kalender_tahun = col_tahun.number_input("Tahun", min_value=2000, max_value=2100, value=datetime.today().year, step=1, key="kalender_tahun")
+        kalender_bulan = col_bulan.selectbox("Bulan", list(range(1, 13)), index=datetime.today().month - 1,
+                                             format_func=lambda x: bulan_indonesia[x], key="kalender_bulan")
+
+        # Hanya rentang yang terlihat di tampilan bulan (termasuk padding) yang di-query
+        events = db.build_calendar_events(db.calendar_counts(*db.month_grid_range(kalender_tahun, kalender_bulan)))
         
+        # Opsi FullCalendar v6 (dipakai streamlit_calendar). Toolbar tanpa tombol
+        # prev/next/today: hanya grid bulan terpilih yang di-query, jadi navigasi
+        # cukup lewat pilihan tahun/bulan di atas.
         calendar_options = {
             "editable": False,
-            "header": {
-                "left": "prev,next today",
+            "headerToolbar": {
+                "left": "",
                 "center": "title",
-                "right": "month,agendaWeek,agendaDay"
+                "right": ""
             },
-            "defaultView": "month"
+            "initialView": "dayGridMonth",
+            "initialDate": f"{kalender_tahun}-{kalender_bulan:02d}-01"
         }
-        calendar(events=events, options=calendar_options)
+        calendar(events=events, options=calendar_options, key=f"kalender_{kalender_tahun}_{kalender_bulan}")
     
     st.markdown("---")
     
     # --- Bagian 2: Rincian Data Absensi Harian ---
     st.markdown("### Rincian Data Absensi Harian")
     selected_date = st.date_input("Pilih Tanggal untuk melihat rincian", value=datetime.today())
-    selected_date_str = selected_date.strftime("%Y-%m-%d")
-    conn = sqlite3.connect("absensi.db")
-    df_absensi = pd.read_sql_query("SELECT * FROM absensi WHERE tanggal = ?", conn, params=(selected_date_str,))
-    conn.close()
-    
-    hadir_count = len(df_absensi)
-    telat_count = len(df_absensi[df_absensi['status'].str.lower() == "telat"])
-    
-    conn = sqlite3.connect("absensi.db")
-    df_izin = pd.read_sql_query("SELECT * FROM izin", conn)
-    conn.close()
-    
-    # Fungsi untuk mengecek apakah tanggal tertentu termasuk dalam rentang izin
-    def is_absent(row, sel_date):
-        try:
-            start_date = datetime.strptime(row['tanggal_izin'], "%Y-%m-%d").date()
-            days = int(row['jumlah_hari'])
-            end_date = start_date + timedelta(days=days-1)
-            return start_date <= sel_date <= end_date
-        except Exception as e:
-            return False
-
-    # Ambil data absensi dan izin
-    conn = sqlite3.connect("absensi.db")
-    df_absensi = pd.read_sql_query("SELECT * FROM absensi WHERE tanggal = ?", conn, params=(selected_date_str,))
-    df_izin = pd.read_sql_query("SELECT * FROM izin", conn)
-    conn.close()
-
-    # Hitung jumlah karyawan yang hadir dan terlambat
-    hadir_count = len(df_absensi)
-    telat_count = len(df_absensi[df_absensi['status'].str.lower() == "telat"])
-
-    # Hitung jumlah karyawan yang tidak hadir karena izin
-    df_absent = df_izin[df_izin.apply(lambda row: is_absent(row, selected_date), axis=1)]
-    tidak_hadir_count = len(df_absent)
-
-    # Filter karyawan yang hadir (tidak termasuk yang izin)
-    karyawan_hadir = df_absensi[~df_absensi['nama'].isin(df_absent['nama'])]
+    rincian = db.daily_summary(selected_date.strftime("%Y-%m-%d"))
+    karyawan_hadir = rincian["hadir"]
+    df_absent = rincian["tidak_hadir"]
     hadir_count = len(karyawan_hadir)
-
-    selected_date_obj = selected_date
-    df_absent = df_izin[df_izin.apply(lambda row: is_absent(row, selected_date_obj), axis=1)]
+    telat_count = len(rincian["telat"])
     tidak_hadir_count = len(df_absent)
     
     st.markdown(f"### Ringkasan Absensi untuk {selected_date.strftime('%A, %d %B %Y')}")
@@ -577,13 +539,69 @@ elif menu == "Kalender Absensi" and role == "Admin":
         if st.button("Tutup rincian"):
             st.session_state.detail_type = None
         if st.session_state.detail_type == "hadir":
-            st.dataframe(karyawan_hadir, use_container_width=True)
+            st.dataframe(tampilan_absensi(karyawan_hadir), use_container_width=True)
         elif st.session_state.detail_type == "telat":
-            st.dataframe(karyawan_hadir[karyawan_hadir['status'].str.lower() == "telat"], use_container_width=True)
+            st.dataframe(tampilan_absensi(rincian["telat"]), use_container_width=True)
         elif st.session_state.detail_type == "tidak_hadir":
             if df_absent.empty:
                 st.info("Tidak ada data karyawan tidak hadir untuk tanggal ini.")
             else:
-                st.dataframe(df_absent[['nama', 'divisi', 'jenis_pengajuan', 'tanggal_izin', 'jumlah_hari']], use_container_width=True)
-                
-        
+                st.dataframe(df_absent[['nama', 'divisi', 'jenis_pengajuan', 'tanggal_izin', 'jumlah_hari']]
+                             .assign(tanggal_izin=df_absent['tanggal_izin'].dt.date), use_container_width=True)
+
+# 6. Menu untuk Admin: Kinerja (p50/p95 per operasi dari instrumentasi metrics)
+elif menu == "Kinerja" and role == "Admin":
+    st.subheader("Kinerja Aplikasi")
+
+    col_aktif, col_ambang, col_reset = st.columns([1, 1, 1])
+    aktif = col_aktif.toggle("Catat kinerja", value=metrics.ENABLED)
+    if aktif != metrics.ENABLED:
+        metrics.set_enabled(aktif)
+    ambang = col_ambang.number_input("Ambang log lambat (ms)", min_value=1.0, value=metrics.SLOW_MS, step=50.0)
+    if ambang != metrics.SLOW_MS:
+        metrics.set_slow_ms(ambang)
+    if col_reset.button("Reset statistik"):
+        metrics.reset()
+
+    st.caption(f"Statistik dari {metrics.WINDOW} pengukuran terakhir per operasi di proses ini. "
+               "Operasi \"sql\" mencakup semua query baca; \"halaman: ...\" adalah total satu rerun.")
+    ringkasan = metrics.summary()
+    if ringkasan.empty:
+        st.info("Belum ada pengukuran. Buka halaman lain terlebih dahulu.")
+    else:
+        st.dataframe(
+            ringkasan,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                kolom: st.column_config.NumberColumn(format="%.1f")
+                for kolom in ["p50_ms", "p95_ms", "max_ms", "total_ms", "baris_rata2", "kb_rata2"]
+            },
+        )
+
+    st.write(f"### Operasi Lambat (>= {metrics.SLOW_MS:.0f} ms)")
+    lambat = metrics.slow_log()
+    if lambat.empty:
+        st.info("Belum ada operasi yang melewati ambang.")
+    else:
+        st.dataframe(lambat, use_container_width=True, hide_index=True)
+
+    st.write("### Cache Hasil Baca")
+    cache = db.cache_stats()
+    col_entri, col_ukuran, col_hit, col_kosongkan = st.columns(4)
+    col_entri.metric("Entri", f"{cache['entries']} / {db.CACHE_ENTRIES}")
+    col_ukuran.metric("Ukuran", f"{cache['kb'] / 1024:.1f} / {db.CACHE_MB:.0f} MB")
+    col_hit.metric("Hit", f"{cache['hit']} dari {cache['hit'] + cache['miss']}")
+    if col_kosongkan.button("Kosongkan cache"):
+        db.cache_clear()
+
+    st.write("### Pekerjaan Latar")
+    daftar_pekerjaan = jobs.daftar()
+    if daftar_pekerjaan.empty:
+        st.info("Belum ada pekerjaan latar.")
+    else:
+        st.dataframe(daftar_pekerjaan, use_container_width=True, hide_index=True,
+                     column_config={"progress": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0)})
+
+if metrics.ENABLED:
+    metrics.record(f"halaman: {menu}", (time.perf_counter() - _mulai_rerun) * 1000)
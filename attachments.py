@@ -0,0 +1,152 @@
+"""
+Penyimpanan lampiran izin berbasis hash konten.
+
+Byte file disimpan sekali di tabel `lampiran` dengan kunci SHA-256 isinya,
+sehingga upload yang identik otomatis terdeduplikasi. Tabel `izin` hanya
+menyimpan referensi hash beserta ukuran dan mime; byte baru dibaca saat
+lampiran benar-benar dibuka.
+
+Foto dari kamera ponsel dinormalisasi sebelum disimpan (siapkan): metadata
+EXIF dibuang setelah orientasinya diterapkan, sisi terpanjang diperkecil ke
+MAKS_PX dan gambar di-encode ulang. Thumbnail kecil disimpan terpisah di tabel
+`lampiran_thumb`, sehingga daftar hanya mengirim thumbnail dan gambar penuh
+dibaca saat dibuka.
+
+    ABSENSI_LAMPIRAN_MAKS_PX=1600    sisi terpanjang gambar yang disimpan
+    ABSENSI_LAMPIRAN_KUALITAS=85     kualitas JPEG gambar yang disimpan
+"""
+import base64
+import hashlib
+import io
+import json
+import os
+
+import db
+import metrics
+
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png"}
+
+MAKS_PX = int(os.environ.get("ABSENSI_LAMPIRAN_MAKS_PX", "1600"))
+KUALITAS = int(os.environ.get("ABSENSI_LAMPIRAN_KUALITAS", "85"))
+THUMB_PX = 160
+THUMB_KUALITAS = 70
+
+
+def sniff_mime(data):
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    return "application/octet-stream"
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _encode(img, kualitas):
+    """Encode gambar PIL: PNG bila punya transparansi, selain itu JPEG. Mengembalikan byte."""
+    buf = io.BytesIO()
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img.save(buf, "PNG", optimize=True)
+    else:
+        img.convert("RGB").save(buf, "JPEG", quality=kualitas, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+@metrics.instrument
+def siapkan(data, maks_px=None, kualitas=None):
+    """
+    Normalisasi byte gambar upload sebelum disimpan: orientasi EXIF diterapkan,
+    metadata dibuang, sisi terpanjang diperkecil ke `maks_px` dan di-encode ulang
+    dengan `kualitas`. Mengembalikan dict {data, thumb}; byte yang bukan gambar
+    JPEG/PNG disimpan apa adanya tanpa thumbnail. None bila data kosong.
+    """
+    from PIL import Image, ImageOps
+
+    if not data:
+        return None
+    data = bytes(data)
+    if sniff_mime(data) not in EXTENSIONS:
+        return {"data": data, "thumb": None}
+    maks_px, kualitas = maks_px or MAKS_PX, kualitas or KUALITAS
+    try:
+        img = Image.open(io.BytesIO(data))
+        # JPEG bisa di-decode langsung pada skala 1/2..1/8 bila hasil akhirnya memang lebih kecil
+        img.draft("RGB", (maks_px, maks_px))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((maks_px, maks_px), Image.LANCZOS)
+        thumb = img.copy()
+        thumb.thumbnail((THUMB_PX, THUMB_PX), Image.LANCZOS)
+        return {"data": _encode(img, kualitas), "thumb": _encode(thumb, THUMB_KUALITAS)}
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return {"data": data, "thumb": None}
+
+
+def put(conn, data, thumb=None):
+    """
+    Simpan byte lampiran (dan thumbnail-nya bila ada) memakai koneksi/transaksi
+    pemanggil. Mengembalikan dict {ref, size, mime}, atau None bila data kosong.
+    """
+    if not data:
+        return None
+    data = bytes(data)
+    ref = content_hash(data)
+    mime = sniff_mime(data)
+    conn.execute(
+        "INSERT OR IGNORE INTO lampiran (hash, mime, size, data) VALUES (?, ?, ?, ?)",
+        (ref, mime, len(data), data),
+    )
+    if thumb:
+        conn.execute(
+            "INSERT OR IGNORE INTO lampiran_thumb (hash, mime, size, data) VALUES (?, ?, ?, ?)",
+            (ref, sniff_mime(thumb), len(thumb), bytes(thumb)),
+        )
+    return {"ref": ref, "size": len(data), "mime": mime}
+
+
+@metrics.instrument
+def get(ref, path=None):
+    """Ambil (bytes, mime) untuk sebuah referensi; (None, None) bila tidak ada."""
+    if not ref:
+        return None, None
+    with db.connect(path) as conn:
+        row = conn.execute("SELECT data, mime FROM lampiran WHERE hash = ?", (ref,)).fetchone()
+    if row is None:
+        return None, None
+    return bytes(row[0]), row[1]
+
+
+@metrics.instrument
+def thumbnails(refs, path=None):
+    """
+    Thumbnail untuk sekumpulan referensi sebagai data URI (untuk ImageColumn),
+    dict ref -> URI. Lampiran lama tanpa thumbnail dibuatkan sekali lalu disimpan.
+    """
+    refs = sorted({ref for ref in refs if isinstance(ref, str) and ref})
+    if not refs:
+        return {}
+    with db.connect(path) as conn:
+        rows = conn.execute("SELECT hash, mime, data FROM lampiran_thumb WHERE hash IN (SELECT value FROM json_each(?))",
+                            (json.dumps(refs),)).fetchall()
+    hasil = {ref: (mime, bytes(data)) for ref, mime, data in rows}
+    for ref in refs:
+        if ref not in hasil:
+            hasil.update(_buat_thumbnail(ref, path))
+    return {ref: f"data:{mime};base64,{base64.b64encode(data).decode()}" for ref, (mime, data) in hasil.items()}
+
+
+def _buat_thumbnail(ref, path):
+    data, _ = get(ref, path)
+    siap = siapkan(data, maks_px=THUMB_PX, kualitas=THUMB_KUALITAS) if data else None
+    if not siap or not siap["thumb"]:
+        return {}
+    # Thumbnail tidak dibaca fungsi ber-cache db, jadi versi data tidak perlu naik
+    with db.transaction(path, catat_versi=False) as c:
+        c.execute("INSERT OR IGNORE INTO lampiran_thumb (hash, mime, size, data) VALUES (?, ?, ?, ?)",
+                  (ref, sniff_mime(siap["thumb"]), len(siap["thumb"]), siap["thumb"]))
+    return {ref: (sniff_mime(siap["thumb"]), siap["thumb"])}
+
+
+def filename(prefix, mime):
+    return f"{prefix}{EXTENSIONS.get(mime, '')}"
@@ -0,0 +1 @@
+"""Benchmark jalur data aplikasi absensi. Jalankan dari root repo, mis. `python -m bench.ingest`."""
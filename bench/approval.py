@@ -0,0 +1,87 @@
+"""
+Benchmark persetujuan izin: update status + loop INSERT per hari di dua
+transaksi (cara lama) vs db.approve_izin (satu transaksi, recursive CTE).
+
+    python -m bench.approval --izin 500 --hari 10 --batch 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import db
+
+
+def seed(path, n_izin, max_hari, seed=0):
+    rng = random.Random(seed)
+    db.init_db(path)
+    with db.transaction(path) as c:
+        for k in range(n_izin):
+            mulai = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            jumlah = rng.randint(1, max_hari)
+            c.execute("INSERT INTO izin (nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin, "
+                      "jumlah_hari, tanggal_selesai, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      (f"Karyawan {k % 200:04d}", f"Divisi {k % 8}", "Cuti", mulai, mulai, jumlah,
+                       db.izin_end_date(mulai, jumlah), db.STATUS_PENDING))
+    return db.read_sql("SELECT id FROM izin ORDER BY id", path=path)["id"].tolist()
+
+
+def legacy_approve(izin_id, path):
+    """Implementasi lama: update status, lalu satu INSERT per hari di transaksi terpisah."""
+    db.execute("UPDATE izin SET status = ? WHERE id = ?", (db.STATUS_DITERIMA, izin_id), path=path)
+    row = db.read_sql("SELECT nama, divisi, tanggal_izin, jumlah_hari FROM izin WHERE id = ?",
+                      params=(izin_id,), path=path).iloc[0]
+    start_date = datetime.strptime(row["tanggal_izin"], "%Y-%m-%d").date()
+    with db.transaction(path) as c:
+        for i in range(int(row["jumlah_hari"])):
+            c.execute("INSERT INTO absensi (nama, divisi, tanggal, jam_masuk, jam_keluar, status) VALUES (?, ?, ?, ?, ?, ?) "
+                      "ON CONFLICT(nama, tanggal) WHERE karyawan_id IS NULL DO NOTHING",
+                      (row["nama"], row["divisi"], (start_date + timedelta(days=i)).strftime("%Y-%m-%d"), "", "", "Izin"))
+
+
+def _absensi(path):
+    return db.read_sql("SELECT nama, divisi, tanggal, status FROM absensi ORDER BY nama, tanggal", path=path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--izin", type=int, default=500)
+    parser.add_argument("--hari", type=int, default=10, help="jumlah hari izin maksimum")
+    parser.add_argument("--batch", type=int, default=50, help="jumlah izin per panggilan approve_izin")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path, baru_path, batch_path = (os.path.join(tmp, f"{n}.db") for n in ("legacy", "baru", "batch"))
+        ids = seed(legacy_path, args.izin, args.hari)
+        seed(baru_path, args.izin, args.hari)
+        seed(batch_path, args.izin, args.hari)
+
+        start = time.perf_counter()
+        for izin_id in ids:
+            legacy_approve(izin_id, legacy_path)
+        elapsed = time.perf_counter() - start
+        print(f"{'legacy (per izin)':<24} {len(ids):>6} izin {elapsed:8.3f} s {len(ids) / elapsed:>9.0f} izin/s")
+
+        start = time.perf_counter()
+        for izin_id in ids:
+            db.approve_izin([izin_id], path=baru_path)
+        elapsed = time.perf_counter() - start
+        print(f"{'approve_izin (per izin)':<24} {len(ids):>6} izin {elapsed:8.3f} s {len(ids) / elapsed:>9.0f} izin/s")
+
+        start = time.perf_counter()
+        for i in range(0, len(ids), args.batch):
+            db.approve_izin(ids[i:i + args.batch], path=batch_path)
+        elapsed = time.perf_counter() - start
+        print(f"{f'approve_izin (batch {args.batch})':<24} {len(ids):>6} izin {elapsed:8.3f} s {len(ids) / elapsed:>9.0f} izin/s")
+
+        expected = _absensi(legacy_path)
+        assert expected.equals(_absensi(baru_path)) and expected.equals(_absensi(batch_path)), "hasil berbeda"
+        print(f"hasil identik: {len(expected)} baris absensi")
+        for path in (legacy_path, baru_path, batch_path):
+            db.get_pool(path).close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark data kalender absensi: cara lama (muat semua, groupby.apply, loop
+iterrows, scan per tanggal) vs db.calendar_counts (tabel rekap_harian) untuk
+satu jendela bulan.
+
+    python -m bench.calendar --karyawan 200 --tahun 3 --izin 5000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import db
+
+
+def seed(path, n_karyawan, n_tahun, n_izin, seed=0):
+    rng = random.Random(seed)
+    db.init_db(path)
+    start = date(2024 - n_tahun + 1, 1, 1)
+    n_hari = (date(2024, 12, 31) - start).days + 1
+    rows = []
+    for k in range(n_karyawan):
+        for i in range(n_hari):
+            d = start + timedelta(days=i)
+            if d.weekday() >= 5:
+                continue
+            menit = rng.randint(7 * 60 + 30, 9 * 60 + 45)
+            rows.append((f"Karyawan {k:04d}", f"Divisi {k % 8}", d.isoformat(),
+                         f"{menit // 60:02d}:{menit % 60:02d}", "17:00",
+                         "Telat" if menit > 9 * 60 + 17 else "Tepat Waktu"))
+    db.save_absensi_to_db(pd.DataFrame(rows, columns=db.ABSENSI_COLUMNS), path)
+    izin = []
+    for _ in range(n_izin):
+        tanggal_izin = (start + timedelta(days=rng.randrange(n_hari))).isoformat()
+        jumlah_hari = rng.randint(1, 10)
+        izin.append((f"Karyawan {rng.randrange(n_karyawan):04d}", rng.choice(["Cuti", "Izin", "Sakit", "WFH"]),
+                     tanggal_izin, jumlah_hari, db.izin_end_date(tanggal_izin, jumlah_hari), db.STATUS_DITERIMA))
+    with db.transaction(path) as conn:
+        conn.executemany("INSERT INTO izin (nama, jenis_pengajuan, tanggal_izin, jumlah_hari, tanggal_selesai, status) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", izin)
+    # Izin ditulis langsung (bukan lewat approve_izin), jadi rekap dibangun ulang
+    db.rebuild_rekap(path)
+    return len(rows)
+
+
+def legacy_counts(path):
+    """Implementasi lama halaman Kalender Absensi (tanpa filter tanggal)."""
+    conn = sqlite3.connect(path)
+    df_absensi_all = pd.read_sql_query("SELECT * FROM absensi", conn)
+    df_izin_all = pd.read_sql_query("SELECT * FROM izin", conn)
+    conn.close()
+    df_absensi_all['tanggal_dt'] = pd.to_datetime(df_absensi_all['tanggal']).dt.date
+    grouped_absensi = df_absensi_all.groupby('tanggal_dt').apply(
+        lambda g: pd.Series({
+            "hadir": len(g),
+            "telat": (g['status'].str.lower() == "telat").sum()
+        })
+    ).reset_index()
+    tidak_hadir_dict = {}
+    for idx, row in df_izin_all.iterrows():
+        try:
+            if pd.isnull(row['tanggal_izin']) or pd.isnull(row['jumlah_hari']):
+                continue
+            start_date = datetime.strptime(row['tanggal_izin'], "%Y-%m-%d").date()
+            for d in range(int(row['jumlah_hari'])):
+                curr_date = start_date + timedelta(days=d)
+                tidak_hadir_dict[curr_date] = tidak_hadir_dict.get(curr_date, 0) + 1
+        except Exception:
+            continue
+    all_dates = set(grouped_absensi['tanggal_dt'].tolist()) | set(tidak_hadir_dict.keys())
+    result = []
+    for d in sorted(all_dates):
+        if d in grouped_absensi['tanggal_dt'].values:
+            row = grouped_absensi[grouped_absensi['tanggal_dt'] == d]
+            hadir, telat = int(row['hadir'].iloc[0]), int(row['telat'].iloc[0])
+        else:
+            hadir, telat = 0, 0
+        result.append((d.isoformat(), hadir, telat, tidak_hadir_dict.get(d, 0)))
+    return pd.DataFrame(result, columns=["tanggal", "hadir", "telat", "tidak_hadir"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--karyawan", type=int, default=200)
+    parser.add_argument("--tahun", type=int, default=3)
+    parser.add_argument("--izin", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        n = seed(path, args.karyawan, args.tahun, args.izin)
+        print(f"{n} baris absensi, {args.izin} izin, {args.tahun} tahun")
+
+        start = time.perf_counter()
+        legacy = legacy_counts(path)
+        legacy_s = time.perf_counter() - start
+
+        window = db.month_grid_range(2024, 5)
+        start = time.perf_counter()
+        counts = db.calendar_counts(*window, path=path)
+        new_s = time.perf_counter() - start
+
+        expected = legacy[(legacy["tanggal"] >= window[0]) & (legacy["tanggal"] < window[1])].reset_index(drop=True)
+        assert expected.equals(counts), "hasil calendar_counts berbeda dari implementasi lama"
+        print(f"{'legacy (semua data)':<26} {legacy_s * 1000:10.1f} ms")
+        print(f"{'calendar_counts (1 bulan)':<26} {new_s * 1000:10.1f} ms  ({len(counts)} tanggal, hasil identik)")
+        db.get_pool(path).close()
+
+
+if __name__ == "__main__":
+    main()
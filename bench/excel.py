@@ -0,0 +1,64 @@
+"""
+Benchmark upload Excel: pd.read_excel seluruh file vs ingest streaming per chunk.
+Mengukur waktu dan puncak memori Python (tracemalloc).
+
+    python -m bench.excel --karyawan 3000 --hari 31
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import db
+import ingest
+import presensi
+from bench.presensi import make_sheet
+
+
+def whole_file(path, db_path):
+    df_processed = presensi.format_presensi_data(pd.read_excel(path), {})
+    return db.save_absensi_to_db(presensi.to_absensi(df_processed, 2024, 5), path=db_path)
+
+
+def streaming(path, db_path, chunk_rows):
+    return ingest.ingest_excel(path, 2024, 5, {}, chunk_rows=chunk_rows, path=db_path)
+
+
+def _measure(fn, *args):
+    # Waktu diukur tanpa tracemalloc (overhead-nya besar), puncak memori pada run kedua
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--karyawan", type=int, default=3000)
+    parser.add_argument("--hari", type=int, default=31)
+    parser.add_argument("--chunk", type=int, default=ingest.CHUNK_ROWS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx = os.path.join(tmp, "presensi.xlsx")
+        make_sheet(args.karyawan, args.hari).to_excel(xlsx, index=False)
+        print(f"file {os.path.getsize(xlsx) / 1e6:.1f} MB, {args.karyawan * 2} baris sheet")
+
+        for label, fn, extra in (("read_excel seluruh file", whole_file, ()),
+                                 (f"streaming chunk {args.chunk}", streaming, (args.chunk,))):
+            db_path = os.path.join(tmp, f"{fn.__name__}.db")
+            db.init_db(db_path)
+            elapsed, peak, hasil = _measure(fn, xlsx, db_path, *extra)
+            print(f"{label:<26} {elapsed:7.2f} s  puncak {peak / 1e6:7.1f} MB  {hasil}")
+            db.get_pool(db_path).close()
+
+
+if __name__ == "__main__":
+    main()
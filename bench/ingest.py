@@ -0,0 +1,86 @@
+"""
+Benchmark upload absensi bulanan: INSERT per baris (cara lama) vs ingest massal + upsert.
+
+    python -m bench.ingest --karyawan 300 --hari 31
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import pandas as pd
+
+import db
+
+
+def make_month(n_karyawan, n_hari, year=2024, month=5, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for k in range(n_karyawan):
+        for d in range(1, n_hari + 1):
+            menit = rng.randint(7 * 60 + 30, 9 * 60 + 45)
+            rows.append({
+                "nama": f"Karyawan {k:04d}",
+                "divisi": f"Divisi {k % 8}",
+                "tanggal": f"{year}-{month:02d}-{d:02d}",
+                "jam_masuk": f"{menit // 60:02d}:{menit % 60:02d}",
+                "jam_keluar": "17:00",
+                "status": "Telat" if menit > 9 * 60 + 17 else "Tepat Waktu",
+            })
+    return pd.DataFrame(rows)
+
+
+def legacy_save(df, path):
+    """Implementasi lama: satu INSERT per baris lewat df.iterrows()."""
+    conn = sqlite3.connect(path)
+    for idx, row in df.iterrows():
+        conn.execute(
+            "INSERT INTO absensi (nama, divisi, tanggal, jam_masuk, jam_keluar, status) VALUES (?, ?, ?, ?, ?, ?)",
+            (row['nama'], row['divisi'], row['tanggal'], row['jam_masuk'], row['jam_keluar'], row['status'])
+        )
+    conn.commit()
+    conn.close()
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--karyawan", type=int, default=300)
+    parser.add_argument("--hari", type=int, default=31)
+    args = parser.parse_args()
+
+    df = make_month(args.karyawan, args.hari)
+    n = len(df)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("CREATE TABLE absensi (id INTEGER PRIMARY KEY AUTOINCREMENT, nama TEXT, divisi TEXT, "
+                     "tanggal TEXT, jam_masuk TEXT, jam_keluar TEXT, status TEXT)")
+        conn.close()
+        elapsed, _ = _timed(legacy_save, df, legacy_path)
+        print(f"{'legacy iterrows':<22} {n:>7} baris {elapsed:8.3f} s {n / elapsed:>10.0f} baris/s")
+
+        bulk_path = os.path.join(tmp, "bulk.db")
+        db.init_db(bulk_path)
+        elapsed, hasil = _timed(db.save_absensi_to_db, df, bulk_path)
+        print(f"{'bulk upsert (baru)':<22} {n:>7} baris {elapsed:8.3f} s {n / elapsed:>10.0f} baris/s  {hasil}")
+
+        elapsed, hasil = _timed(db.save_absensi_to_db, df, bulk_path)
+        print(f"{'bulk upsert (ulang)':<22} {n:>7} baris {elapsed:8.3f} s {n / elapsed:>10.0f} baris/s  {hasil}")
+
+        changed = df.copy()
+        changed.loc[changed.index[::10], "jam_keluar"] = "18:00"
+        elapsed, hasil = _timed(db.save_absensi_to_db, changed, bulk_path)
+        print(f"{'bulk upsert (10% ubah)':<22} {n:>7} baris {elapsed:8.3f} s {n / elapsed:>10.0f} baris/s  {hasil}")
+        db.get_pool(bulk_path).close()
+
+
+if __name__ == "__main__":
+    main()
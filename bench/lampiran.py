@@ -0,0 +1,110 @@
+"""
+Benchmark normalisasi lampiran izin (attachments.siapkan): ukuran simpan,
+ukuran thumbnail dan payload halaman sebelum vs sesudah, plus waktu proses.
+
+    python -m bench.lampiran foto/            # foto asli (JPG/PNG) dari sebuah direktori
+    python -m bench.lampiran --sintetis 12    # 12 foto kamera sintetis dengan EXIF
+
+Tanpa direktori, dipakai foto sintetis seukuran kamera ponsel (4032x3024,
+JPEG kualitas 92 dengan EXIF) dan tangkapan layar formulir PNG.
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import time
+
+import attachments
+import metrics
+
+HALAMAN = 25  # baris per halaman daftar izin pending (db.PENDING_PAGE_SIZE)
+
+
+def foto_sintetis(rng, lebar=4032, tinggi=3024):
+    """Foto 'kamera': gradien, bentuk dan noise sensor, JPEG q92 dengan EXIF kamera/GPS."""
+    import io
+
+    from PIL import Image, ImageDraw
+
+    kecil = Image.linear_gradient("L").resize((lebar // 8, tinggi // 8))
+    img = Image.merge("RGB", (kecil, kecil.rotate(90), kecil.transpose(Image.FLIP_LEFT_RIGHT)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(30):
+        x, y = rng.randrange(img.width), rng.randrange(img.height)
+        r = rng.randrange(5, 60)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+    img = img.resize((lebar, tinggi), Image.BICUBIC)
+    noise = Image.effect_noise((lebar, tinggi), 12).convert("RGB")
+    img = Image.blend(img, noise, 0.08)
+
+    exif = Image.Exif()
+    exif[0x010F] = "Kamera Ponsel"  # Make
+    exif[0x0110] = "Model X"  # Model
+    exif[0x0112] = rng.choice([1, 6])  # Orientation
+    exif[0x8825] = {1: "S", 2: (7.0, 15.0, 30.0), 3: "E", 4: (112.0, 45.0, 0.0)}  # GPSInfo
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=92, exif=exif)
+    return buf.getvalue()
+
+
+def formulir_sintetis(rng, lebar=1080, tinggi=2400):
+    """Tangkapan layar formulir: latar putih, baris teks, PNG."""
+    import io
+
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (lebar, tinggi), "white")
+    draw = ImageDraw.Draw(img)
+    for y in range(120, tinggi - 120, 48):
+        draw.text((80, y), "Formulir pengajuan izin " + "x" * rng.randrange(10, 60), fill="black")
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def kb(n):
+    return n / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("direktori", nargs="?", help="direktori berisi foto JPG/PNG")
+    parser.add_argument("--sintetis", type=int, default=12, help="jumlah foto sintetis bila tanpa direktori")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    metrics.set_enabled(False)
+
+    if args.direktori:
+        files = sorted(f for pola in ("*.jpg", "*.jpeg", "*.png", "*.JPG", "*.JPEG", "*.PNG")
+                       for f in glob.glob(os.path.join(args.direktori, pola)))
+        sampel = [(os.path.basename(f), open(f, "rb").read()) for f in files]
+    else:
+        rng = random.Random(args.seed)
+        sampel = [(f"foto_{i:02d}.jpg", foto_sintetis(rng)) for i in range(args.sintetis)]
+        sampel += [(f"formulir_{i:02d}.png", formulir_sintetis(rng)) for i in range(max(1, args.sintetis // 4))]
+
+    print(f"{'file':<24}{'asli KB':>10}{'simpan KB':>11}{'thumb KB':>10}{'ms':>8}")
+    asli, simpan, thumb, waktu = [], [], [], []
+    for nama, data in sampel:
+        start = time.perf_counter()
+        siap = attachments.siapkan(data)
+        waktu.append((time.perf_counter() - start) * 1000)
+        asli.append(len(data))
+        simpan.append(len(siap["data"]))
+        thumb.append(len(siap["thumb"] or b""))
+        print(f"{nama[:24]:<24}{kb(asli[-1]):>10.0f}{kb(simpan[-1]):>11.0f}{kb(thumb[-1]):>10.1f}{waktu[-1]:>8.0f}")
+
+    n = len(sampel)
+    total_asli, total_simpan = sum(asli), sum(simpan) + sum(thumb)
+    print(f"\n{n} file, median proses {statistics.median(waktu):.0f} ms per file")
+    print(f"penyimpanan: {kb(total_asli) / 1024:.1f} MB -> {kb(total_simpan) / 1024:.1f} MB "
+          f"(termasuk thumbnail, {total_asli / total_simpan:.1f}x lebih kecil)")
+    rata_asli, rata_simpan, rata_thumb = total_asli / n, sum(simpan) / n, sum(thumb) / n
+    print(f"halaman daftar ({HALAMAN} baris): gambar penuh {kb(rata_asli * HALAMAN) / 1024:.1f} MB -> "
+          f"thumbnail {kb(rata_thumb * HALAMAN):.0f} KB")
+    print(f"buka satu lampiran: {kb(rata_asli):.0f} KB -> {kb(rata_simpan):.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
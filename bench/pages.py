@@ -0,0 +1,154 @@
+"""
+Benchmark jalur data setiap halaman aplikasi pada beberapa skala data sintetis
+(bench/synthetic.py), untuk menangkap regresi sebelum deploy.
+
+    python -m bench.pages                          # semua skala
+    python -m bench.pages --skala kecil sedang --simpan hasil.json
+    python -m bench.pages --banding hasil.json --toleransi 1.5
+
+Setiap langkah diukur --ulang kali dan median-nya dilaporkan (ms): "dingin"
+dengan cache hasil baca db dikosongkan sebelum setiap pengukuran (jalur data
+sebenarnya, dipakai untuk --banding), "cache" untuk rerun berikutnya. Dengan
+--banding, proses keluar dengan kode 1 bila ada langkah yang lebih lambat dari
+toleransi x baseline (selisih di bawah --selisih-min ms diabaikan).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import attachments
+import db
+import presensi
+from bench.presensi import make_sheet
+from bench.synthetic import generate
+
+# nama -> (karyawan, bulan, izin)
+SKALA = {
+    "kecil": (50, 3, 300),
+    "sedang": (300, 12, 3000),
+    "besar": (1000, 24, 20000),
+}
+
+
+def page_steps(path, periode):
+    """
+    Langkah-langkah data per halaman: list (nama, fungsi, persiapan). `persiapan`
+    (boleh None) dijalankan sebelum setiap pengukuran dan tidak ikut diukur.
+    """
+    year, month = periode[-1]
+    tanggal = f"{year}-{month:02d}-10"
+    mapping = db.get_karyawan_mapping(path)
+    sheet = make_sheet(len(mapping), 31)
+    pending = []
+    with db.connect(path) as conn:
+        ref = conn.execute("SELECT file_pengajuan_ref FROM izin WHERE file_pengajuan_ref IS NOT NULL LIMIT 1").fetchone()
+    _, total = db.query_izin(status=db.STATUS_DITERIMA, limit=1, path=path)
+    offset_akhir = max(total - db.REPORT_PAGE_SIZE, 0)
+
+    def dashboard():
+        db.count_izin_by("jenis_pengajuan", status=db.STATUS_DITERIMA, path=path)
+        db.count_izin_pending(path)
+        db.load_izin_pending(0, db.PENDING_PAGE_SIZE + 1, path=path)
+
+    def siapkan_pending():
+        # Salin satu halaman izin yang sudah diterima menjadi pengajuan pending baru
+        with db.transaction(path) as c:
+            c.execute('''INSERT INTO izin (nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin,
+                                          jumlah_hari, tanggal_selesai, status)
+                         SELECT nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin,
+                                jumlah_hari, tanggal_selesai, ? FROM izin WHERE status = ? LIMIT ?''',
+                      (db.STATUS_PENDING, db.STATUS_DITERIMA, db.PENDING_PAGE_SIZE))
+        pending[:] = db.load_izin_pending(0, db.PENDING_PAGE_SIZE, path=path)["id"].tolist()
+
+    def setujui_halaman():
+        db.approve_izin(pending, path=path)
+
+    def upload_bulan():
+        df = presensi.format_presensi_data(sheet, mapping)
+        db.save_absensi_to_db(presensi.to_absensi(df, year, month), path=path)
+
+    return [
+        ("dashboard", dashboard, None),
+        ("dashboard: setujui 25", setujui_halaman, siapkan_pending),
+        ("izin: halaman 1", lambda: db.query_izin(status=db.STATUS_DITERIMA, path=path), None),
+        ("izin: halaman terakhir", lambda: db.query_izin(status=db.STATUS_DITERIMA, offset=offset_akhir, path=path), None),
+        ("izin: buka lampiran", lambda: attachments.get(ref[0] if ref else None, path=path), None),
+        ("absensi: satu bulan", lambda: db.load_absensi_month(year, month, path=path), None),
+        ("absensi: halaman 1", lambda: db.query_absensi(*db.month_range(year, month), path=path), None),
+        ("absensi: upload bulan", upload_bulan, None),
+        ("kalender: grid bulan", lambda: db.build_calendar_events(
+            db.calendar_counts(*db.month_grid_range(year, month), path=path)), None),
+        ("kalender: rincian hari", lambda: db.daily_summary(tanggal, path=path), None),
+    ]
+
+
+def run_scale(nama, ulang):
+    n_karyawan, n_bulan, n_izin = SKALA[nama]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{nama}.db")
+        start = time.perf_counter()
+        info = generate(path, n_karyawan, n_bulan, n_izin)
+        print(f"\n== {nama}: {n_karyawan} karyawan x {n_bulan} bulan ({info['absensi']} absensi), "
+              f"{n_izin} izin, {info['lampiran']} lampiran  [generate {time.perf_counter() - start:.1f} s]")
+        hasil = {}
+        print(f"  {'':<26} {'dingin':>9} {'cache':>9}  ms")
+        for step, fn, persiapan in page_steps(path, info["periode"]):
+            waktu = {"dingin": [], "cache": []}
+            for cache in waktu:
+                for _ in range(ulang):
+                    if persiapan:
+                        persiapan()
+                    if cache == "dingin":
+                        db.cache_clear()
+                    t0 = time.perf_counter()
+                    fn()
+                    waktu[cache].append((time.perf_counter() - t0) * 1000)
+            hasil[step] = statistics.median(waktu["dingin"])
+            hasil[f"{step} [cache]"] = statistics.median(waktu["cache"])
+            print(f"  {step:<26} {hasil[step]:>9.2f} {hasil[f'{step} [cache]']:>9.2f}")
+        db.get_pool(path).close()
+    return hasil
+
+
+def bandingkan(hasil, baseline, toleransi, selisih_min=1.0):
+    """Langkah yang lebih lambat dari toleransi x baseline dan selisihnya >= selisih_min ms."""
+    regresi = []
+    for skala, langkah in hasil.items():
+        for step, ms in langkah.items():
+            acuan = baseline.get(skala, {}).get(step)
+            if acuan and ms > acuan * toleransi and ms - acuan >= selisih_min:
+                regresi.append(f"{skala} / {step}: {acuan:.2f} -> {ms:.2f} ms ({ms / acuan:.1f}x)")
+    return regresi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--skala", nargs="+", choices=list(SKALA), default=list(SKALA))
+    parser.add_argument("--ulang", type=int, default=5)
+    parser.add_argument("--simpan", help="tulis hasil (ms per langkah) ke file JSON")
+    parser.add_argument("--banding", help="file JSON hasil sebelumnya sebagai baseline")
+    parser.add_argument("--toleransi", type=float, default=1.5)
+    parser.add_argument("--selisih-min", type=float, default=1.0,
+                        help="abaikan selisih di bawah sekian ms (noise pengukuran)")
+    args = parser.parse_args()
+
+    hasil = {nama: run_scale(nama, args.ulang) for nama in args.skala}
+    if args.simpan:
+        with open(args.simpan, "w") as f:
+            json.dump(hasil, f, indent=2)
+    if args.banding:
+        with open(args.banding) as f:
+            regresi = bandingkan(hasil, json.load(f), args.toleransi, args.selisih_min)
+        if regresi:
+            print("\nREGRESI:\n  " + "\n  ".join(regresi))
+            return 1
+        print(f"\nTidak ada langkah yang lebih lambat dari {args.toleransi}x baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Benchmark format_presensi_data: implementasi lama (apply per baris + strptime)
+vs pipeline vectorized di presensi.py, sekaligus memastikan hasilnya identik.
+
+    python -m bench.presensi --karyawan 1000 --hari 31
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import presensi
+
+
+def make_sheet(n_karyawan, n_hari, seed=0):
+    """Sheet lebar seperti ekspor mesin fingerprint: 2 baris (datang/pulang) per karyawan."""
+    rng = random.Random(seed)
+    aneh = ["", "  08:05 ", "9:5", "25:00", "08:00:00", "-", datetime(2024, 5, 1, 9, 17, 30), 917]
+    rows = []
+    for k in range(n_karyawan):
+        for jenis in ("Datang", "Pulang"):
+            row = {"ID": k + 1, "Nama": f"Karyawan {k:04d}", "Jenis": jenis}
+            for d in range(1, n_hari + 1):
+                r = rng.random()
+                if r < 0.1:
+                    continue  # tidak ada rekaman
+                if r < 0.11:
+                    row[str(d)] = rng.choice(aneh)
+                    continue
+                menit = rng.randint(7 * 60, 10 * 60) if jenis == "Datang" else rng.randint(16 * 60, 19 * 60)
+                row[str(d)] = f"{menit // 60:02d}:{menit % 60:02d}"
+            rows.append(row)
+    return pd.DataFrame(rows, columns=["ID", "Nama", "Jenis"] + [str(d) for d in range(1, n_hari + 1)])
+
+
+def legacy_cek_ketepatan_waktu(waktu_masuk):
+    try:
+        waktu_batas = datetime.strptime("09:17", "%H:%M").time()
+        if isinstance(waktu_masuk, str):
+            waktu_masuk_obj = datetime.strptime(waktu_masuk.strip(), "%H:%M").time()
+        elif isinstance(waktu_masuk, (datetime, pd.Timestamp)):
+            waktu_masuk_obj = waktu_masuk.time()
+        else:
+            return "Invalid Time"
+        return "Telat" if waktu_masuk_obj > waktu_batas else "Tepat Waktu"
+    except Exception:
+        return "Invalid Time"
+
+
+def legacy_format_presensi_data(df, mapping):
+    """Implementasi lama format_presensi_data (tanpa pesan st.error)."""
+    df["Jenis"] = df["Jenis"].str.lower()
+    day_cols = [col for col in df.columns if str(col).isdigit()]
+    df_long = df.melt(id_vars=['ID', 'Nama', 'Jenis'], value_vars=day_cols, var_name='tanggal', value_name='waktu')
+    df_long = df_long.dropna(subset=['waktu'])
+    df_pivot = df_long.pivot_table(index=['ID', 'Nama', 'tanggal'], columns='Jenis', values='waktu',
+                                   aggfunc='first').reset_index()
+    if 'datang' not in df_pivot.columns:
+        df_pivot['datang'] = ""
+    if 'pulang' not in df_pivot.columns:
+        df_pivot['pulang'] = ""
+    df_pivot['status'] = df_pivot['datang'].apply(lambda x: legacy_cek_ketepatan_waktu(x) if x != "" else "No Data")
+    df_final = df_pivot[['ID', 'Nama', 'tanggal', 'status', 'datang', 'pulang']].copy()
+    df_final.rename(columns={'ID': 'id'}, inplace=True)
+    df_final['divisi'] = df_final['id'].apply(lambda x: mapping.get(x, "No Data"))
+    return df_final[['id', 'Nama', 'divisi', 'tanggal', 'status', 'datang', 'pulang']]
+
+
+def _best_of(n, fn, *args):
+    best = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--karyawan", type=int, default=1000)
+    parser.add_argument("--hari", type=int, default=31)
+    parser.add_argument("--ulang", type=int, default=3)
+    args = parser.parse_args()
+
+    sheet = make_sheet(args.karyawan, args.hari)
+    mapping = {k + 1: f"Divisi {k % 8}" for k in range(0, args.karyawan, 2)}  # sebagian ID tidak dikenal
+
+    legacy_s, expected = _best_of(args.ulang, lambda: legacy_format_presensi_data(sheet.copy(), mapping))
+    new_s, result = _best_of(args.ulang, presensi.format_presensi_data, sheet, mapping)
+    pd.testing.assert_frame_equal(expected, result)
+
+    print(f"{len(result)} baris hasil dari sheet {args.karyawan} karyawan x {args.hari} hari (hasil identik)")
+    print(f"{'legacy apply/strptime':<24} {legacy_s * 1000:9.1f} ms")
+    print(f"{'vectorized':<24} {new_s * 1000:9.1f} ms  ({legacy_s / new_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark start dingin dan rerun aplikasi Streamlit (lewat streamlit.testing AppTest).
+
+Setiap pengukuran berjalan di proses Python baru, seperti pod yang baru restart,
+dengan database sintetis yang sudah ada. Dengan --ref, tree dari revisi git lain
+(mis. sebelum perubahan) diukur dengan cara yang sama sebagai pembanding.
+
+    python -m bench.startup --ref HEAD~1 --ulang 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from bench.synthetic import generate
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dijalankan di proses anak dengan cwd = tree yang diukur. Impor streamlit sudah
+# dibayar sebelum pengukuran, jadi angka "dingin" hanya berisi eksekusi absen.py.
+_CHILD = r"""
+import json, statistics, sys, time
+from streamlit.testing.v1 import AppTest
+
+reruns = int(sys.argv[1])
+t0 = time.perf_counter()
+at = AppTest.from_file("absen.py", default_timeout=120).run()
+cold = time.perf_counter() - t0
+assert not at.exception, [e.message for e in at.exception]
+
+def rerun_median(n):
+    waktu = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        at.run()
+        waktu.append(time.perf_counter() - t0)
+    return statistics.median(waktu)
+
+hasil = {"dingin (Dashboard)": cold, "rerun Dashboard": rerun_median(reruns)}
+t0 = time.perf_counter()
+at.sidebar.selectbox[0].select("Data Absensi").run()
+hasil["pindah ke Data Absensi"] = time.perf_counter() - t0
+hasil["rerun Data Absensi"] = rerun_median(reruns)
+print(json.dumps(hasil))
+"""
+
+
+def export_ref(ref, tujuan):
+    """Ekstrak tree revisi git `ref` ke direktori `tujuan`."""
+    archive = subprocess.run(["git", "-C", REPO, "archive", ref], check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", tujuan], input=archive, check=True)
+
+
+def measure(tree, db_path, reruns):
+    env = dict(os.environ, ABSENSI_DB_PATH=db_path)
+    out = subprocess.run([sys.executable, "-c", _CHILD, str(reruns)], cwd=tree, env=env,
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(tree, db_path, ulang, reruns):
+    """Median tiap metrik (detik) dari `ulang` proses baru."""
+    sampel = [measure(tree, db_path, reruns) for _ in range(ulang)]
+    return {k: statistics.median(s[k] for s in sampel) for k in sampel[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ref", help="revisi git pembanding (mis. HEAD~1)")
+    parser.add_argument("--ulang", type=int, default=3, help="jumlah proses baru per tree")
+    parser.add_argument("--rerun", type=int, default=5, help="jumlah rerun per halaman")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "absensi.db")
+        generate(db_path, n_karyawan=50, n_bulan=3, n_izin=300)
+
+        trees = [("sekarang", REPO)]
+        if args.ref:
+            ref_dir = os.path.join(tmp, "ref")
+            os.mkdir(ref_dir)
+            export_ref(args.ref, ref_dir)
+            trees.insert(0, (args.ref, ref_dir))
+
+        hasil = {nama: run(tree, db_path, args.ulang, args.rerun) for nama, tree in trees}
+
+    print(f"{'':<24}" + "".join(f"{nama:>14}" for nama in hasil))
+    for metrik in next(iter(hasil.values())):
+        print(f"{metrik:<24}" + "".join(f"{h[metrik] * 1000:>11.0f} ms" for h in hasil.values()))
+
+
+if __name__ == "__main__":
+    main()
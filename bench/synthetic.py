@@ -0,0 +1,140 @@
+"""
+Generator data sintetis deterministik untuk benchmark: N karyawan x M bulan
+absensi hari kerja, K pengajuan izin (sebagian dengan lampiran gambar) dengan
+campuran status pending/diterima/ditolak.
+
+    python -m bench.synthetic data/sintetis.db --karyawan 300 --bulan 12 --izin 3000
+
+Seed yang sama selalu menghasilkan isi database yang sama.
+"""
+import argparse
+import calendar
+import io
+import random
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+import attachments
+import db
+
+JENIS = ["Cuti", "Izin", "Sakit", "WFH"]
+
+
+def months(n_bulan, tahun_akhir=2024):
+    """(tahun, bulan) untuk n_bulan terakhir yang berakhir di Desember tahun_akhir."""
+    return [((tahun_akhir * 12 + 11 - i) // 12, (tahun_akhir * 12 + 11 - i) % 12 + 1)
+            for i in reversed(range(n_bulan))]
+
+
+def karyawan(n_karyawan):
+    return [(k + 1, f"Karyawan {k:04d}", f"Divisi {k % 8}") for k in range(n_karyawan)]
+
+
+def absensi_month(n_karyawan, year, month, rng):
+    """Satu baris absensi per karyawan per hari kerja (DataFrame kolom db.ABSENSI_COLUMNS)."""
+    hari_kerja = [date(year, month, d) for d in range(1, calendar.monthrange(year, month)[1] + 1)
+                  if date(year, month, d).weekday() < 5]
+    rows = []
+    for _, nama, divisi in karyawan(n_karyawan):
+        for d in hari_kerja:
+            if rng.random() < 0.05:
+                continue  # tidak ada rekaman
+            menit = rng.randint(7 * 60 + 30, 9 * 60 + 45)
+            rows.append((nama, divisi, d.isoformat(), f"{menit // 60:02d}:{menit % 60:02d}",
+                         f"{rng.randint(16, 18):02d}:{rng.randint(0, 59):02d}",
+                         "Telat" if menit > 9 * 60 + 17 else "Tepat Waktu"))
+    return pd.DataFrame(rows, columns=db.ABSENSI_COLUMNS)
+
+
+def images(n, rng, size=96):
+    """n gambar PNG berisi noise (byte berbeda, hasil deterministik)."""
+    from PIL import Image
+
+    hasil = []
+    for _ in range(n):
+        buf = io.BytesIO()
+        Image.frombytes("RGB", (size, size), rng.randbytes(size * size * 3)).save(buf, "PNG")
+        hasil.append(buf.getvalue())
+    return hasil
+
+
+def generate(path, n_karyawan=300, n_bulan=12, n_izin=3000, seed=0, rasio_lampiran=0.5, n_gambar=50):
+    """
+    Isi database `path` (harus baru) dengan data sintetis. Mengembalikan dict
+    ringkasan: jumlah baris absensi, izin per status, lampiran, dan periode.
+    """
+    rng = random.Random(seed)
+    db.init_db(path)
+    periode = months(n_bulan)
+
+    with db.transaction(path) as c:
+        c.executemany("INSERT INTO karyawan (ID, Nama, Divisi) VALUES (?, ?, ?)", karyawan(n_karyawan))
+
+    n_absensi = 0
+    for year, month in periode:
+        df = absensi_month(n_karyawan, year, month, rng)
+        db.save_absensi_to_db(df, path)
+        n_absensi += len(df)
+
+    # Pengajuan izin tersebar di seluruh periode; lampiran diambil dari kumpulan gambar
+    # terbatas sehingga deduplikasi tabel lampiran juga ikut teruji.
+    gambar = images(n_gambar, rng)
+    awal = date(*periode[0], 1)
+    n_hari = (date(*periode[-1], calendar.monthrange(*periode[-1])[1]) - awal).days + 1
+    status = {db.STATUS_PENDING: [], db.STATUS_DITERIMA: [], db.STATUS_DITOLAK: []}
+    with db.transaction(path) as c:
+        for _ in range(n_izin):
+            k = rng.randrange(n_karyawan)
+            tanggal_izin = awal + timedelta(days=rng.randrange(n_hari))
+            jumlah_hari = rng.choice([1, 1, 1, 2, 3, 5, 10])
+            lampiran = attachments.put(c, rng.choice(gambar)) if rng.random() < rasio_lampiran else None
+            lampiran = lampiran or {}
+            c.execute('''INSERT INTO izin (karyawan_id, nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin,
+                                          jumlah_hari, tanggal_selesai, file_pengajuan_ref, file_pengajuan_size,
+                                          file_pengajuan_mime, status)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                      (k + 1, f"Karyawan {k:04d}", f"Divisi {k % 8}", rng.choice(JENIS),
+                       (tanggal_izin - timedelta(days=rng.randint(1, 14))).isoformat(), tanggal_izin.isoformat(),
+                       jumlah_hari, db.izin_end_date(tanggal_izin.isoformat(), jumlah_hari),
+                       lampiran.get("ref"), lampiran.get("size"), lampiran.get("mime"), db.STATUS_PENDING))
+            izin_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
+            r = rng.random()
+            tujuan = db.STATUS_PENDING if r < 0.1 else db.STATUS_DITOLAK if r < 0.2 else db.STATUS_DITERIMA
+            status[tujuan].append(izin_id)
+
+    # Persetujuan lewat jalur yang sama dengan aplikasi (status + hari izin di absensi)
+    for i in range(0, len(status[db.STATUS_DITERIMA]), 500):
+        db.approve_izin(status[db.STATUS_DITERIMA][i:i + 500], path=path)
+    db.set_izin_status(status[db.STATUS_DITOLAK], db.STATUS_DITOLAK, path=path)
+
+    with db.connect(path) as conn:
+        n_lampiran = conn.execute("SELECT COUNT(*) FROM lampiran").fetchone()[0]
+    return {
+        "absensi": n_absensi,
+        "izin": {s: len(ids) for s, ids in status.items()},
+        "lampiran": n_lampiran,
+        "periode": periode,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="path database tujuan (file baru)")
+    parser.add_argument("--karyawan", type=int, default=300)
+    parser.add_argument("--bulan", type=int, default=12)
+    parser.add_argument("--izin", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    hasil = generate(args.path, args.karyawan, args.bulan, args.izin, args.seed)
+    print(f"{hasil['absensi']} baris absensi, izin {hasil['izin']}, {hasil['lampiran']} lampiran "
+          f"({hasil['periode'][0][0]}-{hasil['periode'][0][1]:02d} s.d. "
+          f"{hasil['periode'][-1][0]}-{hasil['periode'][-1][1]:02d}) dalam {time.perf_counter() - start:.1f} s")
+    db.get_pool(args.path).close()
+
+
+if __name__ == "__main__":
+    main()
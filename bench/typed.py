@@ -0,0 +1,110 @@
+"""
+Benchmark memori dan kecepatan DataFrame absensi/izin: frame object dari
+read_sql (cara lama) vs frame bertipe dari db.load_absensi / db.read_typed.
+
+Data: satu tahun absensi hari kerja untuk N karyawan (default 500). Selain
+waktu muat, diukur memori frame (deep), puncak alokasi selama memuat
+(tracemalloc) dan operasi yang biasa dikerjakan halaman.
+
+    python -m bench.typed --karyawan 500 --ulang 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import db
+import metrics
+import presensi
+from bench.synthetic import generate, months
+
+_QUERY_IZIN = "SELECT * FROM izin"
+
+
+def timeit(fn, ulang):
+    waktu = []
+    for _ in range(ulang):
+        start = time.perf_counter()
+        fn()
+        waktu.append(time.perf_counter() - start)
+    return statistics.median(waktu)
+
+
+def puncak(fn):
+    """(hasil, puncak alokasi dalam byte) selama fn berjalan."""
+    tracemalloc.start()
+    try:
+        hasil = fn()
+        return hasil, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def mb(n):
+    return n / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--karyawan", type=int, default=500)
+    parser.add_argument("--izin", type=int, default=5000)
+    parser.add_argument("--ulang", type=int, default=5)
+    args = parser.parse_args()
+    metrics.set_enabled(False)  # yang diukur jalur data, bukan instrumentasi
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "typed.db")
+        generate(path, n_karyawan=args.karyawan, n_bulan=12, n_izin=args.izin, rasio_lampiran=0)
+        (y0, m0), (y1, m1) = months(12)[0], months(12)[-1]
+        start, end = db.month_range(y0, m0)[0], db.month_range(y1, m1)[1]
+
+        muat = {
+            "absensi": (lambda: db.read_sql("SELECT * FROM absensi WHERE tanggal >= ? AND tanggal < ?",
+                                            params=(start, end), path=path),
+                        lambda: db.load_absensi(start, end, path=path)),
+            "izin": (lambda: db.read_sql(_QUERY_IZIN, path=path),
+                     lambda: db.read_typed(_QUERY_IZIN, path=path)),
+        }
+        print(f"{'':<28}{'lama':>12}{'bertipe':>12}{'rasio':>8}")
+        frames = {}
+        for nama, (lama, baru) in muat.items():
+            (df_lama, puncak_lama), (df_baru, puncak_baru) = puncak(lama), puncak(baru)
+            frames[nama] = df_lama, df_baru
+            deep_lama = df_lama.memory_usage(deep=True).sum()
+            deep_baru = df_baru.memory_usage(deep=True).sum()
+            t_lama, t_baru = timeit(lama, args.ulang), timeit(baru, args.ulang)
+            print(f"{nama} ({len(df_lama)} baris)")
+            print(f"  {'memori frame (MB)':<26}{mb(deep_lama):>12.1f}{mb(deep_baru):>12.1f}{deep_lama / deep_baru:>7.1f}x")
+            print(f"  {'puncak saat muat (MB)':<26}{mb(puncak_lama):>12.1f}{mb(puncak_baru):>12.1f}"
+                  f"{puncak_lama / puncak_baru:>7.1f}x")
+            print(f"  {'waktu muat (ms)':<26}{t_lama * 1000:>12.1f}{t_baru * 1000:>12.1f}{t_lama / t_baru:>7.1f}x")
+
+        lama, baru = frames["absensi"]
+        awal_bulan, akhir_bulan = db.month_range(y1, m1)
+        operasi = {
+            # Halaman lama mem-parse ulang string di setiap rerun
+            "filter telat": (lambda: lama[lama["status"].str.lower() == "telat"],
+                             lambda: baru[baru["status"] == "Telat"]),
+            "filter satu bulan": (lambda: lama[(pd.to_datetime(lama["tanggal"]) >= awal_bulan)
+                                               & (pd.to_datetime(lama["tanggal"]) < akhir_bulan)],
+                                  lambda: baru[(baru["tanggal"] >= awal_bulan) & (baru["tanggal"] < akhir_bulan)]),
+            "tanpa status izin": (lambda: lama[~lama["status"].isin(db.STATUS_ABSENSI_IZIN)],
+                                  lambda: baru[~baru["status"].isin(db.STATUS_ABSENSI_IZIN)]),
+            "telat per divisi": (lambda: lama[lama["status"].str.lower() == "telat"].groupby("divisi").size(),
+                                 lambda: baru[baru["status"] == "Telat"].groupby("divisi", observed=True).size()),
+            "rata-rata jam masuk": (lambda: presensi.menit_sejak_tengah_malam(lama["jam_masuk"]).mean(),
+                                    lambda: baru["jam_masuk"].mean()),
+        }
+        print("operasi halaman (ms)")
+        for nama, (fn_lama, fn_baru) in operasi.items():
+            t_lama, t_baru = timeit(fn_lama, args.ulang), timeit(fn_baru, args.ulang)
+            print(f"  {nama:<26}{t_lama * 1000:>12.2f}{t_baru * 1000:>12.2f}{t_lama / t_baru:>7.1f}x")
+        db.get_pool(path).close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1557 @@
+"""
+Lapisan akses SQLite bersama untuk aplikasi absensi.
+
+Koneksi dibuka sekali per proses dan dipakai ulang lintas rerun Streamlit
+(modul ini hanya diimpor sekali, berbeda dengan absen.py yang dieksekusi ulang
+setiap interaksi). Setiap koneksi memakai WAL sehingga pembaca tidak memblokir
+penulis upload bulanan, dan operasi tulis dicoba ulang bila SQLite sedang sibuk.
+
+Semua fungsi data aplikasi (simpan/muat izin dan absensi, kalender, rincian
+harian) ada di sini tanpa ketergantungan ke Streamlit, sehingga bisa diimpor
+dari skrip, CLI, atau benchmark. Transformasi file presensi ada di presensi.py.
+"""
+import functools
+import inspect
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import metrics
+import presensi
+
+DB_PATH = os.environ.get("ABSENSI_DB_PATH", "absensi.db")
+
+POOL_SIZE = 4
+BUSY_TIMEOUT_MS = 5000
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05  # detik, dilipatgandakan setiap percobaan
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA cache_size=-16000",  # ~16 MB per koneksi
+    "PRAGMA mmap_size=134217728",  # 128 MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def is_busy(exc):
+    """True bila exc adalah SQLITE_BUSY/LOCKED (database sedang dikunci penulis lain)."""
+    msg = str(exc).lower()
+    return isinstance(exc, sqlite3.OperationalError) and ("locked" in msg or "busy" in msg)
+
+
+def with_retry(fn, *args, **kwargs):
+    """Jalankan fn, ulangi dengan backoff bila SQLite mengembalikan SQLITE_BUSY/LOCKED."""
+    for attempt in range(BUSY_RETRIES):
+        try:
+            return fn(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if not is_busy(e) or attempt == BUSY_RETRIES - 1:
+                raise
+            time.sleep(BUSY_BACKOFF * (2 ** attempt))
+
+
+class ConnectionPool:
+    """Pool koneksi SQLite sederhana yang aman dipakai dari banyak thread sesi Streamlit."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,  # transaksi dikelola eksplisit lewat transaction()
+            check_same_thread=False,
+        )
+        for pragma in PRAGMAS:
+            with_retry(conn.execute, pragma)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if not create:
+            return self._idle.get()
+        try:
+            return self._open()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    path = path or DB_PATH
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+
+@contextmanager
+def connect(path=None):
+    """Pinjam koneksi dari pool untuk operasi baca."""
+    with get_pool(path).connection() as conn:
+        yield conn
+
+
+@contextmanager
+def transaction(path=None, catat_versi=True):
+    """
+    Pinjam koneksi dan buka transaksi tulis (BEGIN IMMEDIATE).
+    Commit bila blok selesai normal, rollback bila terjadi exception.
+    Transaksi yang mengubah baris menaikkan versi data (lihat cached) kecuali
+    `catat_versi=False`, untuk tulisan yang tidak dibaca fungsi ber-cache.
+    """
+    with get_pool(path).connection() as conn:
+        with_retry(conn.execute, "BEGIN IMMEDIATE")
+        awal = conn.total_changes
+        try:
+            yield conn
+            if catat_versi and conn.total_changes != awal:
+                conn.execute("UPDATE versi_data SET versi = versi + 1 WHERE nama = 'data'")
+        except BaseException:
+            conn.rollback()
+            raise
+        with_retry(conn.commit)
+
+
+def read_sql(query, params=(), path=None):
+    # Semua query baca tercatat sebagai operasi "sql"; teks query ikut di log lambat
+    with metrics.timed("sql", detail=" ".join(query.split())[:200]) as t, connect(path) as conn:
+        return t.set_result(with_retry(pd.read_sql_query, query, conn, params=params))
+
+
+def execute(query, params=(), path=None, catat_versi=True):
+    """Jalankan satu perintah tulis dalam transaksinya sendiri, kembalikan rowcount."""
+    with transaction(path, catat_versi) as conn:
+        return conn.execute(query, params).rowcount
+
+
+# --- Cache hasil baca ---
+#
+# Fungsi baca yang dipanggil di setiap rerun halaman (absensi, izin, rekap,
+# kalender, rincian harian) di-cache per proses dengan kunci argumen + versi
+# data. Versi data adalah jumlah penghitung di tabel versi_data: baris "data"
+# dinaikkan transaction() setiap kali transaksi mengubah baris, baris "karyawan"
+# oleh trigger tabel karyawan. Penghitungnya tersimpan di database, jadi tulisan
+# dari proses lain (import CLI) juga terlihat; hanya tulisan di luar modul ini
+# (mis. shell sqlite3) yang butuh cache_clear().
+#
+#     ABSENSI_CACHE_ENTRIES=256   jumlah hasil maksimum (0 = cache mati)
+#     ABSENSI_CACHE_MB=256        total ukuran hasil di memori (termasuk isi string)
+
+CACHE_ENTRIES = int(os.environ.get("ABSENSI_CACHE_ENTRIES", "256"))
+CACHE_MB = float(os.environ.get("ABSENSI_CACHE_MB", "256"))
+
+_cache = OrderedDict()  # (path, versi, fungsi, argumen) -> (hasil, bytes)
+_cache_versi = {}  # path -> versi terakhir yang terlihat
+_cache_stat = {"hit": 0, "miss": 0, "bytes": 0}
+_cache_lock = threading.Lock()
+
+
+def data_version(path=None):
+    """Token versi data `path`; berubah setelah setiap transaksi tulis yang di-commit."""
+    with connect(path) as conn:
+        return conn.execute("SELECT SUM(versi) FROM versi_data").fetchone()[0]
+
+
+def _salinan(hasil):
+    # Salinan dangkal (copy-on-write): kolom yang ditambah/diubah pemanggil tidak sampai ke cache
+    if isinstance(hasil, pd.DataFrame):
+        return hasil.copy(deep=False)
+    if isinstance(hasil, tuple):
+        return tuple(_salinan(v) for v in hasil)
+    if isinstance(hasil, dict):
+        return {k: _salinan(v) for k, v in hasil.items()}
+    return hasil
+
+
+def _ukuran(hasil):
+    """
+    Ukuran hasil di memori dalam bytes. Kolom object (teks hasil read_sql) dihitung
+    beserta isi string-nya (memory_usage deep), bukan hanya pointer 8 byte per sel;
+    dihitung sekali saat hasil disimpan.
+    """
+    if isinstance(hasil, pd.DataFrame):
+        return int(hasil.memory_usage(index=True, deep=True).sum())
+    if isinstance(hasil, (tuple, list)):
+        return sum(_ukuran(v) for v in hasil)
+    if isinstance(hasil, dict):
+        return sum(_ukuran(v) for v in hasil.values())
+    return sys.getsizeof(hasil)
+
+
+def _buang(key):
+    _, nbytes = _cache.pop(key)
+    _cache_stat["bytes"] -= nbytes
+
+
+def cached(fn):
+    """
+    Decorator: simpan hasil fungsi baca per (path, versi data, argumen) dalam
+    LRU proses yang dibatasi CACHE_ENTRIES dan CACHE_MB. Hasil DataFrame
+    dikembalikan sebagai salinan dangkal.
+    """
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if CACHE_ENTRIES <= 0:
+            return fn(*args, **kwargs)
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        argumen = dict(bound.arguments)
+        path = argumen.pop("path", None) or DB_PATH
+        # Versi dibaca sebelum query: tulisan di antaranya membuat hasil lebih baru
+        # dari versinya, dan panggilan berikutnya sekadar membaca ulang.
+        versi = data_version(path)
+        key = (path, versi, fn.__qualname__, tuple(argumen.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return fn(*args, **kwargs)
+        with _cache_lock:
+            if _cache_versi.get(path) != versi:
+                _cache_versi[path] = versi
+                for lama in [k for k in _cache if k[0] == path and k[1] != versi]:
+                    _buang(lama)
+            entry = _cache.get(key)
+            if entry is not None:
+                _cache.move_to_end(key)
+                _cache_stat["hit"] += 1
+                return _salinan(entry[0])
+            _cache_stat["miss"] += 1
+        hasil = fn(*args, **kwargs)
+        nbytes = _ukuran(hasil)
+        if nbytes <= CACHE_MB * 1024 * 1024:
+            with _cache_lock:
+                if key in _cache:
+                    _buang(key)
+                _cache[key] = (hasil, nbytes)
+                _cache_stat["bytes"] += nbytes
+                while len(_cache) > CACHE_ENTRIES or _cache_stat["bytes"] > CACHE_MB * 1024 * 1024:
+                    _buang(next(iter(_cache)))
+        return _salinan(hasil)
+
+    return wrapper
+
+
+def cache_clear():
+    with _cache_lock:
+        _cache.clear()
+        _cache_versi.clear()
+        _cache_stat.update(hit=0, miss=0, bytes=0)
+
+
+def cache_stats():
+    """Statistik cache baca: {entries, kb, hit, miss}."""
+    with _cache_lock:
+        return {"entries": len(_cache), "kb": _cache_stat["bytes"] / 1024,
+                "hit": _cache_stat["hit"], "miss": _cache_stat["miss"]}
+
+
+# --- Skema & migrasi ---
+#
+# Setiap migrasi dijalankan tepat sekali, berurutan, dan dicatat di tabel
+# schema_version. Migrasi harus aman untuk database lama yang dibuat sebelum
+# tabel schema_version ada (gunakan IF NOT EXISTS / cek sqlite_master).
+# Migrasi yang mengubah data rekap mengembalikan True; rekap lalu dibangun ulang
+# sekali setelah migrasi terakhir, karena kode rekap mengikuti skema terbaru.
+
+def _migrasi_skema_dasar(c):
+    # Tabel izin dengan kolom status (default: 'Pending')
+    c.execute('''CREATE TABLE IF NOT EXISTS izin (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nama TEXT,
+                    divisi TEXT,
+                    jenis_pengajuan TEXT,
+                    tanggal_pengajuan TEXT,
+                    tanggal_izin TEXT,
+                    jumlah_hari INTEGER,
+                    file_pengajuan BLOB,
+                    file_persetujuan BLOB,
+                    status TEXT DEFAULT 'Pending'
+                )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS absensi (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nama TEXT,
+                    divisi TEXT,
+                    tanggal TEXT,
+                    jam_masuk TEXT,
+                    jam_keluar TEXT,
+                    status TEXT
+                )''')
+
+    # Tabel karyawan: data minimal (ID, Nama, Divisi)
+    c.execute('''CREATE TABLE IF NOT EXISTS karyawan (
+                    ID INTEGER PRIMARY KEY,
+                    Nama TEXT,
+                    Divisi TEXT
+                )''')
+
+    # Satu baris absensi per karyawan per tanggal, agar upload ulang idempoten.
+    # Duplikat dari upload ganda dan dari izin yang disetujui sebelumnya dibuang dulu.
+    has_unique = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_absensi_nama_tanggal'"
+    ).fetchone()
+    if not has_unique:
+        _buang_absensi_ganda(c, "nama, tanggal")
+        c.execute("CREATE UNIQUE INDEX ux_absensi_nama_tanggal ON absensi(nama, tanggal)")
+
+
+def _buang_absensi_ganda(c, kunci, where="true"):
+    """
+    Hapus baris absensi (yang memenuhi `where`) dengan nilai `kunci` sama hingga
+    tersisa satu: rekaman kehadiran menang atas baris izin (kode lama menulis baris
+    "Izin" setelah upload absensi), lalu baris terbaru. Status dibandingkan tanpa
+    huruf besar/spasi karena migrasi bisa berjalan sebelum ejaan kanonik (migrasi 8).
+    Mengembalikan jumlah baris yang dihapus.
+    """
+    izin = ", ".join(f"'{status.lower()}'" for status in STATUS_ABSENSI_IZIN)
+    c.execute(f'''DELETE FROM absensi WHERE {where} AND id NOT IN (
+                     SELECT id FROM (
+                         SELECT id, row_number() OVER (
+                             PARTITION BY {kunci}
+                             ORDER BY COALESCE(lower(trim(status)) IN ({izin}), 0), id DESC) AS urutan
+                         FROM absensi WHERE {where})
+                     WHERE urutan = 1)''')
+    return c.execute("SELECT changes()").fetchone()[0]
+
+
+def _normalisasi_tanggal_absensi(c):
+    """
+    Ubah tanggal absensi ke 'YYYY-MM-DD'. Baris yang tanggal ternormalisasinya
+    sama (mis. '2024-05-03 00:00:00' dan '2024-05-03' untuk nama yang sama)
+    dibuang dulu seperti pada migrasi 1 (_buang_absensi_ganda).
+    Mengembalikan jumlah baris yang dihapus atau diubah.
+    """
+    dihapus = _buang_absensi_ganda(c, "nama, date(tanggal)", where="date(tanggal) IS NOT NULL")
+    c.execute('''UPDATE absensi SET tanggal = date(tanggal)
+                 WHERE date(tanggal) IS NOT NULL AND tanggal <> date(tanggal)''')
+    return dihapus + c.execute("SELECT changes()").fetchone()[0]
+
+
+def _migrasi_tanggal_dan_indeks(c):
+    # Tanggal disimpan sebagai TEXT ISO-8601 ('YYYY-MM-DD') supaya perbandingan
+    # rentang (tanggal >= ? AND tanggal < ?) benar dan bisa memakai indeks.
+    # Nilai lama yang masih berformat lain (mis. '2024-05-01 00:00:00') dinormalisasi.
+    _normalisasi_tanggal_absensi(c)
+    for col in ("tanggal_pengajuan", "tanggal_izin"):
+        c.execute(f'''UPDATE izin SET {col} = date({col})
+                      WHERE date({col}) IS NOT NULL AND {col} <> date({col})''')
+
+    c.execute("CREATE INDEX IF NOT EXISTS ix_absensi_tanggal_status ON absensi(tanggal, status)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_izin_status_jenis ON izin(status, jenis_pengajuan)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_izin_tanggal_izin ON izin(tanggal_izin)")
+
+
+LAMPIRAN_COLUMNS = ("file_pengajuan", "file_persetujuan")
+
+
+def _migrasi_lampiran(c):
+    # BLOB file dipindah dari tabel izin ke tabel lampiran (content-addressed),
+    # izin hanya menyimpan referensi hash + ukuran + mime.
+    import attachments
+
+    c.execute('''CREATE TABLE IF NOT EXISTS lampiran (
+                    hash TEXT PRIMARY KEY,
+                    mime TEXT,
+                    size INTEGER,
+                    data BLOB,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )''')
+    existing = {row[1] for row in c.execute("PRAGMA table_info(izin)")}
+    for kolom in LAMPIRAN_COLUMNS:
+        for suffix, tipe in (("ref", "TEXT"), ("size", "INTEGER"), ("mime", "TEXT")):
+            if f"{kolom}_{suffix}" not in existing:
+                c.execute(f"ALTER TABLE izin ADD COLUMN {kolom}_{suffix} {tipe}")
+        if kolom not in existing:
+            continue
+        # Dipindah satu per satu agar memori tetap kecil walau tabel berisi banyak gambar
+        ids = [row[0] for row in c.execute(f"SELECT id FROM izin WHERE {kolom} IS NOT NULL")]
+        for izin_id in ids:
+            (data,) = c.execute(f"SELECT {kolom} FROM izin WHERE id = ?", (izin_id,)).fetchone()
+            meta = attachments.put(c, data)
+            if meta:
+                c.execute(
+                    f"UPDATE izin SET {kolom}_ref = ?, {kolom}_size = ?, {kolom}_mime = ? WHERE id = ?",
+                    (meta["ref"], meta["size"], meta["mime"], izin_id),
+                )
+        try:
+            c.execute(f"ALTER TABLE izin DROP COLUMN {kolom}")
+        except sqlite3.OperationalError:
+            # SQLite < 3.35 belum mendukung DROP COLUMN; kosongkan saja isinya
+            c.execute(f"UPDATE izin SET {kolom} = NULL")
+
+
+def _migrasi_tanggal_selesai(c):
+    # Tanggal akhir izin disimpan agar "siapa yang izin pada tanggal X" cukup satu
+    # predikat interval berindeks: tanggal_izin <= X AND tanggal_selesai >= X.
+    existing = {row[1] for row in c.execute("PRAGMA table_info(izin)")}
+    if "tanggal_selesai" not in existing:
+        c.execute("ALTER TABLE izin ADD COLUMN tanggal_selesai TEXT")
+    c.execute('''UPDATE izin SET tanggal_selesai = date(tanggal_izin, '+' || (jumlah_hari - 1) || ' days')
+                 WHERE jumlah_hari >= 1''')
+    c.execute("CREATE INDEX IF NOT EXISTS ix_izin_selesai_mulai ON izin(tanggal_selesai, tanggal_izin)")
+
+
+def _migrasi_indeks_pending(c):
+    # Antrian persetujuan dipaginasi dengan keyset (status = ? AND id > ? ORDER BY id),
+    # jadi halaman berikutnya cukup melompat ke posisi id di indeks ini.
+    c.execute("CREATE INDEX IF NOT EXISTS ix_izin_status_id ON izin(status, id)")
+
+
+def _migrasi_rekap(c):
+    # Rekap hasil agregasi absensi + izin yang diterima, dijaga tetap sinkron oleh
+    # transaksi upload dan persetujuan (lihat _refresh_rekap).
+    c.execute('''CREATE TABLE IF NOT EXISTS rekap_harian (
+                    tanggal TEXT NOT NULL,
+                    divisi TEXT NOT NULL,
+                    hadir INTEGER NOT NULL DEFAULT 0,
+                    telat INTEGER NOT NULL DEFAULT 0,
+                    izin INTEGER NOT NULL DEFAULT 0,
+                    cuti INTEGER NOT NULL DEFAULT 0,
+                    sakit INTEGER NOT NULL DEFAULT 0,
+                    wfh INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (tanggal, divisi)
+                ) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS rekap_bulanan (
+                    bulan TEXT NOT NULL,
+                    nama TEXT NOT NULL,
+                    divisi TEXT NOT NULL,
+                    hadir INTEGER NOT NULL DEFAULT 0,
+                    telat INTEGER NOT NULL DEFAULT 0,
+                    izin INTEGER NOT NULL DEFAULT 0,
+                    cuti INTEGER NOT NULL DEFAULT 0,
+                    sakit INTEGER NOT NULL DEFAULT 0,
+                    wfh INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (bulan, nama)
+                ) WITHOUT ROWID''')
+    return True  # rekap diisi setelah migrasi terakhir (lihat init_db)
+
+
+def _isi_karyawan_id(c):
+    # Backfill: cocokkan nama tanpa membedakan huruf besar/spasi, hanya ke nama karyawan yang unik
+    c.execute("CREATE TEMP TABLE karyawan_nama (kunci TEXT PRIMARY KEY, id INTEGER)")
+    c.execute('''INSERT INTO karyawan_nama
+                 SELECT lower(trim(Nama)), MIN(ID) FROM karyawan WHERE Nama IS NOT NULL
+                 GROUP BY lower(trim(Nama)) HAVING COUNT(*) = 1''')
+    for tabel in ("absensi", "izin"):
+        c.execute(f'''UPDATE {tabel} SET karyawan_id = (SELECT id FROM karyawan_nama WHERE kunci = lower(trim({tabel}.nama)))
+                      WHERE karyawan_id IS NULL''')
+    c.execute("DROP TABLE karyawan_nama")
+
+
+def _migrasi_karyawan_id(c):
+    # absensi dan izin mereferensikan karyawan lewat ID integer; kolom nama/divisi
+    # tetap disimpan untuk tampilan dan untuk nama yang belum terdaftar di karyawan.
+    for tabel in ("absensi", "izin"):
+        existing = {row[1] for row in c.execute(f"PRAGMA table_info({tabel})")}
+        if "karyawan_id" not in existing:
+            c.execute(f"ALTER TABLE {tabel} ADD COLUMN karyawan_id INTEGER REFERENCES karyawan(ID)")
+
+    _isi_karyawan_id(c)
+    c.execute("CREATE INDEX IF NOT EXISTS ix_absensi_karyawan_tanggal ON absensi(karyawan_id, tanggal)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_izin_karyawan ON izin(karyawan_id)")
+
+    # Penghitung versi tabel karyawan (dinaikkan trigger) untuk invalidasi cache di proses
+    c.execute('''CREATE TABLE IF NOT EXISTS versi_data (
+                    nama TEXT PRIMARY KEY,
+                    versi INTEGER NOT NULL DEFAULT 0
+                )''')
+    c.execute("INSERT OR IGNORE INTO versi_data (nama, versi) VALUES ('karyawan', 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_karyawan_{event.lower()} AFTER {event} ON karyawan
+                      BEGIN UPDATE versi_data SET versi = versi + 1 WHERE nama = 'karyawan'; END''')
+
+
+def _migrasi_status_kanonik(c):
+    # Samakan ejaan status absensi dan jenis izin lama ("telat", "IZIN ") ke bentuk kanonik
+    berubah = 0
+    for tabel, kolom, pilihan in (("absensi", "status", STATUS_ABSENSI), ("izin", "jenis_pengajuan", JENIS_PENGAJUAN)):
+        for nilai in pilihan:
+            c.execute(f"UPDATE {tabel} SET {kolom} = ? WHERE lower(trim({kolom})) = lower(?) AND {kolom} IS NOT ?",
+                      (nilai, nilai, nilai))
+            berubah += c.execute("SELECT changes()").fetchone()[0]
+    return berubah > 0
+
+
+def _migrasi_jobs(c):
+    # Antrian pekerjaan latar (jobs.py). `berkas` menyimpan payload seperti file
+    # upload sampai pekerjaan selesai; `checkpoint` (JSON) untuk melanjutkan setelah restart.
+    c.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    jenis TEXT NOT NULL,
+                    params TEXT NOT NULL DEFAULT '{}',
+                    berkas BLOB,
+                    kunci TEXT,
+                    status TEXT NOT NULL DEFAULT 'antri',
+                    progress REAL,
+                    pesan TEXT,
+                    checkpoint TEXT,
+                    hasil TEXT,
+                    percobaan INTEGER NOT NULL DEFAULT 0,
+                    dibuat REAL,
+                    diperbarui REAL,
+                    selesai REAL
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs(status, id)")
+    # Satu pekerjaan aktif per kunci: submit ulang (klik ganda, refresh) mendapat pekerjaan yang sama
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_kunci_aktif ON jobs(kunci) "
+              "WHERE status IN ('antri', 'berjalan')")
+
+
+def _migrasi_lampiran_thumb(c):
+    # Thumbnail lampiran di tabel terpisah: membaca thumbnail tidak menyentuh
+    # halaman overflow BLOB gambar penuh di tabel lampiran.
+    c.execute('''CREATE TABLE IF NOT EXISTS lampiran_thumb (
+                    hash TEXT PRIMARY KEY REFERENCES lampiran(hash),
+                    mime TEXT,
+                    size INTEGER,
+                    data BLOB
+                )''')
+
+
+def _migrasi_versi_data(c):
+    # Penghitung tulisan seluruh data (dinaikkan transaction()) untuk cache hasil baca
+    c.execute("INSERT OR IGNORE INTO versi_data (nama, versi) VALUES ('data', 0)")
+
+
+def _migrasi_tanggal_absensi_ganda(c):
+    # Database yang sudah menjalankan migrasi 2 versi lama (UPDATE OR IGNORE) bisa
+    # masih menyimpan tanggal non-kanonik di samping duplikat kanoniknya.
+    return _normalisasi_tanggal_absensi(c) > 0
+
+
+def _migrasi_hari_izin_dilewati(c):
+    # Pilihan "lewati Sabtu/Minggu" dan tanggal libur saat izin disetujui disimpan di
+    # izin, supaya rekap menghitung hari yang sama dengan baris absensi yang ditulis.
+    existing = {row[1] for row in c.execute("PRAGMA table_info(izin)")}
+    if "lewati_weekend" not in existing:
+        c.execute("ALTER TABLE izin ADD COLUMN lewati_weekend INTEGER NOT NULL DEFAULT 0")
+    if "libur" not in existing:
+        c.execute("ALTER TABLE izin ADD COLUMN libur TEXT")  # JSON list tanggal ISO, NULL = tidak ada
+
+    # Izin lama yang disetujui dengan lewati_weekend dikenali dari absensinya: tidak ada
+    # satu pun baris absensi pada hari Sabtu/Minggu di rentangnya. Tanggal libur tidak
+    # bisa ditebak dan tetap dihitung.
+    c.execute('''
+        WITH RECURSIVE hari(id, nama, tanggal, sisa) AS (
+            SELECT id, nama, date(tanggal_izin), jumlah_hari - 1 FROM izin
+            WHERE status = ? AND date(tanggal_izin) IS NOT NULL AND jumlah_hari >= 1
+            UNION ALL
+            SELECT id, nama, date(tanggal, '+1 day'), sisa - 1 FROM hari WHERE sisa > 0
+        )
+        UPDATE izin SET lewati_weekend = 1 WHERE id IN (
+            SELECT h.id FROM hari h WHERE strftime('%w', h.tanggal) IN ('0', '6')
+            GROUP BY h.id
+            HAVING NOT MAX(EXISTS (SELECT 1 FROM absensi a WHERE a.nama = h.nama AND a.tanggal = h.tanggal))
+        )
+    ''', (STATUS_DITERIMA,))
+    return c.execute("SELECT changes()").fetchone()[0] > 0
+
+
+def _migrasi_absensi_per_karyawan(c):
+    # Satu baris absensi per karyawan_id per tanggal, apa pun ejaan namanya ("budi santoso "
+    # dari izin vs "Budi Santoso" dari mesin absen). Kunci nama hanya untuk baris tanpa ID.
+    # Baris yang masih tanpa ID dicocokkan lagi lewat nama, lalu duplikat dibuang
+    # (rekaman kehadiran menang atas baris izin, lihat _buang_absensi_ganda).
+    _isi_karyawan_id(c)
+    _buang_absensi_ganda(c, "karyawan_id, tanggal", where="karyawan_id IS NOT NULL")
+    for indeks in ("ix_absensi_karyawan_tanggal", "ux_absensi_karyawan_tanggal", "ux_absensi_nama_tanggal"):
+        c.execute(f"DROP INDEX IF EXISTS {indeks}")
+    c.execute("CREATE UNIQUE INDEX ux_absensi_karyawan_tanggal ON absensi(karyawan_id, tanggal) "
+              "WHERE karyawan_id IS NOT NULL")
+    c.execute("CREATE UNIQUE INDEX ux_absensi_nama_tanggal ON absensi(nama, tanggal) WHERE karyawan_id IS NULL")
+
+    # rekap_bulanan dikunci per karyawan: 'id:<karyawan_id>', atau 'nama:<nama>' bila tanpa ID
+    c.execute("DROP TABLE IF EXISTS rekap_bulanan")
+    c.execute('''CREATE TABLE rekap_bulanan (
+                    bulan TEXT NOT NULL,
+                    kunci TEXT NOT NULL,
+                    karyawan_id INTEGER,
+                    nama TEXT NOT NULL,
+                    divisi TEXT NOT NULL,
+                    hadir INTEGER NOT NULL DEFAULT 0,
+                    telat INTEGER NOT NULL DEFAULT 0,
+                    izin INTEGER NOT NULL DEFAULT 0,
+                    cuti INTEGER NOT NULL DEFAULT 0,
+                    sakit INTEGER NOT NULL DEFAULT 0,
+                    wfh INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (bulan, kunci)
+                ) WITHOUT ROWID''')
+    return True  # rekap_bulanan diisi ulang setelah migrasi terakhir (lihat init_db)
+
+
+def _migrasi_absensi_impor(c):
+    # Chunk file upload disimpan di sini sampai seluruh file terbaca, lalu
+    # dipublikasikan ke absensi dalam satu transaksi (lihat publish_absensi)
+    c.execute('''CREATE TABLE IF NOT EXISTS absensi_impor (
+                    impor TEXT NOT NULL,
+                    baris INTEGER NOT NULL,
+                    nama TEXT,
+                    divisi TEXT,
+                    tanggal TEXT,
+                    jam_masuk TEXT,
+                    jam_keluar TEXT,
+                    status TEXT,
+                    karyawan_id INTEGER
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS ix_absensi_impor ON absensi_impor(impor, baris)")
+
+
+
+def _migrasi_divisi_rekap(c):
+    # Rekap kini mengambil divisi karyawan terdaftar dari tabel karyawan (_DIVISI_REKAP);
+    # rekap lama yang terpecah per ejaan divisi dibangun ulang setelah migrasi terakhir
+    return True
+
+
+MIGRATIONS = [
+    (1, "skema dasar izin, absensi, karyawan", _migrasi_skema_dasar),
+    (2, "normalisasi tanggal ISO dan indeks query utama", _migrasi_tanggal_dan_indeks),
+    (3, "pindahkan file izin ke tabel lampiran", _migrasi_lampiran),
+    (4, "kolom tanggal_selesai izin dan indeks interval", _migrasi_tanggal_selesai),
+    (5, "indeks keyset antrian izin pending", _migrasi_indeks_pending),
+    (6, "tabel rekap harian per divisi dan bulanan per karyawan", _migrasi_rekap),
+    (7, "foreign key karyawan_id pada absensi dan izin", _migrasi_karyawan_id),
+    (8, "ejaan kanonik status absensi dan jenis izin", _migrasi_status_kanonik),
+    (9, "tabel antrian pekerjaan latar", _migrasi_jobs),
+    (10, "thumbnail lampiran", _migrasi_lampiran_thumb),
+    (11, "versi data untuk cache hasil baca", _migrasi_versi_data),
+    (12, "buang absensi ganda bertanggal non-kanonik", _migrasi_tanggal_absensi_ganda),
+    (13, "simpan hari izin yang dilewati saat persetujuan", _migrasi_hari_izin_dilewati),
+    (14, "absensi dan rekap bulanan unik per karyawan_id", _migrasi_absensi_per_karyawan),
+    (15, "tabel staging import absensi bertahap", _migrasi_absensi_impor),
+    (16, "divisi rekap dari tabel karyawan", _migrasi_divisi_rekap),
+]
+
+
+def init_db(path=None):
+    '''Terapkan semua migrasi yang belum tercatat di schema_version.'''
+    # Tanpa catat_versi: tabel versi_data sendiri baru dibuat oleh migrasi
+    with transaction(path, catat_versi=False) as c:
+        c.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        description TEXT,
+                        applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    )''')
+    rekap_basi = False
+    for version, description, migrate in MIGRATIONS:
+        # Satu transaksi per migrasi; versi dicek ulang di dalam transaksi supaya
+        # proses lain yang start bersamaan tidak menerapkan migrasi yang sama dua kali.
+        with transaction(path, catat_versi=False) as c:
+            if c.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                continue
+            rekap_basi = bool(migrate(c)) or rekap_basi
+            c.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+    if rekap_basi:
+        with transaction(path, catat_versi=False) as c:
+            _refresh_rekap(c, REKAP_AWAL, REKAP_AKHIR)
+
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def ensure_db(path=None):
+    """
+    Jalankan init_db sekali per proses untuk setiap path. Dipanggil di setiap
+    rerun Streamlit; setelah panggilan pertama tidak ada query skema lagi.
+    """
+    path = path or DB_PATH
+    if path in _initialized:
+        return
+    with _init_lock:
+        if path not in _initialized:
+            init_db(path)
+            _initialized.add(path)
+
+
+def month_range(year, month):
+    """Batas [awal, awal bulan berikutnya) dalam format ISO untuk predikat rentang tanggal."""
+    start = f"{year}-{month:02d}-01"
+    end = f"{year + 1}-01-01" if month == 12 else f"{year}-{month + 1:02d}-01"
+    return start, end
+
+
+def izin_end_date(tanggal_izin, jumlah_hari):
+    """Tanggal terakhir (inklusif) sebuah izin dalam format ISO, atau None bila datanya tidak valid."""
+    try:
+        start = date.fromisoformat(str(tanggal_izin))
+        days = int(jumlah_hari)
+    except (TypeError, ValueError):
+        return None
+    if days < 1:
+        return None
+    return (start + timedelta(days=days - 1)).isoformat()
+
+
+def month_grid_range(year, month):
+    """
+    Rentang [awal, akhir) tampilan bulan FullCalendar: 6 minggu penuh mulai hari
+    Minggu sebelum (atau pada) tanggal 1, termasuk hari "padding" bulan tetangga.
+    """
+    first = date(year, month, 1)
+    start = first - timedelta(days=(first.weekday() + 1) % 7)
+    return start.isoformat(), (start + timedelta(days=42)).isoformat()
+
+
+# --- Karyawan ---
+#
+# Tabel karyawan kecil dan jarang berubah, tetapi dibaca di setiap upload dan
+# pengajuan izin. Isinya di-cache per proses bersama versi dari versi_data
+# (dinaikkan trigger setiap INSERT/UPDATE/DELETE karyawan); cache dibaca ulang
+# hanya bila versinya berbeda.
+
+_karyawan_cache = {}  # path -> (versi, dict df/mapping/ids/by_name)
+_karyawan_lock = threading.Lock()
+
+
+def nama_kunci(nama):
+    """Normalisasi nama untuk pencocokan ke karyawan (Series): tanpa spasi tepi, huruf kecil."""
+    return nama.astype("string").str.strip().str.lower()
+
+
+def _karyawan(path=None):
+    path = path or DB_PATH
+    with connect(path) as conn:
+        versi = conn.execute("SELECT versi FROM versi_data WHERE nama = 'karyawan'").fetchone()[0]
+        cached = _karyawan_cache.get(path)
+        if cached and cached[0] == versi:
+            return cached[1]
+        df = with_retry(pd.read_sql_query, "SELECT ID, Nama, Divisi FROM karyawan ORDER BY ID", conn)
+    # Nama ganda tidak bisa dipetakan dengan pasti, jadi tidak ikut by_name
+    kunci = nama_kunci(df["Nama"])
+    unik = df[kunci.notna() & ~kunci.duplicated(keep=False)]
+    data = {
+        "df": df,
+        "mapping": df.set_index("ID")["Divisi"].to_dict(),
+        "ids": set(df["ID"].tolist()),
+        "by_name": dict(zip(nama_kunci(unik["Nama"]), unik["ID"])),
+    }
+    # Bila karyawan berubah di antara dua query di atas, versi yang disimpan lebih
+    # lama dari isinya sehingga panggilan berikutnya membaca ulang.
+    with _karyawan_lock:
+        _karyawan_cache[path] = (versi, data)
+    return data
+
+
+@metrics.instrument
+def load_karyawan(path=None):
+    """Tabel karyawan [ID, Nama, Divisi] dari cache proses."""
+    return _karyawan(path)["df"]
+
+
+@metrics.instrument
+def get_karyawan_mapping(path=None):
+    """Mapping ID karyawan -> divisi dari tabel karyawan (cache proses)."""
+    return _karyawan(path)["mapping"]
+
+
+def resolve_karyawan_id(nama, karyawan_id=None, path=None):
+    """
+    ID karyawan (Series Int64) untuk setiap baris: `karyawan_id` bila terdaftar
+    di tabel karyawan, selain itu dicocokkan lewat nama. Tidak cocok -> <NA>.
+    """
+    data = _karyawan(path)
+    nama = pd.Series(nama)
+    hasil = pd.Series(pd.NA, index=nama.index, dtype="Int64")
+    if karyawan_id is not None:
+        kandidat = pd.to_numeric(pd.Series(karyawan_id, index=nama.index), errors="coerce").astype("Float64")
+        dikenal = kandidat.isin(list(data["ids"]))
+        hasil[dikenal] = kandidat[dikenal].astype("Int64")
+    kosong = hasil.isna()
+    if kosong.any():
+        hasil[kosong] = nama_kunci(nama[kosong]).map(data["by_name"]).astype("Int64")
+    return hasil
+
+
+# --- DataFrame bertipe ---
+#
+# Hasil baca absensi/izin dikembalikan dengan tipe kolom yang ringkas: tanggal
+# sebagai datetime64, jam sebagai menit sejak tengah malam (Int16), dan teks
+# berulang (nama, divisi, status, jenis) sebagai category. Halaman tidak perlu
+# mem-parse ulang string, dan satu tahun absensi muat dalam sebagian kecil memori
+# versi object. Status disimpan dengan ejaan kanonik sehingga cukup dibandingkan
+# dengan ==, tanpa .str.lower().
+
+# Status absensi yang berasal dari izin (bukan rekaman kehadiran)
+STATUS_ABSENSI_IZIN = ("Izin", "Cuti", "Sakit", "WFH")
+STATUS_ABSENSI = ("Tepat Waktu", "Telat", "Invalid Time", "No Data") + STATUS_ABSENSI_IZIN
+JENIS_PENGAJUAN = STATUS_ABSENSI_IZIN
+
+_KOLOM_TANGGAL = ("tanggal", "tanggal_pengajuan", "tanggal_izin", "tanggal_selesai")
+_KOLOM_JAM = ("jam_masuk", "jam_keluar")
+_KOLOM_KATEGORI = ("nama", "divisi", "status", "jenis_pengajuan")
+TYPED_CHUNK_ROWS = 50_000
+
+
+def kanonik(nilai, pilihan):
+    """
+    Samakan ejaan Series teks ke `pilihan` tanpa membedakan huruf besar/spasi
+    ("telat " -> "Telat"). Nilai di luar pilihan hanya di-strip.
+    """
+    nilai = pd.Series(nilai, dtype=object)
+    peta = {p.lower(): p for p in pilihan}
+    kode, unik = pd.factorize(nilai)
+    hasil = [peta.get(v.strip().lower(), v.strip()) if isinstance(v, str) else v for v in unik]
+    return pd.Series(np.array(hasil + [None], dtype=object)[kode], index=nilai.index)
+
+
+def _tanggal(nilai):
+    # Tanggal ISO hanya punya sedikit nilai unik; parse sekali per nilai unik
+    kode, unik = pd.factorize(nilai)
+    parsed = pd.to_datetime(pd.Index(unik, dtype=object), format="%Y-%m-%d", errors="coerce").to_numpy()
+    return np.append(parsed, np.datetime64("NaT"))[kode]
+
+
+def _menit(nilai):
+    return presensi.menit_sejak_tengah_malam(nilai).round().astype("Int16")
+
+
+def jam_teks(menit):
+    """Kebalikan kolom jam bertipe: menit (Int16) -> "HH:MM", kosong -> ""."""
+    kode, unik = pd.factorize(menit)
+    teks = [f"{int(v) // 60:02d}:{int(v) % 60:02d}" for v in unik] + [""]
+    return pd.Series(np.array(teks, dtype=object)[kode], index=menit.index)
+
+
+def typed_frame(df):
+    """Ubah kolom hasil baca absensi/izin ke tipe ringkas (lihat komentar bagian ini)."""
+    kolom = {}
+    for col, nilai in df.items():
+        if col in _KOLOM_TANGGAL:
+            kolom[col] = _tanggal(nilai)
+        elif col in _KOLOM_JAM:
+            kolom[col] = _menit(nilai)
+        elif col in _KOLOM_KATEGORI:
+            kolom[col] = pd.Categorical(nilai)
+        elif col in ("jumlah_hari", "karyawan_id"):
+            kolom[col] = pd.array(nilai, dtype="Int32")
+        else:
+            kolom[col] = nilai
+    return pd.DataFrame(kolom, index=df.index, copy=False)
+
+
+def _concat_typed(parts):
+    if len(parts) == 1:
+        return parts[0]
+    # pd.concat mengubah category dengan kategori berbeda menjadi object
+    kategori = [c for c in parts[0].columns if isinstance(parts[0][c].dtype, pd.CategoricalDtype)]
+    df = pd.concat([p.drop(columns=kategori) for p in parts], ignore_index=True)
+    for col in kategori:
+        df[col] = union_categoricals([p[col] for p in parts])
+    return df[parts[0].columns]
+
+
+def read_typed(query, params=(), path=None, chunk_rows=TYPED_CHUNK_ROWS):
+    """
+    Seperti read_sql, tetapi hasilnya dibaca per chunk dan langsung diubah dengan
+    typed_frame, sehingga frame object penuh tidak pernah ada di memori.
+    """
+    def baca(conn):
+        return [typed_frame(chunk) for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunk_rows)]
+
+    with metrics.timed("sql", detail=" ".join(query.split())[:200]) as t, connect(path) as conn:
+        return t.set_result(_concat_typed(with_retry(baca, conn)))
+
+
+# --- Ingest absensi ---
+
+ABSENSI_COLUMNS = ["nama", "divisi", "tanggal", "jam_masuk", "jam_keluar", "status"]
+INGEST_BATCH_SIZE = 5000
+
+
+def _absensi_rows(df, path=None):
+    values = df[ABSENSI_COLUMNS].astype(object)
+    # Frame bertipe (hasil load_absensi) dikembalikan ke representasi teks tabel
+    if pd.api.types.is_datetime64_any_dtype(df["tanggal"]):
+        values["tanggal"] = df["tanggal"].dt.strftime("%Y-%m-%d").astype(object)
+    for col in _KOLOM_JAM:
+        if pd.api.types.is_integer_dtype(df[col]):
+            values[col] = jam_teks(df[col])
+    values["status"] = kanonik(df["status"], STATUS_ABSENSI)
+    values["karyawan_id"] = resolve_karyawan_id(df["nama"], df.get("karyawan_id"), path).astype(object)
+    values = values.where(values.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+# Kunci unik absensi (lihat migrasi 14): karyawan_id + tanggal bila ID diketahui,
+# nama + tanggal hanya untuk baris tanpa ID. Setiap pasangan (predikat baris, kolom
+# kunci) dipakai sebagai filter SELECT sekaligus target ON CONFLICT indeks parsialnya.
+_KUNCI_ABSENSI = (
+    ("karyawan_id IS NOT NULL", "karyawan_id, tanggal"),
+    ("karyawan_id IS NULL", "nama, tanggal"),
+)
+
+
+def _absensi_changed(old, new):
+    cols = [col for col in ABSENSI_COLUMNS if col != "tanggal"] + ["karyawan_id"]
+    return " OR ".join(f"{old}.{col} IS NOT {new}.{col}" for col in cols)
+
+
+def _staging(conn):
+    """Tabel sementara staging_absensi (kosong) di koneksi transaksi pemanggil."""
+    # Afinitas tipe sama dengan tabel absensi (perbandingan unchanged akurat)
+    staging_cols = ", ".join(f"{col} TEXT" for col in ABSENSI_COLUMNS)
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS staging_absensi ({staging_cols}, karyawan_id INTEGER)")
+    conn.execute("DELETE FROM staging_absensi")
+
+
+def _upsert_staging(conn):
+    """Upsert isi staging_absensi ke absensi, perbarui rekap bulannya, lalu kosongkan staging."""
+    cols = ", ".join(ABSENSI_COLUMNS + ["karyawan_id"])
+    # Baris lama tanpa ID (disimpan sebelum namanya terdaftar) yang kini punya ID di
+    # upload ikut dihitung sebagai baris yang diperbarui, dan diganti di bawah
+    changed = _absensi_changed("a", "s")
+    inserted, updated, unchanged = conn.execute(f'''
+        SELECT
+            SUM(a.id IS NULL),
+            SUM(a.id IS NOT NULL AND ({changed})),
+            SUM(a.id IS NOT NULL AND NOT ({changed}))
+        FROM staging_absensi s
+        LEFT JOIN absensi a ON a.id = COALESCE(
+            (SELECT id FROM absensi WHERE karyawan_id = s.karyawan_id AND tanggal = s.tanggal),
+            (SELECT id FROM absensi WHERE karyawan_id IS NULL AND nama = s.nama AND tanggal = s.tanggal))
+    ''').fetchone()
+
+    # Dijalankan dari staging supaya setiap baris cukup satu lookup di indeks nama parsial
+    conn.execute('''
+        DELETE FROM absensi WHERE id IN (
+            SELECT a.id FROM staging_absensi s
+            JOIN absensi a ON a.karyawan_id IS NULL AND a.nama = s.nama AND a.tanggal = s.tanggal
+            WHERE s.karyawan_id IS NOT NULL)
+    ''')
+    for predikat, kunci in _KUNCI_ABSENSI:
+        conn.execute(f'''
+            INSERT INTO absensi ({cols})
+            SELECT {cols} FROM staging_absensi WHERE {predikat}
+            ON CONFLICT({kunci}) WHERE {predikat} DO UPDATE SET
+                nama = excluded.nama,
+                divisi = excluded.divisi,
+                jam_masuk = excluded.jam_masuk,
+                jam_keluar = excluded.jam_keluar,
+                status = excluded.status,
+                karyawan_id = excluded.karyawan_id
+            WHERE {_absensi_changed("absensi", "excluded")}
+        ''')
+    _refresh_rekap_bulan(conn, [row[0] for row in conn.execute(
+        "SELECT DISTINCT substr(tanggal, 1, 7) FROM staging_absensi WHERE date(tanggal) IS NOT NULL")])
+    conn.execute("DELETE FROM staging_absensi")
+    return {"inserted": inserted or 0, "updated": updated or 0, "unchanged": unchanged or 0}
+
+
+@metrics.instrument
+def save_absensi_to_db(df, path=None):
+    """
+    Simpan data absensi bulanan secara massal dalam satu transaksi.
+
+    Baris di-stage ke tabel sementara dengan executemany, lalu di-upsert ke
+    `absensi` berdasarkan (karyawan_id, tanggal), atau (nama, tanggal) untuk baris
+    tanpa ID. karyawan_id diambil dari kolom `karyawan_id` bila ada, atau dicocokkan
+    lewat nama (resolve_karyawan_id); status disimpan dengan ejaan kanonik. Frame
+    teks maupun bertipe diterima. Upload ulang bulan yang sama tidak menggandakan
+    data. Mengembalikan jumlah baris inserted/updated/unchanged.
+    """
+    rows = _absensi_rows(df, path)
+    with transaction(path) as conn:
+        _staging(conn)
+        for start in range(0, len(rows), INGEST_BATCH_SIZE):
+            conn.executemany(
+                "INSERT INTO staging_absensi VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows[start:start + INGEST_BATCH_SIZE],
+            )
+        hasil = _upsert_staging(conn)
+    return hasil
+
+
+# --- Import absensi bertahap ---
+#
+# File besar (ingest.ingest_excel) ditulis chunk demi chunk ke absensi_impor dengan
+# transaksi pendek, lalu seluruhnya dipublikasikan ke absensi dalam satu transaksi
+# setelah file terbaca sampai habis. Import yang gagal di tengah file tidak
+# meninggalkan bulan yang setengah tertulis.
+
+@metrics.instrument
+def stage_absensi(df, impor, baris, path=None):
+    """
+    Tambahkan baris absensi `df` ke import `impor` tanpa menyentuh tabel absensi.
+    `baris` adalah posisi sheet akhir chunk, dipakai buang_impor saat melanjutkan.
+    """
+    rows = [(impor, int(baris), *row) for row in _absensi_rows(df, path)]
+    with transaction(path, catat_versi=False) as conn:
+        for start in range(0, len(rows), INGEST_BATCH_SIZE):
+            conn.executemany(
+                "INSERT INTO absensi_impor VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows[start:start + INGEST_BATCH_SIZE],
+            )
+
+
+@metrics.instrument
+def publish_absensi(impor, path=None):
+    """
+    Upsert semua baris import `impor` ke absensi dalam satu transaksi (seperti
+    save_absensi_to_db), lalu hapus dari absensi_impor. Mengembalikan jumlah baris
+    inserted/updated/unchanged.
+    """
+    cols = ", ".join(ABSENSI_COLUMNS + ["karyawan_id"])
+    with transaction(path) as conn:
+        _staging(conn)
+        conn.execute(f"INSERT INTO staging_absensi SELECT {cols} FROM absensi_impor WHERE impor = ? ORDER BY rowid",
+                     (impor,))
+        hasil = _upsert_staging(conn)
+        conn.execute("DELETE FROM absensi_impor WHERE impor = ?", (impor,))
+    return hasil
+
+
+def buang_impor(impor, setelah_baris=0, path=None):
+    """Hapus chunk import `impor` yang berakhir setelah baris `setelah_baris` (default: semuanya)."""
+    execute("DELETE FROM absensi_impor WHERE impor = ? AND baris > ?", (impor, int(setelah_baris)),
+            path=path, catat_versi=False)
+
+
+@metrics.instrument
+@cached
+def load_absensi(start, end, path=None):
+    """Baris absensi bertipe dengan tanggal di [start, end) (predikat rentang pada indeks tanggal)."""
+    return read_typed("SELECT * FROM absensi WHERE tanggal >= ? AND tanggal < ?", params=(start, end), path=path)
+
+
+@metrics.instrument
+def load_absensi_month(year, month, path=None):
+    """Semua baris absensi satu bulan (bertipe, lihat typed_frame)."""
+    return load_absensi(*month_range(year, month), path=path)
+
+
+ABSENSI_PAGE_SIZE = 500
+
+
+def _where_absensi(start, end, kecuali_status):
+    # Rentang tanggal lalu status: keduanya terjawab dari indeks (tanggal, status)
+    where = "WHERE tanggal >= ? AND tanggal < ?"
+    if kecuali_status:
+        where += f" AND status NOT IN ({', '.join('?' * len(kecuali_status))})"
+    return where, (start, end, *kecuali_status)
+
+
+@metrics.instrument
+@cached
+def count_absensi(start, end, kecuali_status=STATUS_ABSENSI_IZIN, path=None):
+    """Jumlah baris absensi di [start, end) yang statusnya bukan `kecuali_status`."""
+    where, params = _where_absensi(start, end, tuple(kecuali_status))
+    with connect(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM absensi {where}", params).fetchone()[0]
+
+
+@metrics.instrument
+@cached
+def query_absensi(start, end, kecuali_status=STATUS_ABSENSI_IZIN, limit=ABSENSI_PAGE_SIZE, offset=0, path=None):
+    """
+    Satu halaman absensi bertipe di [start, end) tanpa status `kecuali_status`
+    (default: status yang berasal dari izin), urut tanggal lalu nama.
+    Mengembalikan (DataFrame, total baris yang cocok).
+    """
+    kecuali_status = tuple(kecuali_status)
+    total = count_absensi(start, end, kecuali_status, path=path)
+    where, params = _where_absensi(start, end, kecuali_status)
+    df = read_typed(f"SELECT * FROM absensi {where} ORDER BY tanggal, nama, id LIMIT ? OFFSET ?",
+                    params=(*params, int(limit), int(offset)), path=path)
+    return df, total
+
+
+# --- Ringkasan izin ---
+
+STATUS_PENDING = "Pending"
+STATUS_DITERIMA = "Pengajuan izin telah diterima"
+STATUS_DITOLAK = "Pengajuan izin ditolak"
+
+# Kolom izin tanpa metadata lampiran, untuk tabel/daftar yang tidak butuh file
+IZIN_COLUMNS = ["id", "nama", "divisi", "jenis_pengajuan", "tanggal_pengajuan",
+                "tanggal_izin", "jumlah_hari", "tanggal_selesai", "status"]
+
+# Dimensi yang boleh dipakai count_izin_by (nama -> ekspresi SQL)
+IZIN_DIMENSI = {
+    "jenis_pengajuan": "jenis_pengajuan",
+    "status": "status",
+    "divisi": "divisi",
+    "bulan": "substr(tanggal_izin, 1, 7)",
+}
+
+
+@metrics.instrument
+@cached
+def count_izin_by(dimensi, status=None, path=None):
+    """
+    Hitung jumlah pengajuan izin per dimensi ("jenis_pengajuan", "status",
+    "divisi" atau "bulan" = YYYY-MM dari tanggal_izin) dengan GROUP BY di SQL.
+    Mengembalikan DataFrame [dimensi, Jumlah].
+    """
+    expr = IZIN_DIMENSI[dimensi]
+    where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+    return read_sql(
+        f"SELECT {expr} AS {dimensi}, COUNT(*) AS Jumlah FROM izin {where} GROUP BY 1 ORDER BY 1",
+        params=params,
+        path=path,
+    )
+
+
+# --- Pengajuan izin ---
+
+@metrics.instrument
+def save_izin(nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin, jumlah_hari,
+              file_pengajuan_bytes=None, file_persetujuan_bytes=None, karyawan_id=None, path=None):
+    """
+    Simpan pengajuan izin baru (status pending) beserta lampirannya dalam satu transaksi.
+    Gambar dinormalisasi dan dibuatkan thumbnail (attachments.siapkan) sebelum
+    transaksi dibuka. Tanpa `karyawan_id`, ID karyawan dicocokkan lewat nama.
+    """
+    import attachments  # attachments mengimpor db
+
+    file_pengajuan = attachments.siapkan(file_pengajuan_bytes) or {}
+    file_persetujuan = attachments.siapkan(file_persetujuan_bytes) or {}
+
+    tanggal_selesai = izin_end_date(tanggal_izin, jumlah_hari)
+    jenis_pengajuan = kanonik([jenis_pengajuan], JENIS_PENGAJUAN)[0]
+    karyawan_id = resolve_karyawan_id([nama], [karyawan_id], path)[0]
+    karyawan_id = None if pd.isna(karyawan_id) else int(karyawan_id)
+    with transaction(path) as c:
+        # File disimpan di tabel lampiran; izin hanya menyimpan referensi + metadata
+        pengajuan = attachments.put(c, file_pengajuan.get("data"), file_pengajuan.get("thumb")) or {}
+        persetujuan = attachments.put(c, file_persetujuan.get("data"), file_persetujuan.get("thumb")) or {}
+
+        c.execute('''INSERT INTO izin (karyawan_id, nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin, jumlah_hari, tanggal_selesai,
+                                      file_pengajuan_ref, file_pengajuan_size, file_pengajuan_mime,
+                                      file_persetujuan_ref, file_persetujuan_size, file_persetujuan_mime, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                  (karyawan_id, nama, divisi, jenis_pengajuan, tanggal_pengajuan, tanggal_izin, jumlah_hari, tanggal_selesai,
+                   pengajuan.get("ref"), pengajuan.get("size"), pengajuan.get("mime"),
+                   persetujuan.get("ref"), persetujuan.get("size"), persetujuan.get("mime"), STATUS_PENDING))
+        return c.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+
+PENDING_PAGE_SIZE = 25
+
+
+@metrics.instrument
+@cached
+def load_izin_pending(after_id=0, limit=PENDING_PAGE_SIZE, path=None):
+    """
+    Satu halaman izin pending berurutan id, dimulai setelah `after_id` (keyset).
+    Hanya referensi lampiran yang ikut dibaca, bukan byte filenya.
+    """
+    cols = ", ".join(IZIN_COLUMNS + ["file_pengajuan_ref", "file_persetujuan_ref"])
+    return read_typed(
+        f"SELECT {cols} FROM izin WHERE status = ? AND id > ? ORDER BY id LIMIT ?",
+        params=(STATUS_PENDING, int(after_id or 0), int(limit)),
+        path=path,
+    )
+
+
+REPORT_PAGE_SIZE = 50
+
+# Kolom yang boleh dipakai untuk mengurutkan laporan izin
+IZIN_SORT = ["tanggal_izin", "tanggal_pengajuan", "id", "nama", "divisi", "jenis_pengajuan", "jumlah_hari"]
+
+
+@metrics.instrument
+@cached
+def query_izin(status=None, jenis=None, start=None, end=None, order_by="tanggal_izin", descending=True,
+               limit=REPORT_PAGE_SIZE, offset=0, path=None):
+    """
+    Satu halaman laporan izin (LIMIT/OFFSET) beserta total baris yang cocok.
+    Filter opsional: status, jenis pengajuan, dan rentang tanggal_izin [start, end].
+    Mengembalikan (DataFrame IZIN_COLUMNS + referensi lampiran, total).
+    """
+    if order_by not in IZIN_SORT:
+        raise ValueError(f"Kolom urut tidak dikenal: {order_by}")
+    clauses, params = [], []
+    for cond, value in (("status = ?", status), ("jenis_pengajuan = ?", jenis),
+                        ("tanggal_izin >= ?", start), ("tanggal_izin <= ?", end)):
+        if value:
+            clauses.append(cond)
+            params.append(str(value))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    arah = "DESC" if descending else "ASC"
+
+    with connect(path) as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM izin {where}", params).fetchone()[0]
+    cols = ", ".join(IZIN_COLUMNS + ["file_pengajuan_ref", "file_persetujuan_ref"])
+    df = read_typed(
+        f"SELECT {cols} FROM izin {where} ORDER BY {order_by} {arah}, id {arah} LIMIT ? OFFSET ?",
+        params=(*params, int(limit), int(offset)),
+        path=path,
+    )
+    return df, total
+
+
+@metrics.instrument
+@cached
+def count_izin_pending(path=None):
+    with connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM izin WHERE status = ?", (STATUS_PENDING,)).fetchone()[0]
+
+
+@metrics.instrument
+def set_izin_status(ids, status, path=None):
+    """
+    Ubah status sekumpulan izin yang masih pending dalam satu transaksi.
+    Mengembalikan list id yang benar-benar berubah (izin yang sudah diproses
+    admin lain dilewati).
+    """
+    changed = []
+    with transaction(path) as c:
+        for izin_id in ids:
+            cur = c.execute("UPDATE izin SET status = ? WHERE id = ? AND status = ?",
+                            (status, int(izin_id), STATUS_PENDING))
+            if cur.rowcount:
+                changed.append(int(izin_id))
+        if status == STATUS_DITERIMA and changed:
+            _tambah_rekap_izin(c, changed)
+    return changed
+
+
+@metrics.instrument
+def approve_izin(ids, skip_weekend=False, libur=(), path=None):
+    """
+    Setujui sekumpulan izin pending dalam satu transaksi: status diubah lalu
+    setiap hari izin dimasukkan ke tabel absensi (status "Izin") dengan satu
+    INSERT berbasis recursive CTE. Bila salah satu langkah gagal, semuanya
+    di-rollback.
+
+    `skip_weekend` melewati Sabtu/Minggu; `libur` berisi tanggal ISO yang juga
+    dilewati. Hari yang sudah punya baris absensi untuk karyawan yang sama (per
+    karyawan_id, atau nama bila tanpa ID) tidak ditimpa. Mengembalikan
+    dict {"disetujui": list id, "hari": jumlah baris absensi baru}.
+    """
+    with transaction(path) as c:
+        c.execute("CREATE TEMP TABLE IF NOT EXISTS izin_disetujui (id INTEGER PRIMARY KEY)")
+        c.execute("DELETE FROM izin_disetujui")
+        c.executemany("INSERT OR IGNORE INTO izin_disetujui VALUES (?)", [(int(i),) for i in ids])
+        # Hanya izin yang masih pending; yang sudah diproses admin lain dilewati
+        c.execute("DELETE FROM izin_disetujui WHERE id NOT IN (SELECT id FROM izin WHERE status = ?)",
+                  (STATUS_PENDING,))
+        disetujui = [row[0] for row in c.execute("SELECT id FROM izin_disetujui ORDER BY id")]
+        # Pilihan hari yang dilewati disimpan di izin, supaya rekap (juga rebuild_rekap)
+        # menghitung hari yang sama dengan baris absensi di bawah
+        libur = json.dumps(sorted({str(t) for t in libur})) if libur else None
+        c.execute("UPDATE izin SET status = ?, lewati_weekend = ?, libur = ? "
+                  "WHERE id IN (SELECT id FROM izin_disetujui)",
+                  (STATUS_DITERIMA, int(bool(skip_weekend)), libur))
+
+        hari = 0
+        for predikat, kunci in _KUNCI_ABSENSI:
+            c.execute(_HARI_IZIN_CTE.format(where="id IN (SELECT id FROM izin_disetujui)") + f'''
+                INSERT INTO absensi (karyawan_id, nama, divisi, tanggal, jam_masuk, jam_keluar, status)
+                SELECT karyawan_id, nama, divisi, tanggal, '', '', 'Izin' FROM hari WHERE {predikat}
+                ON CONFLICT({kunci}) WHERE {predikat} DO NOTHING
+            ''', {"end": REKAP_AKHIR})
+            # cursor.rowcount tidak diisi untuk statement yang diawali WITH
+            hari += c.execute("SELECT changes()").fetchone()[0]
+        _tambah_rekap_izin(c, disetujui)
+        c.execute("DELETE FROM izin_disetujui")
+    return {"disetujui": disetujui, "hari": hari}
+
+
+# --- Rekap absensi ---
+#
+# rekap_harian (per tanggal x divisi) dan rekap_bulanan (per bulan x karyawan)
+# menyimpan jumlah hadir/telat dari absensi dan hari izin/cuti/sakit/WFH dari izin
+# yang diterima. Setiap transaksi tulis menghitung ulang hanya bulan yang
+# disentuhnya, sehingga halaman baca cukup membaca tabel kecil ini.
+
+REKAP_AWAL, REKAP_AKHIR = "0000-01-01", "9999-12-31"
+
+_KOLOM_REKAP = ["hadir", "telat", "izin", "cuti", "sakit", "wfh"]
+
+# Satu baris per hari izin yang berlaku; :where memilih izin yang diekspansi, :end
+# membatasi tanggal. Sabtu/Minggu (lewati_weekend) dan tanggal `libur` yang disimpan
+# saat izin disetujui dilewati, sama seperti baris absensi yang ditulis approve_izin.
+_HARI_IZIN_CTE = '''
+    WITH RECURSIVE hari_izin(karyawan_id, nama, divisi, jenis, tanggal, sisa, lewati_weekend, libur) AS (
+        SELECT karyawan_id, nama, divisi, lower(jenis_pengajuan), date(tanggal_izin), jumlah_hari - 1,
+               lewati_weekend, libur
+        FROM izin
+        WHERE {where} AND date(tanggal_izin) IS NOT NULL AND jumlah_hari >= 1
+        UNION ALL
+        SELECT karyawan_id, nama, divisi, jenis, date(tanggal, '+1 day'), sisa - 1, lewati_weekend, libur
+        FROM hari_izin
+        WHERE sisa > 0 AND date(tanggal, '+1 day') < :end
+    ),
+    hari AS (
+        SELECT karyawan_id, nama, divisi, jenis, tanggal FROM hari_izin
+        WHERE NOT (lewati_weekend AND strftime('%w', tanggal) IN ('0', '6'))
+          AND (libur IS NULL OR tanggal NOT IN (SELECT value FROM json_each(libur)))
+    )
+'''
+
+# Divisi rekap: dari tabel karyawan bila karyawan_id diketahui (teks divisi di absensi/izin
+# diketik bebas, mis. "hr" untuk "HR"), teks yang tersimpan hanya untuk baris tanpa ID.
+# Setelah divisi karyawan diubah, rekap lama diperbarui dengan rebuild_rekap.
+_DIVISI_REKAP = "COALESCE((SELECT Divisi FROM karyawan WHERE ID = karyawan_id), divisi, '')"
+
+_HARI_IZIN_SUMBER = f'''
+    SELECT tanggal, {_DIVISI_REKAP}, karyawan_id, COALESCE(nama, ''), 0, 0,
+           jenis = 'izin', jenis = 'cuti', jenis = 'sakit', jenis = 'wfh'
+    FROM hari WHERE tanggal >= :start
+'''
+
+
+def _rekap_sumber(c):
+    """Temp table berisi satu baris per rekaman kehadiran / hari izin yang akan direkap."""
+    c.execute('''CREATE TEMP TABLE IF NOT EXISTS rekap_sumber (
+                    tanggal TEXT, divisi TEXT, karyawan_id INTEGER, nama TEXT,
+                    hadir INTEGER, telat INTEGER, izin INTEGER, cuti INTEGER, sakit INTEGER, wfh INTEGER
+                )''')
+    c.execute("DELETE FROM rekap_sumber")
+
+
+def _upsert_rekap(c):
+    """Tambahkan isi rekap_sumber ke rekap_harian dan rekap_bulanan (delta)."""
+    jumlah = ", ".join(f"SUM({k})" for k in _KOLOM_REKAP)
+    tambah = ", ".join(f"{k} = {k} + excluded.{k}" for k in _KOLOM_REKAP)
+    c.execute(f'''INSERT INTO rekap_harian
+                  SELECT tanggal, divisi, {jumlah} FROM rekap_sumber WHERE true GROUP BY tanggal, divisi
+                  ON CONFLICT(tanggal, divisi) DO UPDATE SET {tambah}''')
+    # Per karyawan_id; nama hanya menjadi kunci untuk baris tanpa ID
+    c.execute(f'''INSERT INTO rekap_bulanan
+                  SELECT substr(tanggal, 1, 7), COALESCE('id:' || karyawan_id, 'nama:' || nama) AS kunci,
+                         karyawan_id, MAX(nama), MAX(divisi), {jumlah}
+                  FROM rekap_sumber WHERE true GROUP BY substr(tanggal, 1, 7), kunci
+                  ON CONFLICT(bulan, kunci) DO UPDATE SET divisi = max(divisi, excluded.divisi), {tambah}''')
+    c.execute("DELETE FROM rekap_sumber")
+
+
+def _refresh_rekap(c, start, end):
+    """
+    Hitung ulang rekap untuk rentang [start, end) yang berbatas awal bulan, dari
+    absensi (hadir/telat) dan hari izin yang diterima, di transaksi pemanggil.
+    """
+    _rekap_sumber(c)
+    c.execute(_HARI_IZIN_CTE.format(where="status = :diterima AND tanggal_selesai >= :start AND +tanggal_izin < :end") + f'''
+        INSERT INTO rekap_sumber
+        SELECT tanggal, {_DIVISI_REKAP}, karyawan_id, COALESCE(nama, ''), 1, lower(status) = 'telat', 0, 0, 0, 0
+        FROM absensi
+        WHERE tanggal >= :start AND tanggal < :end AND status NOT IN {STATUS_ABSENSI_IZIN}
+        UNION ALL
+    ''' + _HARI_IZIN_SUMBER, {"diterima": STATUS_DITERIMA, "start": start, "end": end})
+    c.execute("DELETE FROM rekap_harian WHERE tanggal >= ? AND tanggal < ?", (start, end))
+    c.execute("DELETE FROM rekap_bulanan WHERE bulan >= ? AND bulan < ?", (start[:7], end[:7]))
+    _upsert_rekap(c)
+
+
+def _refresh_rekap_bulan(c, bulan):
+    """Hitung ulang rekap untuk setiap bulan "YYYY-MM" di `bulan`."""
+    for ym in sorted(bulan):
+        _refresh_rekap(c, *month_range(int(ym[:4]), int(ym[5:7])))
+
+
+def _tambah_rekap_izin(c, ids):
+    """
+    Tambahkan hari izin yang baru diterima (izin dengan id di `ids`) ke rekap
+    sebagai delta, tanpa menghitung ulang bulan yang disentuhnya.
+    """
+    _rekap_sumber(c)
+    c.execute(_HARI_IZIN_CTE.format(where="id IN (SELECT value FROM json_each(:ids))")
+              + "INSERT INTO rekap_sumber " + _HARI_IZIN_SUMBER,
+              {"ids": json.dumps([int(i) for i in ids]), "start": REKAP_AWAL, "end": REKAP_AKHIR})
+    _upsert_rekap(c)
+
+
+@metrics.instrument
+def rebuild_rekap(path=None):
+    """Bangun ulang seluruh tabel rekap dari absensi dan izin (untuk perbaikan)."""
+    with transaction(path) as c:
+        _refresh_rekap(c, REKAP_AWAL, REKAP_AKHIR)
+        return {
+            "rekap_harian": c.execute("SELECT COUNT(*) FROM rekap_harian").fetchone()[0],
+            "rekap_bulanan": c.execute("SELECT COUNT(*) FROM rekap_bulanan").fetchone()[0],
+        }
+
+
+@metrics.instrument
+@cached
+def load_rekap_bulanan(year, month, path=None):
+    """
+    Rekap satu bulan per karyawan: [nama, divisi, hadir, telat, izin, cuti, sakit, wfh].
+    Karyawan terdaftar ditampilkan dengan nama dari tabel karyawan.
+    """
+    return read_sql(
+        "SELECT COALESCE(k.Nama, r.nama) AS nama, r.divisi, hadir, telat, izin, cuti, sakit, wfh "
+        "FROM rekap_bulanan r LEFT JOIN karyawan k ON k.ID = r.karyawan_id "
+        "WHERE bulan = ? ORDER BY r.divisi, nama",
+        params=(f"{year}-{month:02d}",),
+        path=path,
+    )
+
+
+@metrics.instrument
+@cached
+def load_rekap_divisi(start, end, path=None):
+    """Jumlah per divisi dalam rentang tanggal [start, end) dari rekap harian."""
+    return read_sql(
+        "SELECT divisi, SUM(hadir) AS hadir, SUM(telat) AS telat, SUM(izin) AS izin, SUM(cuti) AS cuti, "
+        "SUM(sakit) AS sakit, SUM(wfh) AS wfh FROM rekap_harian "
+        "WHERE tanggal >= ? AND tanggal < ? GROUP BY divisi ORDER BY divisi",
+        params=(start, end),
+        path=path,
+    )
+
+
+# --- Kalender absensi ---
+
+@metrics.instrument
+@cached
+def calendar_counts(start, end, path=None):
+    """
+    Jumlah hadir, telat dan tidak hadir (hari izin/cuti/sakit/WFH yang diterima)
+    per tanggal dalam rentang [start, end), dibaca dari rekap_harian.
+    Mengembalikan DataFrame [tanggal, hadir, telat, tidak_hadir] urut tanggal.
+    """
+    return read_sql('''
+        SELECT tanggal, SUM(hadir) AS hadir, SUM(telat) AS telat,
+               SUM(izin + cuti + sakit + wfh) AS tidak_hadir
+        FROM rekap_harian
+        WHERE tanggal >= ? AND tanggal < ?
+        GROUP BY tanggal
+        ORDER BY tanggal
+    ''', params=(start, end), path=path)
+
+
+def build_calendar_events(counts):
+    """Ubah hasil calendar_counts menjadi event FullCalendar (satu per tanggal)."""
+    titles = ("H:" + counts["hadir"].astype(str) + " T:" + counts["telat"].astype(str)
+              + " TH:" + counts["tidak_hadir"].astype(str))
+    return pd.DataFrame({
+        "title": titles,
+        "start": counts["tanggal"],  # Format hanya tanggal, tanpa waktu
+        "color": "transparent",  # Warna latar belakang transparan
+        "textColor": "black",  # Warna teks tetap hitam
+    }).to_dict("records")
+
+
+# --- Rincian absensi harian ---
+
+@metrics.instrument
+@cached
+def load_izin_aktif(tanggal, path=None):
+    """
+    Izin diterima yang rentangnya mencakup `tanggal` (predikat interval berindeks),
+    sama dengan yang dihitung kalender dari rekap: Sabtu/Minggu izin dengan
+    lewati_weekend dan tanggal `libur`-nya tidak dihitung (lihat _HARI_IZIN_CTE).
+    """
+    cols = ", ".join(IZIN_COLUMNS + ["karyawan_id"])
+    # Unary + mencegah planner memilih indeks tanggal_izin atau status: "tanggal_izin <= X"
+    # dan status diterima mencakup hampir seluruh riwayat, sedangkan "tanggal_selesai >= X"
+    # hanya izin yang masih berjalan. ORDER BY +id: tanpa +, planner memilih scan urut
+    # rowid seluruh tabel demi menghindari sort beberapa baris.
+    return read_typed(
+        f"SELECT {cols} FROM izin WHERE tanggal_selesai >= :tanggal AND +tanggal_izin <= :tanggal "
+        "AND +status = :diterima "
+        "AND NOT (lewati_weekend AND strftime('%w', :tanggal) IN ('0', '6')) "
+        "AND (libur IS NULL OR :tanggal NOT IN (SELECT value FROM json_each(libur))) ORDER BY +id",
+        params={"tanggal": tanggal, "diterima": STATUS_DITERIMA},
+        path=path,
+    )
+
+
+@metrics.instrument
+@cached
+def daily_summary(tanggal, path=None):
+    """
+    Rincian satu tanggal: absensi dan izin masing-masing di-query sekali, lalu
+    hadir (tidak sedang izin), telat dan tidak hadir diturunkan dari hasil yang sama.
+    Karyawan dicocokkan lewat karyawan_id; nama hanya bila salah satu sisi tanpa ID.
+    Mengembalikan dict {"hadir", "telat", "tidak_hadir"} berisi DataFrame.
+    """
+    df_absensi = read_typed("SELECT * FROM absensi WHERE tanggal = ?", params=(tanggal,), path=path)
+    df_absent = load_izin_aktif(tanggal, path=path)
+    tanpa_id = df_absent["karyawan_id"].isna()
+    sedang_izin = (
+        df_absensi["karyawan_id"].isin(df_absent.loc[~tanpa_id, "karyawan_id"])
+        | df_absensi["nama"].isin(df_absent.loc[tanpa_id, "nama"])
+        | (df_absensi["karyawan_id"].isna() & df_absensi["nama"].isin(df_absent["nama"]))
+    )
+    karyawan_hadir = df_absensi[~sedang_izin]
+    return {
+        "hadir": karyawan_hadir,
+        "telat": karyawan_hadir[karyawan_hadir["status"] == "Telat"],
+        "tidak_hadir": df_absent,
+    }
+
+
+# --- Perawatan (CLI) ---
+#
+#     python -m db rebuild-rekap --db absensi.db
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Perawatan database absensi.")
+    parser.add_argument("perintah", choices=["init", "rebuild-rekap"])
+    parser.add_argument("--db", default=None, help=f"path database (default: {DB_PATH})")
+    args = parser.parse_args(argv)
+
+    init_db(args.db)
+    if args.perintah == "rebuild-rekap":
+        start = time.perf_counter()
+        hasil = rebuild_rekap(args.db)
+        print(f"{hasil['rekap_harian']} baris rekap_harian, {hasil['rekap_bulanan']} baris rekap_bulanan "
+              f"dalam {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,237 @@
+"""
+Ingest file presensi Excel ke tabel absensi secara streaming.
+
+Workbook dibaca baris demi baris (openpyxl read-only), dipotong menjadi chunk
+berukuran tetap, setiap chunk ditransformasi dengan presensi.format_presensi_data
+lalu di-stage ke database; absensi baru diubah setelah seluruh file terbaca.
+Puncak memori bergantung pada ukuran chunk, bukan ukuran file.
+
+Modul ini juga bisa dijalankan sebagai CLI untuk mengimpor banyak file
+sekaligus tanpa Streamlit: `python -m ingest <direktori>`.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import db
+import metrics
+import presensi
+
+CHUNK_ROWS = 2000
+
+
+def iter_excel_chunks(file, chunk_rows=CHUNK_ROWS, sheet=None):
+    """
+    Baca sheet presensi (default: sheet pertama) dan yield tuple
+    (chunk DataFrame format lebar, jumlah baris terbaca, total baris atau None).
+
+    Chunk hanya dipotong saat ID karyawan berganti, sehingga baris Datang/Pulang
+    satu karyawan selalu berada di chunk yang sama. Baris satu karyawan harus
+    berurutan; bila ID yang sudah diproses muncul lagi, ValueError dilempar.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.worksheets[0]
+        total = ws.max_row
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = list(header)
+        width = len(header)
+        id_idx = header.index("ID") if "ID" in header else None
+
+        buffer, buffer_ids, flushed = [], set(), set()
+        last_id = object()
+        read = 1
+        for row in rows:
+            read += 1
+            if all(v is None for v in row):
+                continue
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            row_id = row[id_idx] if id_idx is not None else None
+            if len(buffer) >= chunk_rows and row_id != last_id:
+                yield pd.DataFrame(buffer, columns=header), read - 1, total
+                flushed |= buffer_ids
+                buffer, buffer_ids = [], set()
+            if row_id in flushed:
+                raise ValueError(f"Baris karyawan ID {row_id} tidak berurutan; urutkan file berdasarkan ID.")
+            buffer.append(row)
+            buffer_ids.add(row_id)
+            last_id = row_id
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header), read, total
+    finally:
+        wb.close()
+
+
+@metrics.instrument
+def ingest_excel(file, year, month, mapping, chunk_rows=CHUNK_ROWS, progress=None, path=None,
+                 impor=None, lewati_baris=0):
+    """
+    Transformasi file presensi bulanan chunk demi chunk, lalu simpan sekaligus.
+
+    Setiap chunk di-stage ke absensi_impor dengan transaksi pendek (db.stage_absensi);
+    setelah seluruh file terbaca, semuanya di-upsert ke absensi dalam satu transaksi
+    (db.publish_absensi). Bila file gagal di tengah (mis. ID tidak berurutan), chunk
+    yang sudah di-stage dibuang dan absensi tidak berubah. Mengembalikan total
+    inserted/updated/unchanged.
+
+    `progress(fraksi, baris)` dipanggil setelah setiap chunk di-stage (fraksi None
+    bila total baris tidak diketahui). Untuk melanjutkan import yang terputus,
+    panggil ulang dengan `impor` yang sama dan `lewati_baris` = nilai `baris`
+    terakhir dari progress; chunk sampai baris itu sudah di-stage dan dilewati.
+    """
+    impor = impor or uuid.uuid4().hex
+    # Chunk yang di-stage setelah progress terakhir (proses mati sebelum mencatatnya) diulang
+    db.buang_impor(impor, setelah_baris=lewati_baris, path=path)
+    try:
+        for chunk, read, total in iter_excel_chunks(file, chunk_rows):
+            if read <= lewati_baris:
+                continue
+            df_processed = presensi.format_presensi_data(chunk, mapping)
+            if not df_processed.empty:
+                db.stage_absensi(presensi.to_absensi(df_processed, year, month), impor, read, path=path)
+            if progress:
+                progress(min(read / total, 1.0) if total else None, read)
+        return db.publish_absensi(impor, path=path)
+    except Exception:
+        db.buang_impor(impor, path=path)
+        raise
+
+
+# --- Import batch (CLI) ---
+#
+#     python -m ingest data/absensi/ --workers 4
+#     python -m ingest data/absensi/ --manifest manifest.csv --db absensi.db
+#
+# File di-parse dan ditransformasi paralel di process pool; hasilnya dikirim
+# kembali ke proses utama yang menjadi satu-satunya penulis ke SQLite.
+
+BULAN = {
+    "januari": 1, "februari": 2, "maret": 3, "april": 4, "mei": 5, "juni": 6,
+    "juli": 7, "agustus": 8, "september": 9, "oktober": 10, "november": 11, "desember": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "agu": 8, "agt": 8,
+    "sep": 9, "okt": 10, "nov": 11, "des": 12,
+}
+
+_POLA_PERIODE = (
+    (re.compile(r"(?<!\d)(20\d\d)[-_. ]?(0[1-9]|1[0-2])(?!\d)"), ("tahun", "bulan")),
+    (re.compile(r"(?<!\d)(0?[1-9]|1[0-2])[-_. ](20\d\d)(?!\d)"), ("bulan", "tahun")),
+)
+
+
+def parse_periode(filename):
+    """
+    Tebak (tahun, bulan) dari nama file, mis. "absensi_2024-05.xlsx",
+    "presensi 05-2024.xlsx" atau "Absensi Mei 2024.xlsx". None bila tidak dikenali.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0].lower()
+    for pola, urutan in _POLA_PERIODE:
+        cocok = pola.search(stem)
+        if cocok:
+            nilai = dict(zip(urutan, map(int, cocok.groups())))
+            return nilai["tahun"], nilai["bulan"]
+    tahun = re.search(r"(?<!\d)(20\d\d)(?!\d)", stem)
+    for kata in re.findall(r"[a-z]+", stem):
+        if tahun and kata in BULAN:
+            return int(tahun[1]), BULAN[kata]
+    return None
+
+
+def read_manifest(path):
+    """Manifest CSV dengan kolom file, tahun, bulan -> dict nama file -> (tahun, bulan)."""
+    df = pd.read_csv(path)
+    return {os.path.basename(str(f)): (int(t), int(b)) for f, t, b in zip(df["file"], df["tahun"], df["bulan"])}
+
+
+def transform_file(path, year, month, mapping):
+    """Worker: baca satu file per chunk dan kembalikan (DataFrame absensi, baris sheet, detik)."""
+    start = time.perf_counter()
+    parts, read = [], 0
+    for chunk, read, _ in iter_excel_chunks(path):
+        df_processed = presensi.format_presensi_data(chunk, mapping)
+        if not df_processed.empty:
+            parts.append(presensi.to_absensi(df_processed, year, month)[db.ABSENSI_COLUMNS + ["karyawan_id"]])
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=db.ABSENSI_COLUMNS + ["karyawan_id"])
+    return df, read, time.perf_counter() - start
+
+
+def import_directory(directory, manifest=None, workers=None, path=None, pattern="*.xlsx"):
+    """
+    Import semua file presensi di sebuah direktori. Mengembalikan list laporan per file
+    (dict: file, periode, baris, parse_s, tulis_s, inserted/updated/unchanged atau error).
+    """
+    files = sorted(glob.glob(os.path.join(directory, pattern)))
+    periode_manifest = read_manifest(manifest) if manifest else {}
+    mapping = db.get_karyawan_mapping(path)
+    laporan = []
+
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for file in files:
+            periode = periode_manifest.get(os.path.basename(file)) or parse_periode(file)
+            if periode is None:
+                laporan.append({"file": file, "error": "tahun/bulan tidak dikenali dari nama file atau manifest"})
+                continue
+            jobs[pool.submit(transform_file, file, *periode, mapping)] = (file, periode)
+
+        # Proses utama adalah satu-satunya penulis: satu transaksi bulk per file
+        for future in as_completed(jobs):
+            file, periode = jobs[future]
+            entry = {"file": file, "periode": f"{periode[0]}-{periode[1]:02d}"}
+            try:
+                df, read, parse_s = future.result()
+                start = time.perf_counter()
+                hasil = db.save_absensi_to_db(df, path=path)
+                entry.update(baris=len(df), baris_sheet=read, parse_s=parse_s,
+                             tulis_s=time.perf_counter() - start, **hasil)
+            except Exception as e:
+                entry["error"] = str(e)
+            laporan.append(entry)
+    return laporan
+
+
+def print_laporan(laporan):
+    print(f"{'file':<40} {'periode':<8} {'baris':>7} {'parse s':>8} {'tulis s':>8} {'baris/s':>9}  hasil")
+    for entry in sorted(laporan, key=lambda e: os.path.basename(e["file"]).lower()):
+        name = os.path.basename(entry["file"])[:40]
+        if "error" in entry:
+            print(f"{name:<40} {entry.get('periode', '-'):<8} GAGAL: {entry['error']}")
+            continue
+        total_s = entry["parse_s"] + entry["tulis_s"]
+        print(f"{name:<40} {entry['periode']:<8} {entry['baris']:>7} {entry['parse_s']:>8.2f} "
+              f"{entry['tulis_s']:>8.2f} {entry['baris'] / total_s if total_s else 0:>9.0f}  "
+              f"{entry['inserted']} baru, {entry['updated']} diperbarui, {entry['unchanged']} tetap")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import batch file presensi bulanan (.xlsx) tanpa Streamlit.")
+    parser.add_argument("directory", help="direktori berisi file presensi")
+    parser.add_argument("--manifest", help="CSV berisi kolom file, tahun, bulan (menggantikan tebakan nama file)")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah proses parser (default: jumlah CPU)")
+    parser.add_argument("--db", default=None, help=f"path database (default: {db.DB_PATH})")
+    parser.add_argument("--pattern", default="*.xlsx")
+    args = parser.parse_args(argv)
+
+    db.init_db(args.db)
+    start = time.perf_counter()
+    laporan = import_directory(args.directory, args.manifest, args.workers, args.db, args.pattern)
+    print_laporan(laporan)
+    total = sum(e.get("baris", 0) for e in laporan)
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(laporan)} file, {total} baris dalam {elapsed:.2f} s ({total / elapsed if elapsed else 0:.0f} baris/s)")
+    return 1 if any("error" in e for e in laporan) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
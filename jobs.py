@@ -0,0 +1,299 @@
+"""
+Antrian pekerjaan latar belakang berbasis tabel `jobs` di SQLite.
+
+Upload absensi, persetujuan izin massal dan bangun ulang rekap dikirim ke
+antrian dengan submit() lalu dikerjakan oleh satu thread runner per database,
+sehingga skrip Streamlit langsung selesai dan halaman cukup memantau status dan
+progress lewat get(). Satu runner berarti satu penulis, sama seperti import CLI.
+Tulisan pembukuan antrian memakai catat_versi=False supaya detak dan progress
+tidak mengosongkan cache hasil baca db.
+
+Pekerjaan tahan restart: runner mengirim detak selama pekerjaan berjalan, dan
+pekerjaan "berjalan" yang detaknya berhenti (prosesnya mati) diambil ulang dari
+checkpoint terakhir. Setiap handler idempoten (upsert absensi, persetujuan
+hanya untuk izin yang masih pending, rekap dihitung ulang penuh), jadi
+mengulang sebagian pekerjaan tidak merusak data. Upload absensi baru mengubah
+tabel absensi di transaksi terakhirnya (ingest.ingest_excel); pekerjaan yang gagal
+membuang chunk yang sudah di-stage. Kegagalan karena database dikunci diulang,
+kegagalan lain (mis. file tidak valid) tidak.
+"""
+import io
+import json
+import logging
+import threading
+import time
+
+import pandas as pd
+
+import db
+import ingest
+
+STATUS_ANTRI = "antri"
+STATUS_BERJALAN = "berjalan"
+STATUS_SELESAI = "selesai"
+STATUS_GAGAL = "gagal"
+STATUS_AKHIR = (STATUS_SELESAI, STATUS_GAGAL)
+
+DETAK_DETIK = 5  # interval pembaruan `diperbarui` selama pekerjaan berjalan
+BASI_DETIK = 30  # pekerjaan berjalan tanpa detak selama ini dianggap ditinggal proses yang mati
+MAKS_PERCOBAAN = 3
+POLL_DETIK = 1.0
+SIMPAN_HARI = 30  # pekerjaan selesai/gagal yang lebih tua dari ini dihapus saat runner start
+BATCH_IZIN = 200
+
+logger = logging.getLogger("absensi.jobs")
+
+_KOLOM = ["id", "jenis", "params", "kunci", "status", "progress", "pesan", "checkpoint", "hasil",
+          "percobaan", "dibuat", "diperbarui", "selesai"]
+
+HANDLERS = {}
+
+
+def handler(jenis):
+    """Daftarkan fungsi handler(job) untuk jenis pekerjaan `jenis`."""
+    def daftar(fn):
+        HANDLERS[jenis] = fn
+        return fn
+    return daftar
+
+
+def _baris(row):
+    job = dict(zip(_KOLOM, row))
+    for key in ("params", "checkpoint", "hasil"):
+        job[key] = json.loads(job[key]) if job[key] else None
+    return job
+
+
+def submit(jenis, params=None, berkas=None, kunci=None, path=None):
+    """
+    Masukkan pekerjaan ke antrian dan kembalikan id-nya. Bila pekerjaan aktif
+    (antri/berjalan) dengan `kunci` yang sama sudah ada, id pekerjaan itu yang
+    dikembalikan sehingga submit ganda tidak menjalankan pekerjaan dua kali.
+    """
+    if jenis not in HANDLERS:
+        raise ValueError(f"Jenis pekerjaan tidak dikenal: {jenis}")
+    with db.transaction(path, catat_versi=False) as c:
+        if kunci:
+            row = c.execute("SELECT id FROM jobs WHERE kunci = ? AND status IN (?, ?)",
+                            (kunci, STATUS_ANTRI, STATUS_BERJALAN)).fetchone()
+            if row:
+                return row[0]
+        now = time.time()
+        c.execute("INSERT INTO jobs (jenis, params, berkas, kunci, status, dibuat, diperbarui) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                  (jenis, json.dumps(params or {}), berkas, kunci, STATUS_ANTRI, now, now))
+        job_id = c.execute("SELECT last_insert_rowid()").fetchone()[0]
+    start(path).bangunkan()
+    return job_id
+
+
+def get(job_id, path=None):
+    """Status satu pekerjaan sebagai dict (tanpa berkas), atau None."""
+    with db.connect(path) as conn:
+        row = conn.execute(f"SELECT {', '.join(_KOLOM)} FROM jobs WHERE id = ?", (int(job_id),)).fetchone()
+    return _baris(row) if row else None
+
+
+def tunggu(job_id, timeout, path=None):
+    """Tunggu hingga pekerjaan selesai/gagal paling lama `timeout` detik; kembalikan status terakhirnya."""
+    batas = time.monotonic() + timeout
+    while True:
+        job = get(job_id, path)
+        if job is None or job["status"] in STATUS_AKHIR or time.monotonic() >= batas:
+            return job
+        time.sleep(0.05)
+
+
+def daftar(limit=20, path=None):
+    """Pekerjaan terbaru sebagai DataFrame (kolom params/hasil tetap JSON)."""
+    kolom = ["id", "jenis", "status", "progress", "pesan", "percobaan", "dibuat", "selesai"]
+    df = db.read_sql(f"SELECT {', '.join(kolom)} FROM jobs ORDER BY id DESC LIMIT ?", params=(int(limit),), path=path)
+    for col in ("dibuat", "selesai"):
+        df[col] = pd.to_datetime(df[col], unit="s")
+    return df
+
+
+class Job:
+    """Pekerjaan yang sedang dijalankan, diteruskan ke handler."""
+
+    def __init__(self, row, path):
+        self.id, self.jenis = row["id"], row["jenis"]
+        self.params = row["params"] or {}
+        self.checkpoint = row["checkpoint"] or {}
+        self.path = path
+
+    def berkas(self):
+        with db.connect(self.path) as conn:
+            row = conn.execute("SELECT berkas FROM jobs WHERE id = ?", (self.id,)).fetchone()
+        return bytes(row[0]) if row and row[0] is not None else None
+
+    def kabar(self, progress=None, pesan=None, checkpoint=None):
+        """Catat progress (0..1), pesan dan checkpoint; checkpoint dipakai bila pekerjaan diulang."""
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+        db.execute("UPDATE jobs SET progress = COALESCE(?, progress), pesan = COALESCE(?, pesan), "
+                   "checkpoint = ?, diperbarui = ? WHERE id = ?",
+                   (progress, pesan, json.dumps(self.checkpoint), time.time(), self.id),
+                   path=self.path, catat_versi=False)
+
+
+def _ambil(path):
+    """Klaim pekerjaan berikutnya: yang antri, atau yang berjalan tetapi detaknya sudah basi."""
+    while True:
+        now = time.time()
+        # Kandidat dibaca tanpa lock tulis; antrian biasanya kosong, dan BEGIN IMMEDIATE
+        # setiap POLL_DETIK akan berebut lock dengan upload dan import CLI
+        with db.connect(path) as conn:
+            row = conn.execute(f"SELECT {', '.join(_KOLOM)} FROM jobs "
+                               "WHERE status = ? OR (status = ? AND diperbarui < ?) ORDER BY id LIMIT 1",
+                               (STATUS_ANTRI, STATUS_BERJALAN, now - BASI_DETIK)).fetchone()
+        if row is None:
+            return None
+        job = _baris(row)
+        menyerah = job["status"] == STATUS_BERJALAN and job["percobaan"] >= MAKS_PERCOBAAN
+        with db.transaction(path, catat_versi=False) as c:
+            # Syarat kandidat diulang di UPDATE: proses lain mungkin sudah mengklaimnya
+            syarat = "id = ? AND (status = ? OR (status = ? AND diperbarui < ?))"
+            args = (job["id"], STATUS_ANTRI, STATUS_BERJALAN, now - BASI_DETIK)
+            if menyerah:
+                c.execute(f"UPDATE jobs SET status = ?, selesai = ?, berkas = NULL, "
+                          f"pesan = 'dihentikan setelah ' || percobaan || ' percobaan' WHERE {syarat}",
+                          (STATUS_GAGAL, now, *args))
+            else:
+                c.execute(f"UPDATE jobs SET status = ?, percobaan = percobaan + 1, diperbarui = ? WHERE {syarat}",
+                          (STATUS_BERJALAN, now, *args))
+            diklaim = c.execute("SELECT changes()").fetchone()[0] == 1
+        if menyerah and diklaim:
+            db.buang_impor(impor_pekerjaan(job["id"]), path=path)
+        elif diklaim:
+            return job
+
+
+def _detak(job_id, berhenti, path):
+    while not berhenti.wait(DETAK_DETIK):
+        try:
+            db.execute("UPDATE jobs SET diperbarui = ? WHERE id = ? AND status = ?",
+                       (time.time(), job_id, STATUS_BERJALAN), path=path, catat_versi=False)
+        except Exception:
+            # Mis. database dikunci lama oleh pekerjaan itu sendiri; coba lagi di detak berikutnya
+            logger.warning("detak pekerjaan %s gagal", job_id, exc_info=True)
+
+
+def _jalankan(row, path):
+    job = Job(row, path)
+    berhenti = threading.Event()
+    detak = threading.Thread(target=_detak, args=(job.id, berhenti, path), daemon=True)
+    detak.start()
+    try:
+        hasil = HANDLERS[job.jenis](job)
+    except Exception as e:
+        logger.exception("pekerjaan %s (%s) gagal", job.id, job.jenis)
+        galat, status, hasil, pesan = e, STATUS_GAGAL, None, str(e)
+    else:
+        galat, status, pesan = None, STATUS_SELESAI, None
+    finally:
+        berhenti.set()
+        detak.join()
+    if galat is not None and db.is_busy(galat) and row["percobaan"] + 1 < MAKS_PERCOBAAN:
+        # Database dikunci terlalu lama oleh penulis lain: antri lagi, dilanjutkan dari checkpoint
+        db.execute("UPDATE jobs SET status = ?, pesan = ?, diperbarui = ? WHERE id = ?",
+                   (STATUS_ANTRI, f"diulang: {pesan}", time.time(), job.id), path=path, catat_versi=False)
+        return
+    if galat is not None:
+        # Kegagalan lain (mis. file tidak valid) tidak diulang; chunk yang sudah di-stage dibuang
+        db.buang_impor(impor_pekerjaan(job.id), path=path)
+    db.execute("UPDATE jobs SET status = ?, progress = CASE WHEN ? = ? THEN 1.0 ELSE progress END, "
+               "pesan = COALESCE(?, pesan), hasil = ?, berkas = NULL, selesai = ?, diperbarui = ? WHERE id = ?",
+               (status, status, STATUS_SELESAI, pesan, json.dumps(hasil), time.time(), time.time(), job.id),
+               path=path, catat_versi=False)
+
+
+class Runner:
+    """Thread tunggal yang mengerjakan antrian satu database."""
+
+    def __init__(self, path):
+        self.path = path
+        self._event = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"jobs:{path}", daemon=True)
+
+    def bangunkan(self):
+        self._event.set()
+
+    def _loop(self):
+        db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND selesai < ?",
+                   (*STATUS_AKHIR, time.time() - SIMPAN_HARI * 86400), path=self.path, catat_versi=False)
+        while True:
+            try:
+                row = _ambil(self.path)
+                if row is not None:
+                    _jalankan(row, self.path)
+                    continue
+            except Exception:
+                logger.exception("runner pekerjaan gagal mengambil antrian")
+            self._event.wait(POLL_DETIK)
+            self._event.clear()
+
+
+_runners = {}
+_runners_lock = threading.Lock()
+
+
+def start(path=None):
+    """Jalankan runner untuk `path` sekali per proses (aman dipanggil di setiap rerun)."""
+    path = path or db.DB_PATH
+    runner = _runners.get(path)
+    if runner is None:
+        with _runners_lock:
+            runner = _runners.get(path)
+            if runner is None:
+                runner = _runners[path] = Runner(path)
+                runner._thread.start()
+    return runner
+
+
+# --- Handler ---
+
+def impor_pekerjaan(job_id):
+    """Kunci absensi_impor untuk chunk yang di-stage pekerjaan `job_id`."""
+    return f"job:{job_id}"
+
+
+@handler("ingest_excel")
+def _ingest_excel(job):
+    """
+    Import file presensi (berkas pekerjaan) untuk params tahun/bulan. Chunk di-stage
+    atas nama pekerjaan ini, jadi percobaan ulang melanjutkan dari checkpoint.
+    """
+    def progress(fraksi, baris):
+        job.kabar(fraksi, f"{baris} baris diproses", {"baris": baris})
+
+    berkas = job.berkas()
+    if berkas is None:
+        raise ValueError("File upload tidak ditemukan.")
+    return ingest.ingest_excel(io.BytesIO(berkas), job.params["tahun"], job.params["bulan"],
+                               db.get_karyawan_mapping(job.path), progress=progress, path=job.path,
+                               impor=impor_pekerjaan(job.id), lewati_baris=job.checkpoint.get("baris", 0))
+
+
+@handler("proses_izin")
+def _proses_izin(job):
+    """Terima/tolak izin params["ids"] per batch; tiap batch satu transaksi."""
+    ids, status = job.params["ids"], job.params["status"]
+    cp = {"berikutnya": 0, "diproses": [], "hari": 0, **job.checkpoint}
+    for mulai in range(cp["berikutnya"], len(ids), BATCH_IZIN):
+        batch = ids[mulai:mulai + BATCH_IZIN]
+        if status == db.STATUS_DITERIMA:
+            hasil = db.approve_izin(batch, skip_weekend=job.params.get("skip_weekend", False),
+                                    libur=job.params.get("libur", ()), path=job.path)
+            cp["diproses"] += hasil["disetujui"]
+            cp["hari"] += hasil["hari"]
+        else:
+            cp["diproses"] += db.set_izin_status(batch, status, path=job.path)
+        cp["berikutnya"] = mulai + len(batch)
+        job.kabar(cp["berikutnya"] / len(ids), f"{cp['berikutnya']} dari {len(ids)} izin", cp)
+    return {"diproses": cp["diproses"], "hari": cp["hari"]}
+
+
+@handler("rebuild_rekap")
+def _rebuild_rekap(job):
+    return db.rebuild_rekap(job.path)
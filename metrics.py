@@ -0,0 +1,161 @@
+"""
+Instrumentasi kinerja ringan di dalam proses.
+
+Setiap operasi yang dibungkus `instrument`/`timed` mencatat durasi, jumlah
+baris dan ukuran hasil ke jendela bergulir per operasi (N pengukuran
+terakhir), sehingga p50/p95 bisa ditampilkan di halaman Admin "Kinerja".
+Operasi yang lebih lambat dari ambang dicatat ke logger "absensi.kinerja".
+
+Dikendalikan lewat variabel lingkungan:
+    ABSENSI_METRICS=0       matikan pencatatan (wrapper hanya memeriksa satu flag)
+    ABSENSI_SLOW_MS=500     ambang log operasi lambat, dalam ms
+"""
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+ENABLED = os.environ.get("ABSENSI_METRICS", "1") != "0"
+SLOW_MS = float(os.environ.get("ABSENSI_SLOW_MS", "500"))
+WINDOW = 1000
+
+logger = logging.getLogger("absensi.kinerja")
+
+_lock = threading.Lock()
+_samples = {}  # operasi -> deque[(ms, baris, bytes)]
+_slow = deque(maxlen=100)  # (waktu, operasi, ms, detail)
+
+
+def set_enabled(enabled):
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+def set_slow_ms(ms):
+    global SLOW_MS
+    SLOW_MS = float(ms)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _slow.clear()
+
+
+def size_of(result):
+    """(baris, bytes) dari hasil operasi: DataFrame, bytes, tuple/dict berisi keduanya."""
+    if isinstance(result, pd.DataFrame):
+        # nbytes per kolom; DataFrame.memory_usage() jauh lebih mahal (ratusan µs per panggilan)
+        return len(result), int(sum(col.nbytes for _, col in result.items()))
+    if isinstance(result, (bytes, bytearray, memoryview)):
+        return None, len(result)
+    if isinstance(result, (tuple, list)) and result and isinstance(result[0], (pd.DataFrame, bytes)):
+        return size_of(result[0])
+    if isinstance(result, dict) and result and all(isinstance(v, pd.DataFrame) for v in result.values()):
+        sizes = [size_of(v) for v in result.values()]
+        return sum(r for r, _ in sizes), sum(b for _, b in sizes)
+    return None, None
+
+
+def record(name, ms, rows=None, nbytes=None, detail=None):
+    """Catat satu pengukuran (ms) untuk operasi `name`."""
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=WINDOW)
+        samples.append((ms, rows, nbytes))
+        if ms >= SLOW_MS:
+            _slow.append((time.time(), name, ms, detail))
+    if ms >= SLOW_MS:
+        logger.warning("operasi lambat: %s %.1f ms (baris=%s, bytes=%s)%s",
+                       name, ms, rows, nbytes, f" {detail}" if detail else "")
+
+
+class _Timer:
+    __slots__ = ("rows", "nbytes", "detail")
+
+    def __init__(self, detail):
+        self.rows = None
+        self.nbytes = None
+        self.detail = detail
+
+    def set_result(self, result):
+        self.rows, self.nbytes = size_of(result)
+        return result
+
+
+@contextmanager
+def timed(name, detail=None):
+    """
+    Ukur blok kode sebagai operasi `name`. Objek yang di-yield punya
+    set_result(hasil) untuk mengisi jumlah baris/bytes.
+    """
+    if not ENABLED:
+        yield _Timer(detail)
+        return
+    timer = _Timer(detail)
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        record(name, (time.perf_counter() - start) * 1000, timer.rows, timer.nbytes, timer.detail)
+
+
+def instrument(fn=None, name=None):
+    """Decorator: catat durasi, baris dan bytes hasil setiap pemanggilan fungsi."""
+    if fn is None:
+        return functools.partial(instrument, name=name)
+    op = name or f"{fn.__module__}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        rows, nbytes = size_of(result)
+        record(op, (time.perf_counter() - start) * 1000, rows, nbytes)
+        return result
+
+    return wrapper
+
+
+def summary():
+    """
+    Ringkasan per operasi dari jendela bergulir: DataFrame [operasi, n, p50_ms,
+    p95_ms, max_ms, total_ms, baris_rata2, kb_rata2], urut total waktu terbesar.
+    """
+    with _lock:
+        snapshot = {name: list(samples) for name, samples in _samples.items()}
+    rows = []
+    for name, samples in snapshot.items():
+        ms = np.array([s[0] for s in samples])
+        baris = [s[1] for s in samples if s[1] is not None]
+        nbytes = [s[2] for s in samples if s[2] is not None]
+        rows.append({
+            "operasi": name,
+            "n": len(ms),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "max_ms": float(ms.max()),
+            "total_ms": float(ms.sum()),
+            "baris_rata2": float(np.mean(baris)) if baris else None,
+            "kb_rata2": float(np.mean(nbytes)) / 1024 if nbytes else None,
+        })
+    columns = ["operasi", "n", "p50_ms", "p95_ms", "max_ms", "total_ms", "baris_rata2", "kb_rata2"]
+    return pd.DataFrame(rows, columns=columns).sort_values("total_ms", ascending=False, ignore_index=True)
+
+
+def slow_log():
+    """Operasi lambat terakhir: DataFrame [waktu, operasi, ms, detail], terbaru di atas."""
+    with _lock:
+        entries = list(_slow)
+    df = pd.DataFrame(entries, columns=["waktu", "operasi", "ms", "detail"])
+    df["waktu"] = pd.to_datetime(df["waktu"], unit="s")
+    return df.iloc[::-1].reset_index(drop=True)
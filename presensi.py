@@ -0,0 +1,138 @@
+"""
+Transformasi data presensi mesin fingerprint (format lebar Excel) ke format absensi.
+
+Semua langkah dikerjakan per kolom (vectorized): jam "datang" di-parse sekali
+per nilai unik menjadi menit sejak tengah malam lalu dibandingkan dengan batas
+jam masuk, dan divisi ditempelkan dengan hash join ke mapping karyawan.
+"""
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+BATAS_MASUK = "09:17"
+
+REQUIRED_COLUMNS = ['ID', 'Nama', 'Jenis']
+
+# Sama dengan pola yang diterima datetime.strptime(x, "%H:%M")
+_POLA_JAM = re.compile(r"(2[0-3]|[0-1]\d|\d):([0-5]\d|\d)")
+
+
+def _menit(waktu):
+    return waktu.hour * 60 + waktu.minute + waktu.second / 60 + waktu.microsecond / 60_000_000
+
+
+_BATAS_MENIT = _menit(datetime.strptime(BATAS_MASUK, "%H:%M"))
+
+
+def cek_ketepatan_waktu(waktu_masuk):
+    """Status satu nilai jam masuk: "Telat", "Tepat Waktu" atau "Invalid Time"."""
+    return klasifikasi_waktu(pd.Series([waktu_masuk], dtype=object)).iloc[0]
+
+
+def _menit_satu(nilai):
+    if isinstance(nilai, str):
+        cocok = _POLA_JAM.fullmatch(nilai.strip())
+        return int(cocok[1]) * 60 + int(cocok[2]) if cocok else np.nan
+    if isinstance(nilai, datetime) and nilai is not pd.NaT:
+        return _menit(nilai)
+    return np.nan
+
+
+def menit_sejak_tengah_malam(waktu):
+    """
+    Ubah Series jam masuk menjadi menit sejak tengah malam (float).
+    String "HH:MM" dan nilai datetime/Timestamp didukung; selain itu NaN.
+    """
+    if pd.api.types.is_datetime64_any_dtype(waktu):
+        return waktu.dt.hour * 60 + waktu.dt.minute + waktu.dt.second / 60 + waktu.dt.microsecond / 60_000_000
+    # Jam absen hanya punya sedikit nilai unik (maks. 1440 string "HH:MM"), jadi cukup
+    # nilai uniknya yang di-parse lalu disebar kembali lewat kode factorize.
+    kode, unik = pd.factorize(waktu)
+    menit_unik = np.array([_menit_satu(v) for v in unik] + [np.nan], dtype=float)
+    return pd.Series(menit_unik[kode], index=waktu.index)
+
+
+def klasifikasi_waktu(waktu, batas=BATAS_MASUK):
+    """Klasifikasi Series jam masuk menjadi "Telat"/"Tepat Waktu"/"Invalid Time"."""
+    batas_menit = _menit(datetime.strptime(batas, "%H:%M")) if batas != BATAS_MASUK else _BATAS_MENIT
+    menit = menit_sejak_tengah_malam(waktu)
+    status = np.where(menit.isna(), "Invalid Time", np.where(menit > batas_menit, "Telat", "Tepat Waktu"))
+    return pd.Series(status, index=waktu.index)
+
+
+def lookup_divisi(ids, mapping):
+    """Hash join ID karyawan ke divisi; ID yang tidak dikenal menjadi "No Data"."""
+    if not mapping:
+        return pd.Series("No Data", index=ids.index)
+    posisi = pd.Index(list(mapping.keys())).get_indexer(ids)
+    nilai = np.array(list(mapping.values()) + ["No Data"], dtype=object)
+    return pd.Series(nilai[posisi], index=ids.index)
+
+
+@metrics.instrument
+def format_presensi_data(df, mapping=None, batas=BATAS_MASUK):
+    """
+    Ubah data presensi format lebar (kolom ID, Nama, Jenis, "1".."31") menjadi
+    satu baris per karyawan per tanggal dengan status ketepatan waktu.
+
+    `mapping` adalah dict ID karyawan -> divisi. Melempar ValueError bila kolom
+    wajib atau kolom tanggal tidak ditemukan.
+    """
+    # Pastikan kolom wajib ada
+    for col in REQUIRED_COLUMNS:
+        if col not in df.columns:
+            raise ValueError(f"Kolom '{col}' tidak ditemukan dalam data!")
+
+    # Identifikasi kolom tanggal (diasumsikan nama kolom berupa digit: "1", "2", ..., "31")
+    day_cols = [col for col in df.columns if str(col).isdigit()]
+    if not day_cols:
+        raise ValueError("Tidak ditemukan kolom tanggal (1-31) dalam data!")
+
+    df = df[REQUIRED_COLUMNS + day_cols].copy()
+    df["Jenis"] = df["Jenis"].str.lower()
+
+    # Ubah data dari format wide ke long
+    df_long = df.melt(
+        id_vars=REQUIRED_COLUMNS,
+        value_vars=day_cols,
+        var_name='tanggal',
+        value_name='waktu'
+    )
+    df_long = df_long.dropna(subset=['waktu'])
+
+    # Pivot data sehingga nilai pada kolom 'Jenis' menjadi kolom tersendiri
+    # (setara pivot_table(aggfunc='first'), tetapi groupby + unstack lebih cepat)
+    df_pivot = (
+        df_long.groupby(['ID', 'Nama', 'tanggal', 'Jenis'])['waktu']
+        .first()
+        .unstack('Jenis')
+        .reset_index()
+    )
+
+    if 'datang' not in df_pivot.columns:
+        df_pivot['datang'] = ""
+    if 'pulang' not in df_pivot.columns:
+        df_pivot['pulang'] = ""
+
+    # Hitung status kehadiran berdasarkan waktu "datang"
+    status = klasifikasi_waktu(df_pivot['datang'], batas)
+    status[(df_pivot['datang'] == "").to_numpy(dtype=bool, na_value=False)] = "No Data"
+    df_pivot['status'] = status
+
+    df_final = df_pivot[['ID', 'Nama', 'tanggal', 'status', 'datang', 'pulang']].copy()
+    df_final.rename(columns={'ID': 'id'}, inplace=True)
+    df_final['divisi'] = lookup_divisi(df_final['id'], mapping or {})
+    df_final = df_final[['id', 'Nama', 'divisi', 'tanggal', 'status', 'datang', 'pulang']]
+    return df_final
+
+
+def to_absensi(df_processed, year, month):
+    """Siapkan hasil format_presensi_data untuk tabel absensi (tanggal ISO, nama kolom DB)."""
+    df = df_processed.rename(columns={"id": "karyawan_id", "Nama": "nama", "datang": "jam_masuk", "pulang": "jam_keluar"})
+    hari = pd.to_numeric(df["tanggal"].astype(str)).astype(int).astype(str).str.zfill(2)
+    df["tanggal"] = f"{year}-{month:02d}-" + hari
+    return df
@@ -0,0 +1,166 @@
+import sqlite3
+
+import pytest
+
+import db
+import metrics
+
+
+@pytest.fixture
+def path(tmp_path):
+    metrics.set_enabled(False)
+    path = str(tmp_path / "absensi.db")
+    db.ensure_db(path)
+    db.execute("INSERT INTO karyawan VALUES (1, 'Budi Santoso', 'HR')", path=path)
+    yield path
+    db.get_pool(path).close()
+
+
+def izin_baru(path, jenis, tanggal_izin, jumlah_hari, nama="Budi Santoso"):
+    db.save_izin(nama, "HR", jenis, "2024-06-01", tanggal_izin, jumlah_hari, path=path)
+    return int(db.read_sql("SELECT MAX(id) AS id FROM izin", path=path)["id"][0])
+
+
+def test_rekap_mengikuti_hari_yang_dilewati_saat_persetujuan(path):
+    # Cuti Jumat-Minggu, disetujui tanpa Sabtu/Minggu: hanya Jumat yang dihitung
+    izin_id = izin_baru(path, "Cuti", "2024-06-07", 3)
+    assert db.approve_izin([izin_id], skip_weekend=True, path=path)["hari"] == 1
+
+    for _ in range(2):  # langsung setelah persetujuan, lalu setelah rebuild_rekap
+        kalender = db.calendar_counts("2024-06-06", "2024-06-11", path=path)
+        assert kalender[["tanggal", "tidak_hadir"]].values.tolist() == [["2024-06-07", 1]]
+        assert db.load_rekap_bulanan(2024, 6, path=path)["cuti"].tolist() == [1]
+        db.rebuild_rekap(path)
+
+
+def test_rekap_melewati_tanggal_libur(path):
+    izin_id = izin_baru(path, "Sakit", "2024-06-10", 2)
+    db.approve_izin([izin_id], libur=["2024-06-11"], path=path)
+    db.rebuild_rekap(path)
+    assert db.load_rekap_bulanan(2024, 6, path=path)["sakit"].tolist() == [1]
+
+
+def test_rincian_harian_hanya_menghitung_izin_diterima(path):
+    db.execute("INSERT INTO karyawan VALUES (2, 'Sari', 'IT')", path=path)
+    for nama, divisi in (("Budi Santoso", "HR"), ("Sari", "IT")):
+        db.save_absensi_to_db(db.pd.DataFrame([[nama, divisi, "2024-06-10", "08:00", "17:00", "Tepat Waktu"]],
+                                              columns=db.ABSENSI_COLUMNS), path)
+    izin_baru(path, "Izin", "2024-06-10", 1)  # pending
+    ditolak = izin_baru(path, "Sakit", "2024-06-10", 1, nama="Sari")
+    db.set_izin_status([ditolak], db.STATUS_DITOLAK, path=path)
+
+    rincian = db.daily_summary("2024-06-10", path=path)
+    assert sorted(rincian["hadir"]["nama"]) == ["Budi Santoso", "Sari"]
+    assert rincian["tidak_hadir"].empty
+    assert db.calendar_counts("2024-06-10", "2024-06-11", path=path)["tidak_hadir"].tolist() == [0]
+
+
+def test_absensi_satu_baris_per_karyawan_apa_pun_ejaan_nama(path):
+    izin_id = izin_baru(path, "Izin", "2024-06-10", 1, nama="budi santoso ")
+    db.approve_izin([izin_id], path=path)
+    hasil = db.save_absensi_to_db(db.pd.DataFrame([["Budi Santoso", "HR", "2024-06-10", "08:00", "17:00", "Tepat Waktu"]],
+                                                  columns=db.ABSENSI_COLUMNS), path)
+    assert hasil == {"inserted": 0, "updated": 1, "unchanged": 0}
+
+    absensi = db.read_sql("SELECT karyawan_id, nama, status FROM absensi WHERE tanggal = '2024-06-10'", path=path)
+    assert absensi.values.tolist() == [[1, "Budi Santoso", "Tepat Waktu"]]
+    rekap = db.load_rekap_bulanan(2024, 6, path=path)
+    assert rekap[["nama", "hadir", "izin"]].values.tolist() == [["Budi Santoso", 1, 1]]
+
+
+def test_migrasi_membuang_absensi_ganda_per_karyawan(path):
+    # Keadaan sebelum migrasi 14: hanya nama yang unik, jadi satu karyawan bisa punya dua baris
+    with db.transaction(path) as c:
+        c.execute("DROP INDEX ux_absensi_karyawan_tanggal")
+        c.execute("DROP INDEX ux_absensi_nama_tanggal")
+        c.execute("CREATE UNIQUE INDEX ux_absensi_nama_tanggal ON absensi(nama, tanggal)")
+        c.executemany("INSERT INTO absensi (karyawan_id, nama, divisi, tanggal, jam_masuk, jam_keluar, status) "
+                      "VALUES (1, ?, 'HR', '2024-06-10', ?, ?, ?)",
+                      [("Budi Santoso", "08:00", "17:00", "Tepat Waktu"), ("budi santoso ", "", "", "Izin")])
+        c.execute("DELETE FROM schema_version WHERE version = 14")
+    db.init_db(path)
+
+    absensi = db.read_sql("SELECT nama, status FROM absensi", path=path)
+    assert absensi.values.tolist() == [["Budi Santoso", "Tepat Waktu"]]
+    assert db.load_rekap_bulanan(2024, 6, path=path)["hadir"].tolist() == [1]
+
+
+def test_migrasi_mempertahankan_absensi_di_atas_baris_izin_lama(tmp_path):
+    # Database kode lama: tanpa indeks unik, baris "Izin" ditulis setelah upload absensi
+    metrics.set_enabled(False)
+    path = str(tmp_path / "lama.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE absensi (id INTEGER PRIMARY KEY AUTOINCREMENT, nama TEXT, divisi TEXT, "
+                 "tanggal TEXT, jam_masuk TEXT, jam_keluar TEXT, status TEXT)")
+    conn.executemany("INSERT INTO absensi (nama, divisi, tanggal, jam_masuk, jam_keluar, status) "
+                     "VALUES ('Budi Santoso', 'HR', ?, ?, ?, ?)",
+                     [("2024-06-10", "08:00", "17:00", "Tepat Waktu"), ("2024-06-10", "", "", "Izin"),
+                      ("2024-06-11 00:00:00", "08:30", "17:00", "Telat"), ("2024-06-11", "", "", "izin")])
+    conn.commit()
+    conn.close()
+    try:
+        db.init_db(path)
+        absensi = db.read_sql("SELECT tanggal, jam_masuk, status FROM absensi ORDER BY tanggal", path=path)
+        assert absensi.values.tolist() == [["2024-06-10", "08:00", "Tepat Waktu"], ["2024-06-11", "08:30", "Telat"]]
+    finally:
+        db.get_pool(path).close()
+
+
+def test_rincian_harian_melewati_weekend_dan_libur_izin(path):
+    # Cuti Jumat-Senin tanpa Sabtu/Minggu dan dengan Senin libur: hanya Jumat tidak hadir
+    izin_id = izin_baru(path, "Cuti", "2024-06-07", 4)
+    db.approve_izin([izin_id], skip_weekend=True, libur=["2024-06-10"], path=path)
+    for tanggal, nama in (("2024-06-07", ["Budi Santoso"]), ("2024-06-08", []), ("2024-06-09", []),
+                          ("2024-06-10", [])):
+        assert db.daily_summary(tanggal, path=path)["tidak_hadir"]["nama"].tolist() == nama, tanggal
+    kalender = db.calendar_counts("2024-06-07", "2024-06-11", path=path)
+    assert kalender[["tanggal", "tidak_hadir"]].values.tolist() == [["2024-06-07", 1]]
+
+
+def test_rekap_memakai_divisi_karyawan_terdaftar(path):
+    db.save_absensi_to_db(db.pd.DataFrame([["Budi Santoso", "hr", "2024-06-10", "08:00", "17:00", "Tepat Waktu"],
+                                           ["Tamu", "Umum", "2024-06-10", "08:00", "17:00", "Tepat Waktu"]],
+                                          columns=db.ABSENSI_COLUMNS), path)
+    izin_id = izin_baru(path, "Cuti", "2024-06-11", 1)
+    db.execute("UPDATE izin SET divisi = 'hr ' WHERE id = ?", (izin_id,), path=path)
+    db.approve_izin([izin_id], path=path)
+
+    for _ in range(2):  # langsung setelah tulis, lalu setelah rebuild_rekap
+        divisi = db.load_rekap_divisi("2024-06-01", "2024-07-01", path=path)
+        assert divisi[["divisi", "hadir", "cuti"]].values.tolist() == [["HR", 1, 1], ["Umum", 1, 0]]
+        rekap = db.load_rekap_bulanan(2024, 6, path=path)
+        assert rekap[["nama", "divisi"]].values.tolist() == [["Budi Santoso", "HR"], ["Tamu", "Umum"]]
+        db.rebuild_rekap(path)
+
+
+def test_cache_membaca_data_baru_setelah_tulis(path):
+    db.cache_clear()
+    juni = ("2024-06-01", "2024-07-01")
+    assert db.load_absensi(*juni, path=path).empty
+    assert db.calendar_counts(*juni, path=path).empty
+    db.load_absensi(*juni, path=path)
+    assert db.cache_stats()["hit"] == 1
+
+    db.save_absensi_to_db(db.pd.DataFrame([["Budi Santoso", "HR", "2024-06-10", "08:00", "17:00", "Tepat Waktu"]],
+                                          columns=db.ABSENSI_COLUMNS), path)
+    assert db.load_absensi(*juni, path=path)["status"].tolist() == ["Tepat Waktu"]
+    assert db.calendar_counts(*juni, path=path)["hadir"].tolist() == [1]
+
+    db.approve_izin([izin_baru(path, "Cuti", "2024-06-11", 1)], path=path)
+    assert db.calendar_counts(*juni, path=path)["tidak_hadir"].tolist() == [0, 1]
+
+    # Tulisan karyawan dari luar modul ini tetap terlihat lewat trigger versi karyawan
+    assert db.load_rekap_bulanan(2024, 6, path=path)["nama"].tolist() == ["Budi Santoso"]
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("UPDATE karyawan SET Nama = 'Budi S.' WHERE ID = 1")
+    conn.close()
+    assert db.load_rekap_bulanan(2024, 6, path=path)["nama"].tolist() == ["Budi S."]
+
+
+def test_ukuran_cache_menghitung_isi_teks():
+    # Kolom object hanya menyimpan pointer; ukuran cache harus ikut menghitung string-nya
+    nama = db.pd.Series([f"Karyawan dengan nama panjang {i:04d}" for i in range(1000)], dtype=object)
+    df = db.pd.DataFrame({"nama": nama, "hadir": 1})
+    assert db._ukuran(df) == df.memory_usage(deep=True).sum() > 2 * sum(col.nbytes for _, col in df.items())
+    assert db._ukuran((df, 3)) > db._ukuran({"a": df}) == db._ukuran(df)
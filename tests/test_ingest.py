@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+import db
+import ingest
+import metrics
+from bench.presensi import make_sheet
+
+
+@pytest.fixture
+def path(tmp_path):
+    metrics.set_enabled(False)
+    path = str(tmp_path / "absensi.db")
+    db.ensure_db(path)
+    yield path
+    db.get_pool(path).close()
+
+
+def jumlah(path, tabel):
+    return int(db.read_sql(f"SELECT COUNT(*) AS n FROM {tabel}", path=path)["n"][0])
+
+
+def test_file_gagal_di_tengah_tidak_mengubah_absensi(path, tmp_path):
+    # Baris karyawan pertama muncul lagi di akhir file: baru ketahuan setelah beberapa chunk
+    sheet = make_sheet(10, 5)
+    sheet = pd.concat([sheet, sheet.head(1)], ignore_index=True)
+    xlsx = tmp_path / "absensi.xlsx"
+    sheet.to_excel(xlsx, index=False)
+
+    with pytest.raises(ValueError, match="tidak berurutan"):
+        ingest.ingest_excel(str(xlsx), 2024, 5, {}, chunk_rows=4, path=path)
+    assert jumlah(path, "absensi") == 0
+    assert jumlah(path, "absensi_impor") == 0
+
+    sheet.iloc[:-1].to_excel(xlsx, index=False)
+    hasil = ingest.ingest_excel(str(xlsx), 2024, 5, {}, chunk_rows=4, path=path)
+    assert hasil["inserted"] == jumlah(path, "absensi") > 0
+    assert jumlah(path, "absensi_impor") == 0
@@ -0,0 +1,121 @@
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import db
+import ingest
+import jobs
+import metrics
+from bench.presensi import make_sheet
+
+_lepas = threading.Event()
+
+
+@jobs.handler("tes_tunggu")
+def _tes_tunggu(job):
+    _lepas.wait(10)
+    return {"ok": True}
+
+
+class Mati(BaseException):
+    """Proses mati di tengah pekerjaan (bukan Exception: handler tidak sempat membersihkan)."""
+
+
+@pytest.fixture
+def path(tmp_path):
+    metrics.set_enabled(False)
+    path = str(tmp_path / "absensi.db")
+    db.ensure_db(path)
+    yield path
+    db.get_pool(path).close()
+
+
+def job_baru(path, jenis, params=None, berkas=None, status=jobs.STATUS_ANTRI, diperbarui=None, percobaan=0,
+             checkpoint=None):
+    now = time.time()
+    with db.transaction(path, catat_versi=False) as c:
+        c.execute("INSERT INTO jobs (jenis, params, berkas, status, percobaan, checkpoint, dibuat, diperbarui) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                  (jenis, json.dumps(params or {}), berkas, status, percobaan,
+                   json.dumps(checkpoint) if checkpoint else None, now, diperbarui or now))
+        return c.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+
+def test_submit_dengan_kunci_sama_memakai_pekerjaan_aktif(path):
+    _lepas.clear()
+    pertama = jobs.submit("tes_tunggu", kunci="sama", path=path)
+    assert jobs.submit("tes_tunggu", kunci="sama", path=path) == pertama
+    assert jobs.submit("tes_tunggu", kunci="lain", path=path) != pertama
+    _lepas.set()
+    assert jobs.tunggu(pertama, 10, path=path)["status"] == jobs.STATUS_SELESAI
+    # Setelah selesai, kunci yang sama membuat pekerjaan baru
+    assert jobs.submit("tes_tunggu", kunci="sama", path=path) != pertama
+
+
+def test_pekerjaan_berjalan_dengan_detak_basi_diambil_ulang(path):
+    basi = time.time() - jobs.BASI_DETIK - 1
+    segar = job_baru(path, "rebuild_rekap", status=jobs.STATUS_BERJALAN, percobaan=1)
+    ditinggal = job_baru(path, "rebuild_rekap", status=jobs.STATUS_BERJALAN, diperbarui=basi, percobaan=1,
+                         checkpoint={"baris": 7})
+    menyerah = job_baru(path, "rebuild_rekap", status=jobs.STATUS_BERJALAN, diperbarui=basi,
+                        percobaan=jobs.MAKS_PERCOBAAN)
+
+    row = jobs._ambil(path)
+    assert (row["id"], row["checkpoint"]) == (ditinggal, {"baris": 7})
+    assert jobs.get(ditinggal, path)["percobaan"] == 2
+    assert jobs._ambil(path) is None  # yang segar masih dikerjakan prosesnya
+    assert jobs.get(segar, path)["status"] == jobs.STATUS_BERJALAN
+    assert jobs.get(menyerah, path)["status"] == jobs.STATUS_GAGAL
+
+
+def test_antrian_kosong_tidak_menunggu_lock_tulis(path):
+    # Penulis lain (mis. import CLI) sedang memegang lock tulis
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        start = time.perf_counter()
+        assert jobs._ambil(path) is None
+        assert time.perf_counter() - start < 1
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def test_upload_dilanjutkan_dari_checkpoint_setelah_proses_mati(path, tmp_path):
+    xlsx = tmp_path / "absensi.xlsx"
+    make_sheet(1100, 3).to_excel(xlsx, index=False)  # 2200 baris: dua chunk CHUNK_ROWS
+    job_id = job_baru(path, "ingest_excel", {"tahun": 2024, "bulan": 5}, berkas=xlsx.read_bytes())
+
+    job = jobs.Job(jobs._ambil(path), path)
+    kabar = job.kabar
+
+    def kabar_lalu_mati(*args, **kwargs):
+        kabar(*args, **kwargs)
+        raise Mati()
+
+    job.kabar = kabar_lalu_mati
+    with pytest.raises(Mati):
+        jobs.HANDLERS["ingest_excel"](job)
+    assert db.read_sql("SELECT COUNT(*) AS n FROM absensi", path=path)["n"][0] == 0
+    db.execute("UPDATE jobs SET diperbarui = ? WHERE id = ?", (time.time() - jobs.BASI_DETIK - 1, job_id),
+               path=path, catat_versi=False)
+
+    row = jobs._ambil(path)
+    assert row["checkpoint"]["baris"] < 2201
+    jobs._jalankan(row, path)
+    selesai = jobs.get(job_id, path)
+    assert selesai["status"] == jobs.STATUS_SELESAI
+
+    utuh = str(tmp_path / "utuh.db")
+    db.ensure_db(utuh)
+    try:
+        assert selesai["hasil"] == ingest.ingest_excel(str(xlsx), 2024, 5, {}, path=utuh)
+        kolom = "nama, tanggal, jam_masuk, jam_keluar, status"
+        assert db.read_sql(f"SELECT {kolom} FROM absensi ORDER BY nama, tanggal", path=path).equals(
+            db.read_sql(f"SELECT {kolom} FROM absensi ORDER BY nama, tanggal", path=utuh))
+    finally:
+        db.get_pool(utuh).close()
+    assert db.read_sql("SELECT COUNT(*) AS n FROM absensi_impor", path=path)["n"][0] == 0
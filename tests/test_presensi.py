@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+import presensi
+from bench.presensi import _best_of, legacy_format_presensi_data, make_sheet
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_format_presensi_data_sama_dengan_implementasi_lama(seed):
+    # Sheet berisi sel aneh (kosong, spasi, "9:5", "25:00", detik, datetime, angka)
+    sheet = make_sheet(60, 31, seed=seed)
+    mapping = {k + 1: f"Divisi {k % 8}" for k in range(0, 60, 2)}  # sebagian ID tidak dikenal
+
+    expected = legacy_format_presensi_data(sheet.copy(), mapping)
+    result = presensi.format_presensi_data(sheet, mapping)
+
+    pd.testing.assert_frame_equal(expected, result)
+    assert (result["status"] == "Invalid Time").any()
+    assert (result["divisi"] == "No Data").any()
+
+
+@pytest.mark.benchmark
+def test_benchmark_format_presensi_data_1000_karyawan():
+    # Ukuran ekspor bulanan penuh: 1000 karyawan x 31 hari (lihat juga python -m bench.presensi)
+    sheet = make_sheet(1000, 31)
+    mapping = {k + 1: f"Divisi {k % 8}" for k in range(0, 1000, 2)}
+
+    legacy_s, expected = _best_of(1, lambda: legacy_format_presensi_data(sheet.copy(), mapping))
+    new_s, result = _best_of(3, presensi.format_presensi_data, sheet, mapping)
+
+    pd.testing.assert_frame_equal(expected, result)
+    print(f"legacy {legacy_s * 1000:.0f} ms, vectorized {new_s * 1000:.0f} ms ({legacy_s / new_s:.1f}x)")
+    assert new_s * 2 < legacy_s